@@ -0,0 +1,38 @@
+import argparse
+import time
+
+from utils.assistant_service import get_port, start_server
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Chạy dịch vụ trợ lý ảo dùng chung cho các cửa sổ trên máy này")
+    parser.add_argument("--port", type=int, default=None,
+                        help=f"Cổng lắng nghe, mặc định: {get_port()}")
+    args = parser.parse_args()
+
+    server = start_server(args.port)
+    if server is None:
+        print("Dịch vụ trợ lý ảo đã chạy ở một process khác.")
+        return
+
+    print("Đang tải mô hình AI...")
+    server.ready.wait()
+    if server.assistant is None:
+        print(f"Không thể tải mô hình AI: {server.error}")
+        server.stop()
+        return
+
+    print(f"Dịch vụ trợ lý ảo đang chạy tại cổng {server.server_port} (Ctrl+C để dừng)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"Lỗi: {e}")
@@ -0,0 +1,26 @@
+import argparse
+
+from config.database import get_connection
+from models.daily_sales import rebuild
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Tính lại bảng tổng hợp doanh số theo ngày từ dữ liệu đơn hàng")
+    parser.add_argument("--from", dest="start_day",
+                        help="Ngày bắt đầu (YYYY-MM-DD), mặc định: tất cả")
+    parser.add_argument("--to", dest="end_day",
+                        help="Ngày kết thúc (YYYY-MM-DD), mặc định: tất cả")
+    args = parser.parse_args()
+
+    print("Đang tính lại bảng tổng hợp doanh số...")
+    with get_connection() as conn:
+        days = rebuild(conn, args.start_day, args.end_day)
+    print(f"Đã tính lại {days} ngày có doanh thu.")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"Lỗi: {e}")
@@ -0,0 +1,143 @@
+"""So sánh các backend suy luận của trợ lý ảo (pipeline, quantized, onnx).
+
+Mỗi backend chạy trong một process riêng để đo bộ nhớ công bằng. Cùng một
+bộ câu hỏi tiếng Việt cố định được sinh với giải mã tất định (không lấy
+mẫu) để so khớp câu trả lời với backend pipeline hiện tại.
+
+    python benchmark_ai_backends.py
+    python benchmark_ai_backends.py --backend quantized onnx --output kq.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+PROMPTS = [
+    "Cho tôi xem menu",
+    "Quán có những loại cà phê nào?",
+    "Giá một ly cà phê sữa đá là bao nhiêu?",
+    "Tôi thích đồ uống ngọt và có sữa",
+    "Quán mở cửa lúc mấy giờ?",
+    "Có món nào không chứa cà phê không?",
+    "Tôi muốn đặt bàn cho 4 người",
+    "Trà đào cam sả có ngon không?",
+    "Làm sao để xem lại đơn hàng của tôi?",
+    "Gợi ý cho tôi một món mát lạnh cho ngày nóng",
+]
+
+# Giống chat_with_customer nhưng tắt lấy mẫu để so khớp được kết quả
+GENERATION_KWARGS = {
+    "max_length": 100,
+    "num_beams": 2,
+    "length_penalty": 1.0,
+    "do_sample": False,
+    "no_repeat_ngram_size": 2,
+}
+
+
+def peak_memory_mb():
+    """Bộ nhớ (RSS) lớn nhất của process hiện tại, tính bằng MB"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux trả về KB, macOS trả về byte
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def run_backend(name, repeat):
+    """Chạy trong process con: nạp backend, sinh câu trả lời và đo thời gian"""
+    from utils.ai_assistant import load_backend
+
+    start = time.perf_counter()
+    backend = load_backend(name)
+    load_seconds = time.perf_counter() - start
+
+    # Lần chạy đầu chậm hơn hẳn (khởi tạo bộ nhớ, biên dịch đồ thị), bỏ qua
+    backend.generate(PROMPTS[0], **GENERATION_KWARGS)
+
+    latencies = []
+    outputs = []
+    for prompt in PROMPTS:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = backend.generate(prompt, **GENERATION_KWARGS)
+            latencies.append(time.perf_counter() - start)
+        outputs.append(output)
+
+    latencies.sort()
+    return {
+        "backend": name,
+        "load_seconds": round(load_seconds, 2),
+        "median_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1),
+        "peak_memory_mb": round(peak_memory_mb(), 1),
+        "outputs": outputs,
+    }
+
+
+def benchmark(name, repeat):
+    """Chạy một backend trong process riêng, trả về kết quả hoặc lỗi"""
+    result = subprocess.run(
+        [sys.executable, __file__, "--worker", name, "--repeat", str(repeat)],
+        capture_output=True, text=True, encoding="utf-8")
+    if result.returncode != 0:
+        # Worker có thể chết mà không in gì ra stderr (ví dụ bị hệ điều hành kill)
+        lines = result.stderr.strip().splitlines()
+        error = lines[-1] if lines else f"worker thoát với mã {result.returncode}"
+        return {"backend": name, "error": error}
+    # Dòng cuối là kết quả JSON, các dòng trước là log của transformers
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="So sánh độ trễ, bộ nhớ và kết quả của các backend trợ lý ảo")
+    parser.add_argument("--backend", nargs="+",
+                        default=["pipeline", "quantized", "onnx"],
+                        help="Các backend cần đo (pipeline luôn được đo để so khớp)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Số lần chạy mỗi câu hỏi")
+    parser.add_argument("--output", help="Ghi kết quả ra file JSON")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.repeat), ensure_ascii=False))
+        return
+
+    names = ["pipeline"] + [name for name in args.backend if name != "pipeline"]
+    results = []
+    for name in names:
+        print(f"Đang đo backend {name}...")
+        results.append(benchmark(name, args.repeat))
+
+    reference = results[0].get("outputs")
+    for result in results:
+        if "error" in result:
+            print(f"- {result['backend']}: lỗi - {result['error']}")
+            continue
+        if reference:
+            same = sum(a == b for a, b in zip(result["outputs"], reference))
+            result["parity"] = round(same / len(PROMPTS), 2)
+        print(f"- {result['backend']}: nạp {result['load_seconds']}s, "
+              f"trung vị {result['median_ms']}ms, p95 {result['p95_ms']}ms, "
+              f"bộ nhớ {result['peak_memory_mb']}MB, "
+              f"trùng kết quả {result.get('parity', 0):.0%}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"prompts": PROMPTS, "results": results}, f,
+                      ensure_ascii=False, indent=2)
+        print(f"Đã ghi kết quả vào {args.output}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"Lỗi: {e}")
@@ -0,0 +1,363 @@
+"""Đo hiệu năng các đường chạy chính trên dữ liệu giả lập, không cần giao diện.
+
+Sinh dữ liệu (utils/synthetic_data.py) vào một database tạm rồi đo: tạo
+đơn (đường chạy của OrderManager.complete_order), đổi trạng thái đơn, các
+truy vấn danh sách đơn, báo cáo doanh thu, lịch sử kho và import lịch sử
+đơn hàng từ CSV. Kết quả ghi ra JSON để so sánh giữa các phiên bản.
+
+    python benchmark_hot_paths.py --orders 1000000 --output ket_qua.json
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from config import database
+from controllers import order_service
+from models import daily_sales, queries
+from models.inventory_history import fetch_history_page
+from utils.order_importer import import_order_history
+from utils.synthetic_data import generate_dataset
+
+STATUS_FLOW = ["preparing", "served", "completed"]
+
+
+def summarize(name, latencies, **extra):
+    """Thống kê thời gian của một phép đo (giây -> mili giây)"""
+    total = sum(latencies)
+    ordered = sorted(latencies)
+    return {
+        "name": name,
+        "iterations": len(latencies),
+        "total_s": round(total, 4),
+        "ops_per_s": round(len(latencies) / total, 1) if total else None,
+        "median_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        **extra,
+    }
+
+
+def measure(name, fn, iterations, setup=None, **extra):
+    """Gọi fn(i) iterations lần, đo thời gian từng lần (không tính setup(i))"""
+    latencies = []
+    for i in range(iterations):
+        if setup:
+            setup(i)
+        start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - start)
+    return summarize(name, latencies, **extra)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def free_table(table_id):
+    database.run_write(lambda conn: conn.execute(
+        "UPDATE tables SET status = 'available' WHERE id = ?", (table_id,)))
+
+
+def order_items(menu, i):
+    return [{"product_id": item_id, "quantity": 1 + i % 2, "price": price}
+            for item_id, price in menu[i % len(menu):][:3]]
+
+
+def bench_order_writes(args, results):
+    """Tạo đơn rồi đưa từng đơn qua các trạng thái, mỗi lần một transaction"""
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        table_ids = [row[0] for row in cursor.execute("SELECT id FROM tables")]
+        user_ids = [row[0] for row in cursor.execute(
+            "SELECT id FROM users WHERE role = 'customer' LIMIT 100")]
+        menu = cursor.execute(
+            "SELECT id, price FROM menu_items ORDER BY id LIMIT 20").fetchall()
+
+    created = []
+
+    def create(i):
+        commit = order_service.commit_order(
+            user_ids[i % len(user_ids)], table_ids[i % len(table_ids)],
+            order_items(menu, i))
+        return commit.order_id
+
+    # Bàn được trả lại ngoài phần đo để đơn sau luôn có bàn trống
+    def setup(i):
+        free_table(table_ids[i % len(table_ids)])
+
+    results.append(measure("create_order", lambda i: created.append(create(i)),
+                           args.writes, setup=setup))
+
+    # Cùng đường ghi đơn khi chưa có công thức món, để thấy phần trừ kho tốn bao nhiêu
+    def take_recipes(conn):
+        recipes = conn.execute(
+            "SELECT menu_item_id, inventory_id, quantity FROM recipes").fetchall()
+        conn.execute("DELETE FROM recipes")
+        return recipes
+
+    recipes = database.run_write(take_recipes)
+    results.append(measure("create_order:no_recipes", create, args.writes, setup=setup))
+    database.run_write(lambda conn: conn.executemany(
+        "INSERT INTO recipes (menu_item_id, inventory_id, quantity) VALUES (?, ?, ?)",
+        recipes))
+
+    for status in STATUS_FLOW:
+        results.append(measure(
+            f"update_order_status:{status}",
+            lambda i: database.run_write(
+                lambda conn: order_service.change_order_status(conn, created[i], status)),
+            len(created)))
+
+    results.append(bench_rush(args, table_ids, user_ids, menu))
+
+
+def bench_rush(args, table_ids, user_ids, menu):
+    """Giờ cao điểm: nhiều quầy cùng ghi đơn vào một file database.
+
+    Mỗi quầy là một thread với kết nối riêng, lần lượt xếp khách vào các bàn
+    của mình rồi hoàn tất đơn để trả bàn. Chỉ tính thời gian ghi đơn.
+    """
+    latencies = []
+    lock = threading.Lock()
+
+    def till(number):
+        tables = table_ids[number::args.tills]
+        for i in range(args.writes // args.tills):
+            commit = order_service.commit_order(
+                user_ids[i % len(user_ids)], tables[i % len(tables)],
+                order_items(menu, i))
+            database.run_write(lambda conn: order_service.change_order_status(
+                conn, commit.order_id, "completed"))
+            with lock:
+                latencies.append(commit.seconds)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=till, args=(number,))
+               for number in range(args.tills)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    return summarize(f"create_order:rush_{args.tills}_tills", latencies,
+                     orders_per_s_wall=round(len(latencies) / wall, 1))
+
+
+def bench_order_lists(args, results):
+    """Các truy vấn của danh sách đơn (trang đầu, trang sâu, tải lại từng phần)"""
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        latest = cursor.execute(queries.LATEST_ORDER_REVISION).fetchone()[0]
+        user_id = cursor.execute(
+            "SELECT user_id FROM orders ORDER BY id DESC LIMIT 1").fetchone()[0]
+
+        def page(sql, params, offset=0):
+            return lambda i: cursor.execute(
+                f"{sql} LIMIT ? OFFSET ?", params + (200, offset)).fetchall()
+
+        results.append(measure("load_orders:staff_first_page",
+                               page(queries.STAFF_ORDERS, ()), args.repeat))
+        results.append(measure("load_orders:staff_page_50",
+                               page(queries.STAFF_ORDERS, (), 200 * 50), args.repeat))
+        results.append(measure("load_orders:user_first_page",
+                               page(queries.USER_ORDERS, (user_id,)), args.repeat))
+        results.append(measure(
+            "refresh_orders:changed_since",
+            lambda i: cursor.execute(queries.ORDERS_CHANGED_SINCE,
+                                     (latest - 50,)).fetchall(),
+            args.repeat))
+
+
+def bench_reports(args, results):
+    """Báo cáo qua bảng tổng hợp và truy vấn trực tiếp để so sánh"""
+    now = datetime.now()
+    with database.get_connection() as conn:
+        for days in (1, 7, 30, 365):
+            start = (now - timedelta(days=days - 1)).replace(
+                hour=0, minute=0, second=0, microsecond=0)
+            results.append(measure(
+                f"report_summary:{days}d",
+                lambda i: daily_sales.load_sales_summary(conn, start, now),
+                args.repeat))
+
+        start = (now - timedelta(days=29)).strftime(daily_sales.DATETIME_FORMAT)
+        end = now.strftime(daily_sales.DATETIME_FORMAT)
+        cursor = conn.cursor()
+        for name in ("REPORT_DAILY_REVENUE", "REPORT_BY_CATEGORY", "REPORT_BY_ITEM"):
+            sql = getattr(queries, name)
+            results.append(measure(
+                f"report_direct:{name.lower()}:30d",
+                lambda i: cursor.execute(sql, (start, end)).fetchall(),
+                args.repeat))
+
+
+def bench_inventory_history(args, results):
+    """Một trang lịch sử kho, không lọc và lọc theo nguyên liệu"""
+    def seed(conn):
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO inventory (name, quantity, unit, threshold) VALUES (?, 0, 'gram', 100)",
+            [(f"Nguyên liệu thử {i}",) for i in range(20)])
+        inventory_ids = [row[0] for row in cursor.execute(
+            "SELECT id FROM inventory WHERE name LIKE 'Nguyên liệu thử %'")]
+        start = datetime.now() - timedelta(days=365)
+        cursor.executemany("""
+            INSERT INTO inventory_history
+                (inventory_id, type, quantity, price, supplier, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(inventory_ids[i % 20], "import" if i % 3 else "export", 100, 1000,
+               f"Nhà cung cấp {i % 7}",
+               (start + timedelta(minutes=i * 5)).strftime(daily_sales.DATETIME_FORMAT))
+              for i in range(args.history)])
+        return inventory_ids[0]
+
+    inventory_id = database.run_write(seed)
+    with database.get_connection() as conn:
+        results.append(measure("inventory_history:first_page",
+                               lambda i: fetch_history_page(conn), args.repeat))
+        results.append(measure(
+            "inventory_history:by_item",
+            lambda i: fetch_history_page(conn, inventory_id=inventory_id),
+            args.repeat))
+
+
+def bench_csv_import(args, results, work_dir):
+    """Xuất một phần đơn đã sinh ra CSV rồi import lại như dữ liệu hệ thống cũ"""
+    orders_path = os.path.join(work_dir, "orders.csv")
+    items_path = os.path.join(work_dir, "order_items.csv")
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        with open(orders_path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["order_ref", "table_number", "username", "status",
+                             "total_amount", "created_at"])
+            writer.writerows(cursor.execute("""
+                SELECT 'old-' || o.id, t.number, u.username, o.status,
+                       o.total_amount, o.created_at
+                FROM orders o
+                LEFT JOIN tables t ON t.id = o.table_id
+                LEFT JOIN users u ON u.id = o.user_id
+                ORDER BY o.id LIMIT ?
+            """, (args.import_orders,)))
+        with open(items_path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["order_ref", "menu_item", "quantity", "price"])
+            writer.writerows(cursor.execute("""
+                SELECT 'old-' || oi.order_id, m.name, oi.quantity, oi.price
+                FROM order_items oi
+                JOIN menu_items m ON m.id = oi.menu_item_id
+                WHERE oi.order_id IN (SELECT id FROM orders ORDER BY id LIMIT ?)
+            """, (args.import_orders,)))
+
+    result, days = import_order_history(orders_path, items_path)
+    results.append({
+        "name": "import_order_history",
+        "iterations": 1,
+        "rows": result.rows,
+        "total_s": round(result.seconds, 4),
+        "rows_per_s": round(result.rows_per_second, 1),
+        "rebuilt_days": days,
+    })
+
+
+def run_suite(args, work_dir):
+    db_path = args.db or os.path.join(work_dir, "benchmark.db")
+    os.environ["COFFEE_SHOP_DB_PATH"] = db_path
+    database.close_pool()
+    results = []
+
+    print(f"Đang sinh dữ liệu ({args.orders} đơn) vào {db_path}...")
+    start = time.perf_counter()
+    counts = database.run_write(lambda conn: generate_dataset(
+        conn, tables=args.tables, menu_items=args.menu_items,
+        customers=args.customers, orders=args.orders, days=args.days,
+        seed=args.seed))
+    seconds = time.perf_counter() - start
+    results.append({"name": "generate_dataset", "iterations": 1,
+                    "total_s": round(seconds, 4),
+                    "rows_per_s": round(sum(counts.values()) / seconds, 1)})
+    with database.get_connection() as conn:
+        conn.execute("ANALYZE")
+
+    for step in (bench_order_writes, bench_order_lists, bench_reports,
+                 bench_inventory_history):
+        print(f"Đang đo {step.__name__[6:]}...")
+        step(args, results)
+    print("Đang đo import_order_history...")
+    bench_csv_import(args, results, work_dir)
+    database.close_pool()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "pragmas": database.get_pragmas(),
+            "parameters": {key: value for key, value in vars(args).items()
+                           if key not in ("output", "db")},
+            "dataset": counts,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Đo hiệu năng tạo đơn, danh sách đơn, báo cáo và import trên dữ liệu giả lập")
+    parser.add_argument("--orders", type=int, default=100000, help="Số đơn giả lập")
+    parser.add_argument("--days", type=int, default=365, help="Số ngày dữ liệu")
+    parser.add_argument("--tables", type=int, default=20, help="Số bàn")
+    parser.add_argument("--menu-items", type=int, default=60, help="Số món")
+    parser.add_argument("--customers", type=int, default=500, help="Số khách hàng")
+    parser.add_argument("--writes", type=int, default=500,
+                        help="Số đơn tạo mới khi đo ghi")
+    parser.add_argument("--tills", type=int, default=4,
+                        help="Số quầy ghi đơn đồng thời khi đo giờ cao điểm")
+    parser.add_argument("--repeat", type=int, default=50,
+                        help="Số lần lặp mỗi truy vấn")
+    parser.add_argument("--history", type=int, default=50000,
+                        help="Số dòng lịch sử kho")
+    parser.add_argument("--import-orders", type=int, default=20000,
+                        help="Số đơn xuất ra CSV rồi import lại")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="Dùng file database này thay cho file tạm "
+                        "(phải là database mới)")
+    parser.add_argument("--output", help="Ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        report = run_suite(args, work_dir)
+
+    for result in report["results"]:
+        rate = result.get("ops_per_s") or result.get("rows_per_s")
+        detail = f", trung vị {result['median_ms']}ms, p95 {result['p95_ms']}ms" \
+            if "median_ms" in result else ""
+        print(f"- {result['name']}: {result['total_s']}s, {rate}/s{detail}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Đã ghi kết quả vào {args.output}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"Lỗi: {e}")
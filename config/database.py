@@ -1,14 +1,104 @@
 import os
+import random
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
 from pathlib import Path
 from sqlite3 import Error
 
+from config.migrations import migrate
+
 DEFAULT_ADMIN_USERNAME = "admin"
 DEFAULT_ADMIN_PASSWORD = "admin123"
 
+# Số kết nối tối đa trong pool và thời gian chờ (giây) khi pool đã dùng hết
+DEFAULT_POOL_SIZE = 8
+POOL_TIMEOUT = 10
+
+# PRAGMA áp dụng cho mỗi kết nối mới. WAL cho phép nhiều cửa sổ/máy đọc
+# trong khi một cửa sổ đang ghi. Có thể ghi đè từng giá trị bằng biến môi
+# trường COFFEE_SHOP_SQLITE_<TÊN>, ví dụ COFFEE_SHOP_SQLITE_SYNCHRONOUS=FULL
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",  # an toàn với WAL, không fsync mỗi commit
+    "cache_size": -16000,  # số âm tính theo KiB, khoảng 16 MB
+    "mmap_size": 64 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
+
+# Thời gian (giây) SQLite tự chờ khi database đang bị khóa, sau đó
+# run_write()/retry_on_busy() thử lại với thời gian chờ tăng dần
+BUSY_TIMEOUT = 5
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.05
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pragmas():
+    """Lấy cấu hình PRAGMA, ưu tiên giá trị từ biến môi trường"""
+    pragmas = dict(SQLITE_PRAGMAS)
+    for name in pragmas:
+        value = os.environ.get(f"COFFEE_SHOP_SQLITE_{name.upper()}")
+        if value:
+            pragmas[name] = value
+    return pragmas
+
+
+def configure_connection(conn, pragmas=None):
+    """Áp dụng các PRAGMA cho một kết nối vừa mở"""
+    for name, value in (pragmas or get_pragmas()).items():
+        conn.execute(f"PRAGMA {name} = {value}").fetchall()
+
+
+def is_busy_error(error):
+    """Kiểm tra lỗi có phải do database đang bị khóa (SQLITE_BUSY/LOCKED)"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return (code & 0xFF) in (5, 6)  # SQLITE_BUSY, SQLITE_LOCKED
+    message = str(error)
+    return "database is locked" in message or "database is busy" in message
+
+
+def _backoff_delays(retries, backoff):
+    """Thời gian chờ tăng gấp đôi sau mỗi lần thử, có thêm nhiễu ngẫu nhiên"""
+    for attempt in range(retries):
+        yield backoff * (2 ** attempt) * (1 + random.random())
+
+
+def retry_on_busy(func=None, *, retries=None, backoff=None):
+    """Decorator thử lại hàm khi gặp lỗi database bị khóa"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            delays = _backoff_delays(
+                BUSY_RETRIES if retries is None else retries,
+                BUSY_BACKOFF if backoff is None else backoff)
+            while True:
+                try:
+                    return func(*args, **kwargs)
+                except sqlite3.OperationalError as e:
+                    delay = next(delays, None)
+                    if not is_busy_error(e) or delay is None:
+                        raise
+                    time.sleep(delay)
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
 
 def get_db_path():
-    """Lấy đường dẫn tới file database"""
+    """Lấy đường dẫn tới file database (đổi bằng biến môi trường COFFEE_SHOP_DB_PATH)"""
+    if os.environ.get("COFFEE_SHOP_DB_PATH"):
+        return os.environ["COFFEE_SHOP_DB_PATH"]
+
     # Lấy đường dẫn thư mục home của user
     home_dir = str(Path.home())
 
@@ -22,43 +112,283 @@ def get_db_path():
     return db_path
 
 
+class PooledConnection:
+    """Kết nối mượn từ pool, close() trả kết nối về pool thay vì đóng hẳn.
+
+    Khi dùng với with, chỉ lần mượn ngoài cùng của thread mới commit hoặc
+    rollback: lần mượn lồng bên trong dùng chung kết nối nên không được kết
+    thúc transaction của nơi gọi bên ngoài.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+        self._released = False
+        self._outermost = pool.depth() == 1
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._outermost:
+            if exc_type is None:
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+        self.close()
+        return False
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            self._pool.release(self._conn)
+
+
+class ConnectionPool:
+    """Pool kết nối SQLite dùng chung trong process.
+
+    - Mỗi thread ưu tiên lấy lại đúng kết nối nó dùng lần trước.
+    - Mượn lồng nhau trong cùng một thread dùng chung một kết nối.
+    - Số kết nối bị giới hạn bởi max_size, hết thì chờ tối đa timeout giây.
+    - Migration lược đồ chỉ chạy một lần, khi mở kết nối đầu tiên.
+    - Kết nối mới được mở ngoài khóa của pool, nên thread đang mượn/trả
+      kết nối không phải chờ mở kết nối hay migration.
+    """
+
+    def __init__(self, db_path, max_size=DEFAULT_POOL_SIZE, timeout=POOL_TIMEOUT,
+                 pragmas=None, busy_timeout=None):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = pragmas if pragmas is not None else get_pragmas()
+        self.busy_timeout = BUSY_TIMEOUT if busy_timeout is None else busy_timeout
+        self._cond = threading.Condition()
+        self._bootstrap_lock = threading.Lock()
+        self._idle = []  # [(thread_id, conn)] các kết nối đang rảnh
+        self._in_use = {}  # thread_id -> [conn, số lần mượn lồng nhau]
+        self._size = 0
+        self._bootstrapped = False
+        self._closed = False
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout,
+                               check_same_thread=False)
+        try:
+            configure_connection(conn, self.pragmas)
+            # Các thread mở kết nối mới cùng lúc chờ migration đầu tiên xong
+            with self._bootstrap_lock:
+                if not self._bootstrapped:
+                    migrate(conn)
+                    self._bootstrapped = True
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def _take_idle(self, thread_id):
+        """Lấy kết nối rảnh, ưu tiên kết nối của chính thread hiện tại"""
+        for i in range(len(self._idle) - 1, -1, -1):
+            if self._idle[i][0] == thread_id:
+                return self._idle.pop(i)[1]
+        if self._idle:
+            return self._idle.pop()[1]
+        return None
+
+    def acquire(self):
+        thread_id = threading.get_ident()
+        with self._cond:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool đã đóng")
+
+            held = self._in_use.get(thread_id)
+            if held is not None:
+                held[1] += 1
+                return held[0]
+
+            deadline = time.monotonic() + self.timeout
+            while True:
+                conn = self._take_idle(thread_id)
+                if conn is not None:
+                    self._in_use[thread_id] = [conn, 1]
+                    return conn
+                if self._size < self.max_size:
+                    # Giữ chỗ rồi mở kết nối sau khi nhả khóa
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise sqlite3.OperationalError(
+                        "Không còn kết nối rảnh trong pool")
+                self._cond.wait(remaining)
+
+        try:
+            conn = self._open()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            if self._closed:
+                conn.close()
+                self._size -= 1
+                raise sqlite3.ProgrammingError("Connection pool đã đóng")
+            self._in_use[thread_id] = [conn, 1]
+            return conn
+
+    def depth(self):
+        """Số lần thread hiện tại đang mượn lồng nhau (0 nếu không mượn)"""
+        with self._cond:
+            held = self._in_use.get(threading.get_ident())
+            return held[1] if held is not None else 0
+
+    def release(self, conn):
+        with self._cond:
+            owner = next((thread_id for thread_id, held in self._in_use.items()
+                          if held[0] is conn), None)
+            if owner is None:
+                return
+
+            held = self._in_use[owner]
+            held[1] -= 1
+            if held[1] > 0:
+                return
+            del self._in_use[owner]
+
+            # Không để transaction dang dở giữ khóa database
+            if conn.in_transaction:
+                conn.rollback()
+
+            if self._closed:
+                conn.close()
+                self._size -= 1
+            else:
+                self._idle.append((owner, conn))
+            self._cond.notify()
+
+    def close(self):
+        """Đóng các kết nối rảnh, kết nối đang mượn sẽ đóng khi được trả"""
+        with self._cond:
+            self._closed = True
+            for _, conn in self._idle:
+                conn.close()
+                self._size -= 1
+            self._idle.clear()
+            self._cond.notify_all()
+
+
+def get_pool():
+    """Lấy pool kết nối dùng chung của process"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(get_db_path())
+        return _pool
+
+
+def close_pool():
+    """Đóng pool hiện tại, lần mượn kết nối sau sẽ tạo pool mới"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+@contextmanager
+def get_connection():
+    """Mượn kết nối từ pool: commit khi thành công, rollback khi có lỗi"""
+    pool = get_pool()
+    with PooledConnection(pool, pool.acquire()) as conn:
+        yield conn
+
+
+def run_write(work, retries=None, backoff=None):
+    """Chạy work(conn) trong một transaction ghi và trả về kết quả của nó.
+
+    Transaction mở bằng BEGIN IMMEDIATE để giành khóa ghi ngay từ đầu; nếu
+    database đang bị khóa thì cả transaction được thử lại với thời gian chờ
+    tăng dần. Nếu kết nối đang nằm trong transaction của lời gọi bên ngoài
+    thì work chạy luôn trong transaction đó và không được thử lại ở đây:
+    phần đã ghi chưa được rollback nên chạy lại work có thể ghi trùng. Lỗi
+    được ném lên để nơi mở transaction rollback rồi thử lại cả transaction.
+    """
+    pool = get_pool()
+    conn = PooledConnection(pool, pool.acquire())
+    try:
+        if conn.in_transaction:
+            return work(conn)
+
+        @retry_on_busy(retries=retries, backoff=backoff)
+        def attempt():
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                result = work(conn)
+                conn.commit()
+                return result
+            except Exception:
+                conn.rollback()
+                raise
+
+        return attempt()
+    finally:
+        conn.close()
+
+
 def reset_database():
     """Xóa và tạo lại database"""
     db_path = get_db_path()
 
-    # Xóa file database cũ nếu tồn tại
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    # Đóng các kết nối tới file cũ trước khi xóa
+    close_pool()
+
+    # Xóa file database cũ (kèm file WAL) nếu tồn tại
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
 
     # Tạo database mới
     conn = create_connection()
     if conn is not None:
-        create_tables(conn)
         initialize_default_data(conn)
         conn.close()
     else:
         print("Error! Cannot create the database connection.")
 
 
+def seed_default_admin(cursor):
+    """Tạo tài khoản admin mặc định nếu chưa tồn tại"""
+    cursor.execute("SELECT id FROM users WHERE username = ?",
+                   (DEFAULT_ADMIN_USERNAME,))
+    if cursor.fetchone():
+        return
+
+    import hashlib
+    admin_password = hashlib.sha256(
+        DEFAULT_ADMIN_PASSWORD.encode()).hexdigest()
+    cursor.execute("""
+        INSERT INTO users (username, password, role, email)
+        VALUES (?, ?, ?, ?)
+    """, (DEFAULT_ADMIN_USERNAME, admin_password, 'admin', 'admin@coffee.com'))
+
+    # Thêm thông tin employee cho admin
+    cursor.execute("""
+        INSERT INTO employees (user_id, name, position, salary)
+        VALUES (last_insert_rowid(), 'Administrator', 'Admin', 0)
+    """)
+
+
 def initialize_default_data(conn):
     """Khởi tạo dữ liệu mặc định"""
     try:
         cursor = conn.cursor()
 
-        # Tạo tài khoản admin mặc định
-        import hashlib
-        admin_password = hashlib.sha256(
-            DEFAULT_ADMIN_PASSWORD.encode()).hexdigest()
-        cursor.execute("""
-            INSERT INTO users (username, password, role, email)
-            VALUES (?, ?, ?, ?)
-        """, (DEFAULT_ADMIN_USERNAME, admin_password, 'admin', 'admin@coffee.com'))
-
-        # Thêm thông tin employee cho admin
-        cursor.execute("""
-            INSERT INTO employees (user_id, name, position, salary)
-            VALUES (last_insert_rowid(), 'Administrator', 'Admin', 0)
-        """)
+        # Tài khoản admin đã được migration tạo, gọi lại chỉ để chắc chắn
+        seed_default_admin(cursor)
 
         # Tạo một số danh mục mặc định
         categories = [
@@ -86,177 +416,19 @@ def initialize_default_data(conn):
 
 
 def create_connection():
-    """Tạo kết nối tới database"""
-    conn = None
+    """Mượn một kết nối từ pool, gọi close() để trả lại pool"""
     try:
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-
-        # Tạo các bảng nếu chưa tồn tại
-        create_tables(conn)
-        return conn
+        pool = get_pool()
+        return PooledConnection(pool, pool.acquire())
     except sqlite3.Error as e:
         print(e)
-        if conn:
-            conn.close()
         return None
 
 
-def create_tables(conn):
-    try:
-        cursor = conn.cursor()
-
-        # Bảng Users
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                role TEXT CHECK (role IN ('admin', 'staff', 'customer')) NOT NULL,
-                email TEXT UNIQUE,
-                phone TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # Bảng Categories
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                description TEXT
-            )
-        ''')
-
-        # Bảng Tables
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tables (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                number INTEGER UNIQUE NOT NULL,
-                capacity INTEGER NOT NULL,
-                status TEXT CHECK (status IN ('available', 'occupied', 'reserved')) NOT NULL DEFAULT 'available'
-            )
-        ''')
-
-        # Bảng Menu Items
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS menu_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                category_id INTEGER,
-                name TEXT NOT NULL,
-                description TEXT,
-                price REAL NOT NULL,
-                status TEXT CHECK (status IN ('available', 'out_of_stock', 'discontinued')) NOT NULL DEFAULT 'available',
-                FOREIGN KEY (category_id) REFERENCES categories(id)
-            )
-        ''')
-
-        # Bảng Orders
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS orders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                table_id INTEGER,
-                status TEXT CHECK (status IN ('pending', 'preparing', 'served', 'completed', 'cancelled')) NOT NULL,
-                total_amount REAL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id),
-                FOREIGN KEY (table_id) REFERENCES tables(id)
-            )
-        ''')
-
-        # Bảng Order Items
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS order_items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                order_id INTEGER,
-                menu_item_id INTEGER,
-                quantity INTEGER NOT NULL,
-                price REAL NOT NULL,
-                FOREIGN KEY (order_id) REFERENCES orders(id),
-                FOREIGN KEY (menu_item_id) REFERENCES menu_items(id)
-            )
-        ''')
-
-        # Bảng Employees
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS employees (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER UNIQUE,
-                name TEXT NOT NULL,
-                position TEXT NOT NULL,
-                salary REAL,
-                shift_start TIME,
-                shift_end TIME,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        ''')
-
-        # Bảng Customers
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS customers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER UNIQUE,
-                name TEXT NOT NULL,
-                loyalty_points INTEGER DEFAULT 0,
-                member_since DATE DEFAULT CURRENT_DATE,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        ''')
-
-        # Bảng Inventory
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS inventory (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                quantity INTEGER DEFAULT 0,
-                unit TEXT NOT NULL,
-                threshold INTEGER DEFAULT 0
-            )
-        ''')
-
-        # Bảng Inventory History
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS inventory_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                inventory_id INTEGER NOT NULL,
-                type TEXT NOT NULL,  -- 'import' hoặc 'export'
-                quantity INTEGER NOT NULL,
-                price REAL,
-                supplier TEXT,
-                note TEXT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (inventory_id) REFERENCES inventory (id)
-            )
-        ''')
-
-        # Tạo tài khoản admin mặc định nếu chưa tồn tại
-        cursor.execute("SELECT id FROM users WHERE username = ?",
-                       (DEFAULT_ADMIN_USERNAME,))
-        if not cursor.fetchone():
-            import hashlib
-            admin_password = hashlib.sha256(
-                DEFAULT_ADMIN_PASSWORD.encode()).hexdigest()
-            cursor.execute("""
-                INSERT INTO users (username, password, role, email)
-                VALUES (?, ?, ?, ?)
-            """, (DEFAULT_ADMIN_USERNAME, admin_password, 'admin', 'admin@coffee.com'))
-
-            # Thêm thông tin employee cho admin
-            cursor.execute("""
-                INSERT INTO employees (user_id, name, position, salary)
-                VALUES (last_insert_rowid(), 'Administrator', 'Admin', 0)
-            """)
-
-        conn.commit()
-    except Error as e:
-        print(e)
-
-
 def init_db():
+    # Mở kết nối đầu tiên để pool chạy migration một lần cho cả process
     conn = create_connection()
     if conn is not None:
-        create_tables(conn)
         conn.close()
     else:
         print("Error! Cannot create the database connection.")
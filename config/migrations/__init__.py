@@ -0,0 +1,74 @@
+"""Quản lý phiên bản lược đồ database bằng PRAGMA user_version.
+
+Mỗi migration là một module có VERSION, DESCRIPTION và upgrade(cursor).
+Các migration được liệt kê tường minh trong MIGRATIONS (không dò thư mục)
+để PyInstaller đóng gói đầy đủ.
+"""
+
+from config.migrations import (m0001_initial_schema, m0002_hot_path_indexes,
+                               m0003_daily_sales_rollup, m0004_order_revision,
+                               m0005_inventory_history_item_index,
+                               m0006_recipes, m0007_low_stock_index,
+                               m0008_order_id_tiebreak)
+
+MIGRATIONS = [
+    m0001_initial_schema,
+    m0002_hot_path_indexes,
+    m0003_daily_sales_rollup,
+    m0004_order_revision,
+    m0005_inventory_history_item_index,
+    m0006_recipes,
+    m0007_low_stock_index,
+    m0008_order_id_tiebreak,
+]
+
+_versions = [migration.VERSION for migration in MIGRATIONS]
+if _versions != sorted(set(_versions)):
+    raise RuntimeError("Các migration phải có VERSION tăng dần và không trùng")
+
+LATEST_VERSION = _versions[-1] if _versions else 0
+
+
+def get_version(conn):
+    """Lấy phiên bản lược đồ hiện tại của database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending_migrations(conn):
+    """Danh sách các migration chưa được áp dụng"""
+    current = get_version(conn)
+    return [m for m in MIGRATIONS if m.VERSION > current]
+
+
+def migrate(conn, target=None):
+    """Áp dụng các migration còn thiếu, trả về danh sách version đã chạy.
+
+    Mỗi migration chạy trong một transaction riêng (BEGIN IMMEDIATE) và
+    version được kiểm tra lại bên trong transaction, nên nhiều process
+    khởi động cùng lúc không áp dụng trùng một migration.
+    """
+    applied = []
+    if get_version(conn) >= LATEST_VERSION:
+        return applied
+
+    for migration in MIGRATIONS:
+        if target is not None and migration.VERSION > target:
+            break
+        if migration.VERSION <= get_version(conn):
+            continue
+
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if migration.VERSION <= get_version(conn):
+                conn.rollback()
+                continue
+            migration.upgrade(conn.cursor())
+            conn.execute(f"PRAGMA user_version = {int(migration.VERSION)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(migration.VERSION)
+    return applied
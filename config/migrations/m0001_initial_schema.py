@@ -0,0 +1,138 @@
+"""Migration 1: lược đồ ban đầu của ứng dụng
+
+Dùng CREATE TABLE IF NOT EXISTS nên áp dụng được cả cho database cũ
+đã có sẵn bảng nhưng chưa có user_version.
+"""
+
+VERSION = 1
+DESCRIPTION = "Tạo các bảng ban đầu và tài khoản admin mặc định"
+
+
+def upgrade(cursor):
+    # Bảng Users
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT CHECK (role IN ('admin', 'staff', 'customer')) NOT NULL,
+            email TEXT UNIQUE,
+            phone TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Bảng Categories
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT
+        )
+    ''')
+
+    # Bảng Tables
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tables (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            number INTEGER UNIQUE NOT NULL,
+            capacity INTEGER NOT NULL,
+            status TEXT CHECK (status IN ('available', 'occupied', 'reserved')) NOT NULL DEFAULT 'available'
+        )
+    ''')
+
+    # Bảng Menu Items
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS menu_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            category_id INTEGER,
+            name TEXT NOT NULL,
+            description TEXT,
+            price REAL NOT NULL,
+            status TEXT CHECK (status IN ('available', 'out_of_stock', 'discontinued')) NOT NULL DEFAULT 'available',
+            FOREIGN KEY (category_id) REFERENCES categories(id)
+        )
+    ''')
+
+    # Bảng Orders
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            table_id INTEGER,
+            status TEXT CHECK (status IN ('pending', 'preparing', 'served', 'completed', 'cancelled')) NOT NULL,
+            total_amount REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (table_id) REFERENCES tables(id)
+        )
+    ''')
+
+    # Bảng Order Items
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS order_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER,
+            menu_item_id INTEGER,
+            quantity INTEGER NOT NULL,
+            price REAL NOT NULL,
+            FOREIGN KEY (order_id) REFERENCES orders(id),
+            FOREIGN KEY (menu_item_id) REFERENCES menu_items(id)
+        )
+    ''')
+
+    # Bảng Employees
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS employees (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER UNIQUE,
+            name TEXT NOT NULL,
+            position TEXT NOT NULL,
+            salary REAL,
+            shift_start TIME,
+            shift_end TIME,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    ''')
+
+    # Bảng Customers
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS customers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER UNIQUE,
+            name TEXT NOT NULL,
+            loyalty_points INTEGER DEFAULT 0,
+            member_since DATE DEFAULT CURRENT_DATE,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    ''')
+
+    # Bảng Inventory
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS inventory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            quantity INTEGER DEFAULT 0,
+            unit TEXT NOT NULL,
+            threshold INTEGER DEFAULT 0
+        )
+    ''')
+
+    # Bảng Inventory History
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS inventory_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            inventory_id INTEGER NOT NULL,
+            type TEXT NOT NULL,  -- 'import' hoặc 'export'
+            quantity INTEGER NOT NULL,
+            price REAL,
+            supplier TEXT,
+            note TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (inventory_id) REFERENCES inventory (id)
+        )
+    ''')
+
+    # Tạo tài khoản admin mặc định nếu chưa tồn tại
+    from config.database import seed_default_admin
+    seed_default_admin(cursor)
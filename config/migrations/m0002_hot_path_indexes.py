@@ -0,0 +1,57 @@
+"""Migration 2: index cho các truy vấn đơn hàng, báo cáo và lịch sử kho
+
+Các truy vấn tương ứng nằm trong models/queries.py và được kiểm tra bằng
+EXPLAIN QUERY PLAN trong test_query_plans.py.
+"""
+
+VERSION = 2
+DESCRIPTION = "Thêm index cho orders, order_items và inventory_history"
+
+
+def upgrade(cursor):
+    # Danh sách đơn của nhân viên: sắp theo thứ tự trạng thái rồi thời gian.
+    # Biểu thức CASE phải giống hệt ORDER BY trong truy vấn để được dùng.
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_orders_status_rank_created
+        ON orders ((
+            CASE status
+                WHEN 'pending' THEN 1
+                WHEN 'preparing' THEN 2
+                WHEN 'served' THEN 3
+                WHEN 'completed' THEN 4
+                WHEN 'cancelled' THEN 5
+            END
+        ), created_at DESC)
+    ''')
+
+    # Đơn hàng của một khách hàng
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_orders_user_created
+        ON orders (user_id, created_at)
+    ''')
+
+    # Báo cáo: lọc đơn hoàn thành theo khoảng thời gian (covering cho tổng tiền)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_orders_status_created
+        ON orders (status, created_at, total_amount)
+    ''')
+
+    # Join chi tiết đơn hàng
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_order_items_order
+        ON order_items (order_id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_order_items_menu_item
+        ON order_items (menu_item_id)
+    ''')
+
+    # Lịch sử nhập/xuất kho sắp theo thời gian
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_inventory_history_timestamp
+        ON inventory_history (timestamp)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_inventory_history_inventory
+        ON inventory_history (inventory_id)
+    ''')
@@ -0,0 +1,79 @@
+"""Migration 3: bảng tổng hợp doanh số theo ngày cho báo cáo
+
+Các bảng được cập nhật dần mỗi khi đơn hàng chuyển sang/ra khỏi trạng
+thái 'completed' (xem models/daily_sales.py). Migration tính sẵn dữ liệu
+từ các đơn đã hoàn thành trong database hiện có.
+"""
+
+VERSION = 3
+DESCRIPTION = "Thêm bảng tổng hợp doanh số theo ngày"
+
+
+def upgrade(cursor):
+    # Tổng số đơn và doanh thu mỗi ngày
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_order_totals (
+            day TEXT PRIMARY KEY,
+            order_count INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+
+    # Doanh số mỗi ngày theo món (category_id = 0 nếu món không có danh mục)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_sales (
+            day TEXT NOT NULL,
+            menu_item_id INTEGER NOT NULL,
+            category_id INTEGER NOT NULL DEFAULT 0,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            order_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, menu_item_id)
+        ) WITHOUT ROWID
+    ''')
+
+    # Doanh số mỗi ngày theo danh mục, order_count đếm số đơn khác nhau
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_category_sales (
+            day TEXT NOT NULL,
+            category_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            order_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, category_id)
+        ) WITHOUT ROWID
+    ''')
+
+    # Tính sẵn từ các đơn đã hoàn thành
+    cursor.execute('''
+        INSERT OR REPLACE INTO daily_order_totals (day, order_count, revenue)
+        SELECT DATE(created_at), COUNT(*), COALESCE(SUM(total_amount), 0)
+        FROM orders
+        WHERE status = 'completed'
+        GROUP BY DATE(created_at)
+    ''')
+    cursor.execute('''
+        INSERT OR REPLACE INTO daily_sales
+            (day, menu_item_id, category_id, quantity, revenue, order_count)
+        SELECT DATE(o.created_at), oi.menu_item_id,
+               COALESCE(MAX(m.category_id), 0),
+               SUM(oi.quantity), SUM(oi.quantity * oi.price),
+               COUNT(DISTINCT o.id)
+        FROM order_items oi
+        JOIN orders o ON o.id = oi.order_id
+        LEFT JOIN menu_items m ON m.id = oi.menu_item_id
+        WHERE o.status = 'completed'
+        GROUP BY DATE(o.created_at), oi.menu_item_id
+    ''')
+    cursor.execute('''
+        INSERT OR REPLACE INTO daily_category_sales
+            (day, category_id, quantity, revenue, order_count)
+        SELECT DATE(o.created_at), COALESCE(m.category_id, 0),
+               SUM(oi.quantity), SUM(oi.quantity * oi.price),
+               COUNT(DISTINCT o.id)
+        FROM order_items oi
+        JOIN orders o ON o.id = oi.order_id
+        LEFT JOIN menu_items m ON m.id = oi.menu_item_id
+        WHERE o.status = 'completed'
+        GROUP BY DATE(o.created_at), COALESCE(m.category_id, 0)
+    ''')
@@ -0,0 +1,40 @@
+"""Migration 4: số phiên bản thay đổi (revision) cho từng đơn hàng
+
+Mỗi lần đơn hàng được tạo hoặc sửa, trigger gán revision = revision lớn
+nhất hiện có + 1. Giao diện lưu revision lớn nhất đã thấy làm mốc và chỉ
+tải lại các đơn có revision lớn hơn mốc đó.
+"""
+
+VERSION = 4
+DESCRIPTION = "Thêm cột revision và trigger cho bảng orders"
+
+
+def upgrade(cursor):
+    cursor.execute('''
+        ALTER TABLE orders ADD COLUMN revision INTEGER NOT NULL DEFAULT 0
+    ''')
+    cursor.execute('UPDATE orders SET revision = id')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_orders_revision
+        ON orders (revision)
+    ''')
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_orders_revision_insert
+        AFTER INSERT ON orders
+        BEGIN
+            UPDATE orders
+            SET revision = (SELECT MAX(revision) FROM orders) + 1
+            WHERE id = NEW.id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_orders_revision_update
+        AFTER UPDATE OF user_id, table_id, status, total_amount, created_at
+        ON orders
+        BEGIN
+            UPDATE orders
+            SET revision = (SELECT MAX(revision) FROM orders) + 1
+            WHERE id = NEW.id;
+        END
+    ''')
@@ -0,0 +1,17 @@
+"""Migration 5: index cho lịch sử kho lọc theo nguyên liệu
+
+Lịch sử kho được phân trang theo (timestamp, id) giảm dần. Khi lọc theo một
+nguyên liệu, index (inventory_id, timestamp) vừa lọc vừa cho sẵn thứ tự nên
+không phải sắp xếp lại; index cũ chỉ có inventory_id được thay thế.
+"""
+
+VERSION = 5
+DESCRIPTION = "Thay index lịch sử kho theo nguyên liệu bằng (inventory_id, timestamp)"
+
+
+def upgrade(cursor):
+    cursor.execute('DROP INDEX IF EXISTS idx_inventory_history_inventory')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_inventory_history_inventory_timestamp
+        ON inventory_history (inventory_id, timestamp)
+    ''')
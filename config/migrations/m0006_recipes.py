@@ -0,0 +1,27 @@
+"""Migration 6: công thức món (định mức nguyên liệu)
+
+Mỗi dòng là lượng một nguyên liệu trong kho dùng cho một phần món. Khi ghi
+đơn, kho được trừ theo công thức trong cùng transaction (xem
+models/inventory.py). Index theo inventory_id cho các truy vấn ngược từ
+nguyên liệu ra món.
+"""
+
+VERSION = 6
+DESCRIPTION = "Thêm bảng công thức món"
+
+
+def upgrade(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS recipes (
+            menu_item_id INTEGER NOT NULL,
+            inventory_id INTEGER NOT NULL,
+            quantity REAL NOT NULL CHECK (quantity > 0),
+            PRIMARY KEY (menu_item_id, inventory_id),
+            FOREIGN KEY (menu_item_id) REFERENCES menu_items (id),
+            FOREIGN KEY (inventory_id) REFERENCES inventory (id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_recipes_inventory
+        ON recipes (inventory_id)
+    ''')
@@ -0,0 +1,17 @@
+"""Migration 7: index một phần cho nguyên liệu sắp hết
+
+Index chỉ chứa các nguyên liệu có quantity <= threshold và được SQLite tự
+cập nhật mỗi khi tồn kho thay đổi, nên danh sách cảnh báo đọc thẳng từ
+index thay vì quét cả bảng kho.
+"""
+
+VERSION = 7
+DESCRIPTION = "Thêm index một phần cho nguyên liệu sắp hết"
+
+
+def upgrade(cursor):
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_inventory_low_stock
+        ON inventory (name)
+        WHERE quantity <= threshold
+    ''')
@@ -0,0 +1,32 @@
+"""Migration 8: thêm id vào index danh sách đơn hàng
+
+created_at chỉ chính xác tới giây nên nhiều đơn có thể trùng thời gian.
+Danh sách đơn sắp thêm theo id giảm dần để thứ tự là duy nhất và khớp với
+khóa sắp xếp của OrderManager; index được tạo lại với cột id để vẫn không
+phải sắp xếp lại.
+"""
+
+VERSION = 8
+DESCRIPTION = "Thêm id vào index danh sách đơn hàng làm khóa phụ khi trùng thời gian"
+
+
+def upgrade(cursor):
+    cursor.execute('DROP INDEX IF EXISTS idx_orders_status_rank_created')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_orders_status_rank_created
+        ON orders ((
+            CASE status
+                WHEN 'pending' THEN 1
+                WHEN 'preparing' THEN 2
+                WHEN 'served' THEN 3
+                WHEN 'completed' THEN 4
+                WHEN 'cancelled' THEN 5
+            END
+        ), created_at DESC, id DESC)
+    ''')
+
+    cursor.execute('DROP INDEX IF EXISTS idx_orders_user_created')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_orders_user_created
+        ON orders (user_id, created_at DESC, id DESC)
+    ''')
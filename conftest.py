@@ -0,0 +1,46 @@
+"""Fixture dùng chung cho các test.
+
+Test cần dữ liệu mẫu riêng thì ghi đè conn trong module và nhận lại conn
+gốc, ví dụ:
+
+    @pytest.fixture
+    def conn(conn):
+        conn.executescript("INSERT INTO ...")
+        return conn
+"""
+
+import sqlite3
+
+import pytest
+
+from config import database
+from config.migrations import migrate
+
+
+@pytest.fixture
+def conn():
+    """Database trong bộ nhớ đã chạy đủ migration"""
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """File database tạm làm database của ứng dụng (pool, run_write)"""
+    path = str(tmp_path / "coffee_shop.db")
+    monkeypatch.setattr(database, "get_db_path", lambda: path)
+    database.close_pool()
+    yield path
+    database.close_pool()
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    """Hàm write_csv(name, text) ghi file CSV tạm, trả về đường dẫn"""
+    def write(name, text):
+        path = tmp_path / name
+        path.write_text(text, encoding="utf-8")
+        return str(path)
+    return write
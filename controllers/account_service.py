@@ -0,0 +1,57 @@
+"""Nghiệp vụ tài khoản: đăng ký và thêm nhân viên.
+
+Các hàm nhận kết nối đang mở transaction ghi (thường qua run_write) và báo
+dữ liệu không hợp lệ bằng ValueError kèm thông báo cho người dùng.
+"""
+
+import hashlib
+
+from models import users
+from utils.validators import validate_email, validate_phone
+
+REGISTER_ROLES = ("customer", "staff")
+NEW_EMPLOYEE_POSITION = "Nhân viên mới"
+
+
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def check_account(username, password, email, phone, *required):
+    """Kiểm tra thông tin tài khoản; required là các trường bắt buộc khác"""
+    if not all([username, password, email, *required]):
+        raise ValueError("Vui lòng nhập đầy đủ thông tin bắt buộc!")
+    if not validate_email(email):
+        raise ValueError("Email không đúng định dạng!\nVí dụ: example@gmail.com")
+    if phone and not validate_phone(phone):
+        raise ValueError("Số điện thoại phải có 10 chữ số và bắt đầu bằng số 0!")
+
+
+def create_user(conn, username, password, role, email, phone):
+    if users.exists(conn, username, email):
+        raise ValueError("Tên đăng nhập hoặc email đã tồn tại!")
+    return users.insert_user(conn, username, hash_password(password), role, email, phone)
+
+
+def register(conn, username, password, email, phone="", role="customer"):
+    """Đăng ký tài khoản khách hàng hoặc nhân viên, trả về id người dùng"""
+    check_account(username, password, email, phone)
+    if role not in REGISTER_ROLES:
+        raise ValueError(f"Vai trò không hợp lệ: {role}")
+
+    user_id = create_user(conn, username, password, role, email, phone)
+    # Thêm thông tin bổ sung tùy theo role
+    if role == "staff":
+        users.insert_employee(conn, user_id, username, NEW_EMPLOYEE_POSITION)
+    else:
+        users.insert_customer(conn, user_id, username)
+    return user_id
+
+
+def add_employee(conn, username, password, name, email, phone="",
+                 position=NEW_EMPLOYEE_POSITION, salary=None):
+    """Admin thêm nhân viên kèm hồ sơ, trả về id người dùng"""
+    check_account(username, password, email, phone, name)
+    user_id = create_user(conn, username, password, "staff", email, phone)
+    users.insert_employee(conn, user_id, name, position, salary)
+    return user_id
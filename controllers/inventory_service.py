@@ -0,0 +1,55 @@
+"""Nghiệp vụ kho: thêm/xóa nguyên liệu, nhập thêm nguyên liệu kèm lịch sử nhập."""
+
+from collections import namedtuple
+
+from models import inventory, menu_availability
+
+# Kết quả nhập kho: id dòng lịch sử, StockChange của nguyên liệu vừa nhập,
+# MenuChange của các món vừa bán lại được
+StockImport = namedtuple("StockImport", ["history_id", "stock_changes", "menu_changes"])
+
+
+def add_item(conn, name, quantity, unit, threshold):
+    """Thêm nguyên liệu, trả về StockChange của nguyên liệu đó.
+
+    Nguyên liệu mới chưa có mức tồn kho trước (previous_level là None) nên
+    luôn được coi là vừa đổi mức. Báo dữ liệu không hợp lệ bằng ValueError;
+    nơi gọi tự quản lý transaction.
+    """
+    if not name:
+        raise ValueError("Vui lòng nhập tên nguyên liệu!")
+    item_id = inventory.create_item(conn, name, quantity, unit, threshold)
+    return inventory.StockChange(item_id, name, quantity, threshold,
+                                 inventory.stock_level(quantity, threshold), None)
+
+
+def delete_item(conn, item_id):
+    """Xóa nguyên liệu item_id cùng lịch sử kho và công thức dùng nó.
+
+    Các món từng dùng nguyên liệu được tính lại trạng thái (món hết hàng chỉ
+    vì thiếu nguyên liệu này được bán lại); trả về MenuChange của các món
+    vừa đổi trạng thái. Báo nguyên liệu không tồn tại bằng ValueError; nơi
+    gọi tự quản lý transaction.
+    """
+    menu_item_ids = [row[0] for row in conn.execute(
+        "SELECT DISTINCT menu_item_id FROM recipes WHERE inventory_id = ?", (item_id,))]
+    if inventory.delete_item(conn, item_id) is None:
+        raise ValueError("Không tìm thấy nguyên liệu!")
+    return menu_availability.refresh_items(conn, menu_item_ids)
+
+
+def import_stock(conn, item_id, quantity, price, supplier=None, note=None):
+    """Nhập kho cho nguyên liệu item_id, trả về StockImport.
+
+    Báo dữ liệu không hợp lệ bằng ValueError; nơi gọi tự quản lý transaction.
+    """
+    if quantity <= 0:
+        raise ValueError("Số lượng nhập phải lớn hơn 0!")
+    if price < 0:
+        raise ValueError("Đơn giá không được âm!")
+    history_id = inventory.add_stock(conn, item_id, quantity, price, supplier, note)
+    if history_id is None:
+        raise ValueError("Không tìm thấy nguyên liệu!")
+    return StockImport(history_id,
+                       inventory.stock_changes(conn, {item_id: quantity}),
+                       menu_availability.refresh_for_ingredients(conn, [item_id]))
@@ -0,0 +1,77 @@
+"""Nghiệp vụ đơn hàng: kiểm tra dữ liệu rồi ghi qua models.orders.
+
+Các hàm nhận kết nối đang mở transaction ghi (thường qua run_write) và báo
+dữ liệu không hợp lệ bằng ValueError kèm thông báo cho người dùng.
+commit_order tự mở transaction ghi cho cả đơn và đo thời gian.
+"""
+
+import time
+
+from config.database import run_write
+from models import inventory, menu_availability, orders
+
+
+class OrderCommit:
+    """Kết quả ghi một đơn: id, tổng tiền, thời gian ghi (tính cả chờ khóa),
+    các nguyên liệu vừa trừ kho (StockChange) và các món vừa đổi
+    trạng thái còn bán (MenuChange)"""
+
+    def __init__(self, order_id, total_amount, seconds=0.0, stock_changes=(),
+                 menu_changes=()):
+        self.order_id = order_id
+        self.total_amount = total_amount
+        self.seconds = seconds
+        self.stock_changes = list(stock_changes)
+        self.menu_changes = list(menu_changes)
+
+    def __str__(self):
+        return (f"Đơn #{self.order_id} ({self.total_amount:,} VNĐ) "
+                f"ghi trong {self.seconds * 1000:.1f} ms")
+
+
+def place_order(conn, user_id, table_id, items, created_at=None):
+    """Tạo đơn cho bàn từ danh sách dict product_id, quantity, price.
+
+    Trả về OrderCommit (chưa có thời gian ghi).
+    """
+    if not items:
+        raise ValueError("Vui lòng thêm sản phẩm vào đơn hàng!")
+    if table_id is None:
+        raise ValueError("Vui lòng chọn bàn!")
+    if any(item["quantity"] <= 0 for item in items):
+        raise ValueError("Số lượng món phải lớn hơn 0!")
+    order_id = orders.create_order(conn, user_id, table_id, items, created_at)
+    if order_id is None:
+        raise ValueError("Bàn đã có khách, vui lòng chọn bàn khác!")
+    # Trừ nguyên liệu theo công thức và cập nhật món còn bán trong cùng
+    # transaction với đơn
+    stock_changes = inventory.deduct_for_order(conn, order_id)
+    menu_changes = menu_availability.refresh_for_order(conn, order_id)
+    total_amount = sum(item["quantity"] * item["price"] for item in items)
+    return OrderCommit(order_id, total_amount, stock_changes=stock_changes,
+                       menu_changes=menu_changes)
+
+
+def commit_order(user_id, table_id, items, created_at=None, conn=None):
+    """Ghi đơn (giành bàn, đơn, chi tiết và trừ kho) trong một transaction ghi.
+
+    Nếu có conn thì chạy luôn trên kết nối đó (nơi gọi tự commit), nếu không
+    thì mở transaction BEGIN IMMEDIATE riêng qua run_write. Trả về OrderCommit.
+    """
+    def work(conn):
+        return place_order(conn, user_id, table_id, items, created_at)
+
+    start = time.perf_counter()
+    commit = work(conn) if conn is not None else run_write(work)
+    commit.seconds = time.perf_counter() - start
+    return commit
+
+
+def change_order_status(conn, order_id, new_status):
+    """Đổi trạng thái đơn, trả về trạng thái cũ"""
+    if new_status not in orders.ORDER_STATUSES:
+        raise ValueError(f"Trạng thái đơn hàng không hợp lệ: {new_status}")
+    old_status = orders.update_order_status(conn, order_id, new_status)
+    if old_status is None:
+        raise ValueError("Không tìm thấy đơn hàng!")
+    return old_status
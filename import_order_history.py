@@ -0,0 +1,29 @@
+import argparse
+
+from utils.csv_importer import BATCH_SIZE
+from utils.order_importer import import_order_history
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Import lịch sử đơn hàng từ hệ thống cũ (CSV hoặc Parquet)")
+    parser.add_argument("orders", help="File đơn hàng (order_ref, table_number, "
+                        "username, status, total_amount, created_at)")
+    parser.add_argument("items", help="File chi tiết đơn (order_ref, menu_item, "
+                        "quantity, price)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"Số dòng mỗi lần ghi, mặc định: {BATCH_SIZE}")
+    args = parser.parse_args()
+
+    print("Đang import lịch sử đơn hàng...")
+    result, days = import_order_history(args.orders, args.items,
+                                        batch_size=args.batch_size)
+    print(f"Đã import {result}")
+    print(f"Đã tính lại bảng tổng hợp doanh số cho {days} ngày.")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"Lỗi: {e}")
@@ -1,36 +1,62 @@
-from utils.csv_importer import CSVImporter
-
+import argparse
 
-def import_all_data():
+from utils.csv_importer import CSVImporter
+from utils.csv_validation import (CSVValidationError, validate_file,
+                                  write_error_report)
+
+# (bước, tên hiển thị, loại dữ liệu); thứ tự quan trọng vì menu cần danh mục,
+# công thức cần món và nguyên liệu
+SAMPLE_FILES = [
+    (1, "danh mục", "categories"),
+    (2, "menu", "menu_items"),
+    (3, "users", "users"),
+    (4, "tables", "tables"),
+    (5, "inventory", "inventory"),
+    (6, "công thức món", "recipes"),
+]
+
+
+def import_all_data(dry_run=False, workers=None, report_path=None):
     try:
-        print("Bắt đầu import dữ liệu mẫu...")
-
-        print("1. Import danh mục...")
-        CSVImporter.import_categories('sample_data/categories.csv')
-        print("✓ Import danh mục thành công!")
-
-        print("2. Import menu...")
-        CSVImporter.import_menu_items('sample_data/menu_items.csv')
-        print("✓ Import menu thành công!")
-
-        print("3. Import users...")
-        CSVImporter.import_users('sample_data/users.csv')
-        print("✓ Import users thành công!")
-
-        print("4. Import tables...")
-        CSVImporter.import_tables('sample_data/tables.csv')
-        print("✓ Import tables thành công!")
-
-        print("5. Import inventory...")
-        CSVImporter.import_inventory('sample_data/inventory.csv')
-        print("✓ Import inventory thành công!")
+        if dry_run:
+            print("Kiểm tra dữ liệu mẫu (không ghi vào database)...")
+        else:
+            print("Bắt đầu import dữ liệu mẫu...")
+
+        # Kiểm tra mọi file trước để không import dở dang một phần dữ liệu mẫu
+        for step, label, kind in SAMPLE_FILES:
+            errors = validate_file(kind, f'sample_data/{kind}.csv', workers)
+            if errors:
+                raise CSVValidationError(errors)
+        print("✓ Các file CSV hợp lệ!")
+        if dry_run:
+            return
+
+        for step, label, kind in SAMPLE_FILES:
+            print(f"{step}. Import {label}...")
+            result = getattr(CSVImporter, f"import_{kind}")(f'sample_data/{kind}.csv')
+            print(f"✓ Import {label} thành công! ({result})")
 
         print("\nImport dữ liệu mẫu hoàn tất!")
 
+    except CSVValidationError as e:
+        print(f"\nsample_data/{kind}.csv - {e}")
+        if report_path:
+            write_error_report(e.errors, report_path)
+            print(f"Danh sách lỗi đã được ghi vào {report_path}")
+        print("Vui lòng sửa các dòng lỗi và thử lại.")
+
     except Exception as e:
         print(f"\nLỗi khi import dữ liệu: {str(e)}")
         print("Vui lòng kiểm tra lại các file CSV và thử lại.")
 
 
 if __name__ == "__main__":
-    import_all_data()
+    parser = argparse.ArgumentParser(description="Import dữ liệu mẫu từ sample_data/")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Chỉ kiểm tra các file CSV, không ghi vào database")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Số process kiểm tra song song, mặc định: số CPU")
+    parser.add_argument("--report", help="Ghi danh sách lỗi ra file CSV")
+    args = parser.parse_args()
+    import_all_data(args.dry_run, args.workers, args.report)
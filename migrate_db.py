@@ -0,0 +1,42 @@
+import argparse
+import sqlite3
+
+from config.database import get_db_path
+from config.migrations import (LATEST_VERSION, get_version, migrate,
+                               pending_migrations)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Nâng cấp lược đồ database lên phiên bản mới nhất")
+    parser.add_argument("--status", action="store_true",
+                        help="Chỉ hiển thị trạng thái, không áp dụng migration")
+    args = parser.parse_args()
+
+    # Dùng kết nối trực tiếp vì mượn từ pool sẽ tự chạy migration
+    conn = sqlite3.connect(get_db_path())
+    try:
+        print(f"Database: {get_db_path()}")
+        print(f"Phiên bản hiện tại: {get_version(conn)}/{LATEST_VERSION}")
+
+        pending = pending_migrations(conn)
+        if not pending:
+            print("Database đã ở phiên bản mới nhất.")
+            return
+
+        for migration in pending:
+            print(f"- Chưa chạy: {migration.VERSION} - {migration.DESCRIPTION}")
+
+        if not args.status:
+            applied = migrate(conn)
+            print(f"Đã áp dụng {len(applied)} migration, "
+                  f"phiên bản mới: {get_version(conn)}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"Lỗi: {e}")
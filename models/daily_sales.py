@@ -0,0 +1,222 @@
+"""Bảng tổng hợp doanh số theo ngày (daily_order_totals, daily_sales,
+daily_category_sales) và cách đọc báo cáo từ đó.
+
+Bảng tổng hợp được cập nhật trong cùng transaction với việc đổi trạng
+thái đơn hàng: +1 khi đơn chuyển sang 'completed', -1 khi đơn rời khỏi
+'completed'. Báo cáo đọc các ngày trọn vẹn từ bảng tổng hợp, chỉ phần
+ngày lẻ ở đầu/cuối khoảng thời gian mới truy vấn trực tiếp bảng orders.
+"""
+
+from datetime import datetime, time, timedelta
+
+from models import queries
+
+DATE_FORMAT = "%Y-%m-%d"
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def apply_order(cursor, order_id, sign=1):
+    """Cộng (sign=1) hoặc trừ (sign=-1) một đơn vào bảng tổng hợp"""
+    cursor.execute("""
+        INSERT INTO daily_order_totals (day, order_count, revenue)
+        SELECT DATE(created_at), ?, ? * COALESCE(total_amount, 0)
+        FROM orders
+        WHERE id = ?
+        ON CONFLICT (day) DO UPDATE SET
+            order_count = order_count + excluded.order_count,
+            revenue = revenue + excluded.revenue
+    """, (sign, sign, order_id))
+
+    cursor.execute("""
+        INSERT INTO daily_sales
+            (day, menu_item_id, category_id, quantity, revenue, order_count)
+        SELECT DATE(o.created_at), oi.menu_item_id,
+               COALESCE(MAX(m.category_id), 0),
+               ? * SUM(oi.quantity), ? * SUM(oi.quantity * oi.price), ?
+        FROM order_items oi
+        JOIN orders o ON o.id = oi.order_id
+        LEFT JOIN menu_items m ON m.id = oi.menu_item_id
+        WHERE oi.order_id = ?
+        GROUP BY oi.menu_item_id
+        ON CONFLICT (day, menu_item_id) DO UPDATE SET
+            quantity = quantity + excluded.quantity,
+            revenue = revenue + excluded.revenue,
+            order_count = order_count + excluded.order_count
+    """, (sign, sign, sign, order_id))
+
+    cursor.execute("""
+        INSERT INTO daily_category_sales
+            (day, category_id, quantity, revenue, order_count)
+        SELECT DATE(o.created_at), COALESCE(m.category_id, 0),
+               ? * SUM(oi.quantity), ? * SUM(oi.quantity * oi.price), ?
+        FROM order_items oi
+        JOIN orders o ON o.id = oi.order_id
+        LEFT JOIN menu_items m ON m.id = oi.menu_item_id
+        WHERE oi.order_id = ?
+        GROUP BY COALESCE(m.category_id, 0)
+        ON CONFLICT (day, category_id) DO UPDATE SET
+            quantity = quantity + excluded.quantity,
+            revenue = revenue + excluded.revenue,
+            order_count = order_count + excluded.order_count
+    """, (sign, sign, sign, order_id))
+
+    if sign < 0:
+        # Bỏ các dòng đã về 0 để báo cáo không hiện món không bán được
+        cursor.execute("""
+            SELECT DATE(created_at) FROM orders WHERE id = ?
+        """, (order_id,))
+        row = cursor.fetchone()
+        if row:
+            for table in ("daily_order_totals", "daily_sales",
+                          "daily_category_sales"):
+                cursor.execute(f"""
+                    DELETE FROM {table}
+                    WHERE day = ? AND order_count <= 0
+                """, (row[0],))
+
+
+def apply_status_change(cursor, order_id, old_status, new_status):
+    """Cập nhật bảng tổng hợp khi đơn đổi trạng thái"""
+    if old_status != 'completed' and new_status == 'completed':
+        apply_order(cursor, order_id, 1)
+    elif old_status == 'completed' and new_status != 'completed':
+        apply_order(cursor, order_id, -1)
+
+
+def rebuild(conn, start_day=None, end_day=None):
+    """Tính lại bảng tổng hợp từ dữ liệu gốc cho khoảng ngày (mặc định: tất cả).
+
+    start_day, end_day là chuỗi 'YYYY-MM-DD'. Trả về số ngày đã tính lại.
+    """
+    start_day = start_day or "0000-01-01"
+    end_day = end_day or "9999-12-31"
+    # Lọc theo created_at để dùng được index, cận trên là hết ngày end_day
+    start_at = f"{start_day} 00:00:00"
+    end_at = f"{end_day} 23:59:59"
+    cursor = conn.cursor()
+
+    for table in ("daily_order_totals", "daily_sales", "daily_category_sales"):
+        cursor.execute(f"DELETE FROM {table} WHERE day BETWEEN ? AND ?",
+                       (start_day, end_day))
+
+    cursor.execute("""
+        INSERT INTO daily_order_totals (day, order_count, revenue)
+        SELECT DATE(created_at), COUNT(*), COALESCE(SUM(total_amount), 0)
+        FROM orders
+        WHERE status = 'completed' AND created_at BETWEEN ? AND ?
+        GROUP BY DATE(created_at)
+    """, (start_at, end_at))
+    cursor.execute("""
+        INSERT INTO daily_sales
+            (day, menu_item_id, category_id, quantity, revenue, order_count)
+        SELECT DATE(o.created_at), oi.menu_item_id,
+               COALESCE(MAX(m.category_id), 0),
+               SUM(oi.quantity), SUM(oi.quantity * oi.price),
+               COUNT(DISTINCT o.id)
+        FROM orders o
+        JOIN order_items oi ON oi.order_id = o.id
+        LEFT JOIN menu_items m ON m.id = oi.menu_item_id
+        WHERE o.status = 'completed' AND o.created_at BETWEEN ? AND ?
+        GROUP BY DATE(o.created_at), oi.menu_item_id
+    """, (start_at, end_at))
+    cursor.execute("""
+        INSERT INTO daily_category_sales
+            (day, category_id, quantity, revenue, order_count)
+        SELECT DATE(o.created_at), COALESCE(m.category_id, 0),
+               SUM(oi.quantity), SUM(oi.quantity * oi.price),
+               COUNT(DISTINCT o.id)
+        FROM orders o
+        JOIN order_items oi ON oi.order_id = o.id
+        LEFT JOIN menu_items m ON m.id = oi.menu_item_id
+        WHERE o.status = 'completed' AND o.created_at BETWEEN ? AND ?
+        GROUP BY DATE(o.created_at), COALESCE(m.category_id, 0)
+    """, (start_at, end_at))
+
+    cursor.execute("""
+        SELECT COUNT(*) FROM daily_order_totals WHERE day BETWEEN ? AND ?
+    """, (start_day, end_day))
+    return cursor.fetchone()[0]
+
+
+def split_range(start, end, now=None):
+    """Tách khoảng thời gian thành các ngày trọn vẹn và các đoạn lẻ.
+
+    Trả về ((ngày đầu, ngày cuối) hoặc None, [(từ, đến), ...]). Ngày cuối
+    được coi là trọn vẹn nếu end đã tới thời điểm hiện tại, vì chưa có
+    đơn nào tạo sau thời điểm đó.
+    """
+    now = now or datetime.now()
+    first_full = start.date()
+    if start.time() != time.min:
+        first_full += timedelta(days=1)
+    last_full = end.date()
+    if end.time() < time(23, 59, 59) and end < now:
+        last_full -= timedelta(days=1)
+
+    if first_full > last_full:
+        return None, [(start, end)]
+
+    partial = []
+    if start.date() < first_full:
+        partial.append((start, datetime.combine(first_full, time.min)
+                        - timedelta(seconds=1)))
+    if end.date() > last_full:
+        partial.append((datetime.combine(end.date(), time.min), end))
+    return (first_full, last_full), partial
+
+
+def load_sales_summary(conn, start, end, now=None):
+    """Số liệu báo cáo trong khoảng [start, end].
+
+    Trả về dict gồm total_orders, total_revenue, daily [(ngày, số đơn,
+    doanh thu)], categories [(tên, số đơn, doanh thu)] và items [(tên,
+    số lượng, doanh thu)], hai danh sách sau sắp theo doanh thu giảm dần.
+    """
+    full_days, partial_ranges = split_range(start, end, now)
+    cursor = conn.cursor()
+
+    daily = {}
+    categories = {}
+    items = {}
+
+    def add(target, key, name, count, revenue):
+        entry = target.setdefault(key, [name, 0, 0])
+        entry[1] += count or 0
+        entry[2] += revenue or 0
+
+    if full_days:
+        params = tuple(day.strftime(DATE_FORMAT) for day in full_days)
+        cursor.execute(queries.ROLLUP_DAILY_REVENUE, params)
+        for day, order_count, revenue in cursor.fetchall():
+            add(daily, day, day, order_count, revenue)
+        cursor.execute(queries.ROLLUP_BY_CATEGORY, params)
+        for category_id, name, order_count, revenue in cursor.fetchall():
+            add(categories, category_id, name, order_count, revenue)
+        cursor.execute(queries.ROLLUP_BY_ITEM, params)
+        for item_id, name, quantity, revenue in cursor.fetchall():
+            add(items, item_id, name, quantity, revenue)
+
+    for range_start, range_end in partial_ranges:
+        params = (range_start.strftime(DATETIME_FORMAT),
+                  range_end.strftime(DATETIME_FORMAT))
+        cursor.execute(queries.REPORT_DAILY_REVENUE, params)
+        for day, order_count, revenue in cursor.fetchall():
+            add(daily, day, day, order_count, revenue)
+        cursor.execute(queries.REPORT_BY_CATEGORY, params)
+        for category_id, name, order_count, revenue in cursor.fetchall():
+            add(categories, category_id, name, order_count, revenue)
+        cursor.execute(queries.REPORT_BY_ITEM, params)
+        for item_id, name, quantity, revenue in cursor.fetchall():
+            add(items, item_id, name, quantity, revenue)
+
+    def by_revenue(rows):
+        return sorted((tuple(row) for row in rows.values()),
+                      key=lambda row: row[2], reverse=True)
+
+    return {
+        "total_orders": sum(row[1] for row in daily.values()),
+        "total_revenue": sum(row[2] for row in daily.values()),
+        "daily": [tuple(daily[day]) for day in sorted(daily)],
+        "categories": by_revenue(categories),
+        "items": by_revenue(items),
+    }
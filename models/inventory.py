@@ -0,0 +1,164 @@
+"""Ghi thay đổi tồn kho cùng lịch sử kho.
+
+Các hàm thay đổi số lượng trả về số lượng mới và mức tồn kho (đủ hàng,
+sắp hết, hết hàng) trước/sau của đúng các nguyên liệu vừa thay đổi, để
+giao diện cập nhật bảng kho và báo khi nguyên liệu đổi mức.
+"""
+
+from collections import namedtuple
+
+# Mức tồn kho của một nguyên liệu
+STOCK_OK = "ok"
+STOCK_LOW = "low"
+STOCK_OUT = "out"
+
+STOCK_LEVEL_LABELS = {
+    STOCK_OK: "Đủ hàng",
+    STOCK_LOW: "Sắp hết",
+    STOCK_OUT: "Hết hàng",
+}
+
+StockChange = namedtuple(
+    "StockChange",
+    ["inventory_id", "name", "quantity", "threshold", "level", "previous_level"])
+
+# Lượng mỗi nguyên liệu một đơn dùng, cộng dồn theo công thức của các món.
+# Công thức có thể lẻ (0.5 gram) nhưng số lượng trong kho và lịch sử kho là
+# số nguyên, nên tổng của cả đơn được làm tròn; nguyên liệu làm tròn về 0
+# không bị trừ
+ORDER_USAGE = """
+    SELECT r.inventory_id,
+           CAST(ROUND(SUM(r.quantity * oi.quantity)) AS INTEGER) AS amount
+    FROM order_items oi
+    JOIN recipes r ON r.menu_item_id = oi.menu_item_id
+    WHERE oi.order_id = ?
+    GROUP BY r.inventory_id
+    HAVING amount > 0
+"""
+
+DEDUCT_ORDER_USAGE = f"""
+    WITH usage AS ({ORDER_USAGE})
+    UPDATE inventory
+    SET quantity = quantity - (
+        SELECT amount FROM usage WHERE usage.inventory_id = inventory.id)
+    WHERE id IN (SELECT inventory_id FROM usage)
+"""
+
+INSERT_ORDER_EXPORTS = f"""
+    INSERT INTO inventory_history
+    (inventory_id, type, quantity, price, supplier, note, timestamp)
+    SELECT usage.inventory_id, 'export', usage.amount, NULL, NULL, ?,
+           (SELECT created_at FROM orders WHERE id = ?)
+    FROM ({ORDER_USAGE}) AS usage
+"""
+
+
+def stock_level(quantity, threshold):
+    if quantity <= 0:
+        return STOCK_OUT
+    if quantity <= threshold:
+        return STOCK_LOW
+    return STOCK_OK
+
+
+def level_alerts(changes):
+    """Các StockChange dạng dict (payload sự kiện) vừa đổi mức tồn kho"""
+    return [change for change in changes
+            if change["level"] != change["previous_level"]]
+
+
+def format_alert(alert):
+    """Một dòng thông báo cho StockChange dạng dict (payload sự kiện),
+    ví dụ 'Sữa tươi: Sắp hết (800/1000)'"""
+    return (f"{alert['name']}: {STOCK_LEVEL_LABELS[alert['level']]} "
+            f"({alert['quantity']:g}/{alert['threshold']:g})")
+
+
+def stock_changes(conn, deltas):
+    """Số lượng và mức tồn kho của các nguyên liệu sau khi đã cộng deltas.
+
+    deltas là dict inventory_id -> lượng vừa thay đổi (âm khi xuất kho);
+    trả về danh sách StockChange kèm mức trước khi thay đổi.
+    """
+    if not deltas:
+        return []
+    placeholders = ", ".join("?" * len(deltas))
+    rows = conn.execute(f"""
+        SELECT id, name, quantity, threshold FROM inventory
+        WHERE id IN ({placeholders})
+        ORDER BY name
+    """, list(deltas)).fetchall()
+
+    return [StockChange(inventory_id, name, quantity, threshold,
+                        stock_level(quantity, threshold),
+                        stock_level(quantity - deltas[inventory_id], threshold))
+            for inventory_id, name, quantity, threshold in rows]
+
+
+def create_item(conn, name, quantity, unit, threshold):
+    """Thêm nguyên liệu mới, trả về id"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO inventory (name, quantity, unit, threshold)
+        VALUES (?, ?, ?, ?)
+    """, (name, quantity, unit, threshold))
+    return cursor.lastrowid
+
+
+def delete_item(conn, item_id):
+    """Xóa nguyên liệu cùng lịch sử kho và các dòng công thức dùng nó.
+
+    Trả về None nếu không có nguyên liệu item_id.
+    """
+    cursor = conn.cursor()
+    # Xóa lịch sử và công thức dùng nguyên liệu trước
+    cursor.execute("DELETE FROM inventory_history WHERE inventory_id = ?", (item_id,))
+    cursor.execute("DELETE FROM recipes WHERE inventory_id = ?", (item_id,))
+    # Sau đó xóa item
+    cursor.execute("DELETE FROM inventory WHERE id = ?", (item_id,))
+    if cursor.rowcount == 0:
+        return None
+    return item_id
+
+
+def add_stock(conn, item_id, quantity, price, supplier=None, note=None):
+    """Cộng số lượng vào kho và ghi một dòng lịch sử nhập; trả về id lịch sử.
+
+    Trả về None nếu không có nguyên liệu item_id.
+    """
+    cursor = conn.cursor()
+
+    # Cập nhật số lượng trong kho
+    cursor.execute("""
+        UPDATE inventory
+        SET quantity = quantity + ?
+        WHERE id = ?
+    """, (quantity, item_id))
+    if cursor.rowcount == 0:
+        return None
+
+    # Thêm lịch sử nhập kho
+    cursor.execute("""
+        INSERT INTO inventory_history
+        (inventory_id, type, quantity, price, supplier, note, timestamp)
+        VALUES (?, 'import', ?, ?, ?, ?, datetime('now', 'localtime'))
+    """, (item_id, quantity, price, supplier, note))
+    return cursor.lastrowid
+
+
+def deduct_for_order(conn, order_id):
+    """Trừ kho theo công thức các món của đơn.
+
+    Hai câu lệnh cho cả đơn (không lặp theo món hay nguyên liệu): trừ số
+    lượng, rồi ghi mỗi nguyên liệu một dòng 'export' với tổng lượng dùng.
+    Món không có công thức không trừ gì. Tồn kho có thể âm nếu số liệu kho
+    chưa khớp thực tế, để không chặn việc bán hàng. Trả về danh sách
+    StockChange của các nguyên liệu đã trừ.
+    """
+    cursor = conn.cursor()
+    usage = cursor.execute(ORDER_USAGE, (order_id,)).fetchall()
+    if not usage:
+        return []
+    cursor.execute(DEDUCT_ORDER_USAGE, (order_id,))
+    cursor.execute(INSERT_ORDER_EXPORTS, (f"Đơn hàng #{order_id}", order_id, order_id))
+    return stock_changes(conn, {inventory_id: -amount for inventory_id, amount in usage})
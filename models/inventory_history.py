@@ -0,0 +1,68 @@
+"""Đọc lịch sử nhập/xuất kho theo từng trang.
+
+Phân trang theo khóa (keyset): trang sau bắt đầu ngay sau dòng cuối của
+trang trước theo (timestamp, id) giảm dần, nên chi phí mỗi trang không tăng
+theo số trang đã xem như LIMIT/OFFSET. Các bộ lọc đều nằm trong câu SQL.
+"""
+
+PAGE_SIZE = 200
+
+HISTORY_COLUMNS = """
+    SELECT h.id, h.timestamp, h.type, i.name, h.quantity, h.price, h.supplier, h.note
+    FROM inventory_history h
+    JOIN inventory i ON h.inventory_id = i.id
+"""
+
+
+def build_history_query(after=None, inventory_id=None, history_type=None,
+                        supplier=None, start=None, end=None, before=None):
+    """Câu SQL và tham số cho một trang lịch sử (chưa gồm LIMIT).
+
+    after là (timestamp, id) của dòng cuối trang trước; before là
+    (timestamp, id) của dòng đầu đã tải, để lấy các dòng mới hơn. start, end là chuỗi
+    'YYYY-MM-DD HH:MM:SS'; supplier tìm theo chuỗi con, không phân biệt hoa
+    thường với chữ cái ASCII.
+    """
+    conditions = []
+    params = []
+    if inventory_id is not None:
+        conditions.append("h.inventory_id = ?")
+        params.append(inventory_id)
+    if history_type:
+        conditions.append("h.type = ?")
+        params.append(history_type)
+    if supplier:
+        conditions.append("h.supplier LIKE ?")
+        params.append(f"%{supplier}%")
+    if start:
+        conditions.append("h.timestamp >= ?")
+        params.append(start)
+    if end:
+        conditions.append("h.timestamp <= ?")
+        params.append(end)
+    if after is not None:
+        conditions.append("(h.timestamp, h.id) < (?, ?)")
+        params.extend(after)
+    if before is not None:
+        conditions.append("(h.timestamp, h.id) > (?, ?)")
+        params.extend(before)
+
+    sql = HISTORY_COLUMNS
+    if conditions:
+        sql += "    WHERE " + "\n    AND ".join(conditions) + "\n"
+    sql += "    ORDER BY h.timestamp DESC, h.id DESC\n"
+    return sql, params
+
+
+def fetch_history_page(conn, after=None, limit=PAGE_SIZE, before=None, **filters):
+    """Trả về tối đa limit dòng lịch sử, mới nhất lên đầu.
+
+    Dòng có dạng (id, timestamp, type, tên nguyên liệu, số lượng, đơn giá,
+    nhà cung cấp, ghi chú). Truyền (row[1], row[0]) của dòng cuối làm after
+    để lấy trang tiếp theo, của dòng đầu làm before để lấy các dòng mới
+    thêm sau khi đã tải.
+    """
+    sql, params = build_history_query(after=after, before=before, **filters)
+    cursor = conn.cursor()
+    cursor.execute(sql + "    LIMIT ?", params + [limit])
+    return cursor.fetchall()
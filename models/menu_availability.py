@@ -0,0 +1,93 @@
+"""Trạng thái còn bán của món tính từ tồn kho và công thức.
+
+Món có công thức còn bán ('available') khi mọi nguyên liệu trong kho đủ cho
+ít nhất một phần, ngược lại là 'out_of_stock'. Chỉ các món dùng nguyên
+liệu vừa thay đổi được tính lại (qua index recipes theo inventory_id). Món
+không có công thức giữ trạng thái chỉnh tay, món 'discontinued' không bao
+giờ bị đổi.
+"""
+
+from collections import namedtuple
+
+MenuChange = namedtuple("MenuChange", ["menu_item_id", "name", "price", "status"])
+
+# Trạng thái mới của các món trong affected (bảng tạm hoặc CTE cùng tên)
+# khác với trạng thái hiện tại
+CHANGED_ITEMS = """
+    SELECT m.id, m.name, m.price,
+           CASE WHEN EXISTS (
+               SELECT 1 FROM recipes r
+               JOIN inventory i ON i.id = r.inventory_id
+               WHERE r.menu_item_id = m.id AND i.quantity < r.quantity
+           ) THEN 'out_of_stock' ELSE 'available' END AS new_status
+    FROM menu_items m
+    WHERE m.id IN (SELECT menu_item_id FROM affected)
+      AND m.status IN ('available', 'out_of_stock')
+      AND m.status != new_status
+    ORDER BY m.name
+"""
+
+UPDATE_STATUS = "UPDATE menu_items SET status = ? WHERE id = ?"
+
+
+def apply_changes(conn, sql, params=()):
+    changes = [MenuChange(*row) for row in conn.execute(sql, params)]
+    conn.executemany(UPDATE_STATUS, [(change.status, change.menu_item_id)
+                                     for change in changes])
+    return changes
+
+
+def refresh_for_ingredients(conn, inventory_ids):
+    """Tính lại các món dùng một trong các nguyên liệu inventory_ids.
+
+    Trả về danh sách MenuChange của các món vừa đổi trạng thái.
+    """
+    inventory_ids = list(inventory_ids)
+    if not inventory_ids:
+        return []
+    placeholders = ", ".join("?" * len(inventory_ids))
+    return apply_changes(conn, f"""
+        WITH affected AS (
+            SELECT DISTINCT menu_item_id FROM recipes
+            WHERE inventory_id IN ({placeholders})
+        )
+        {CHANGED_ITEMS}
+    """, inventory_ids)
+
+
+def refresh_items(conn, menu_item_ids):
+    """Tính lại các món menu_item_ids (ví dụ sau khi xóa nguyên liệu khỏi
+    công thức của chúng)"""
+    menu_item_ids = list(menu_item_ids)
+    if not menu_item_ids:
+        return []
+    placeholders = ", ".join("?" * len(menu_item_ids))
+    return apply_changes(conn, f"""
+        WITH affected AS (
+            SELECT id AS menu_item_id FROM menu_items
+            WHERE id IN ({placeholders})
+        )
+        {CHANGED_ITEMS}
+    """, menu_item_ids)
+
+
+def refresh_for_order(conn, order_id):
+    """Tính lại các món dùng chung nguyên liệu với các món trong đơn"""
+    return apply_changes(conn, f"""
+        WITH affected AS (
+            SELECT DISTINCT shared.menu_item_id
+            FROM order_items oi
+            JOIN recipes r ON r.menu_item_id = oi.menu_item_id
+            JOIN recipes shared ON shared.inventory_id = r.inventory_id
+            WHERE oi.order_id = ?
+        )
+        {CHANGED_ITEMS}
+    """, (order_id,))
+
+
+def refresh_all(conn):
+    """Tính lại mọi món có công thức (sau khi import công thức hoặc kho)"""
+    return apply_changes(conn, f"""
+        WITH affected AS (SELECT DISTINCT menu_item_id FROM recipes)
+        {CHANGED_ITEMS}
+    """)
@@ -0,0 +1,44 @@
+"""Các món đang bán, dùng làm dữ liệu cho gợi ý đồ uống của trợ lý ảo.
+
+Mỗi món có một mã băm nội dung (tên, mô tả, danh mục, giá) để chỉ những
+món thật sự thay đổi mới phải tính lại vector.
+"""
+
+import hashlib
+
+# Món hết hàng hoặc ngừng kinh doanh không được gợi ý
+RECOMMENDABLE_ITEMS = """
+    SELECT m.id, m.name, m.description, c.name as category_name, m.price
+    FROM menu_items m
+    LEFT JOIN categories c ON m.category_id = c.id
+    WHERE m.status = 'available'
+"""
+
+
+def item_hash(name, description, category, price):
+    text = "\x1f".join(str(value) for value in (name, description, category, price))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def load_recommendable_items(conn):
+    """{id: {"name", "description", "category", "price", "hash"}} của các món đang bán"""
+    cursor = conn.cursor()
+    cursor.execute(RECOMMENDABLE_ITEMS)
+    items = {}
+    for item_id, name, description, category, price in cursor.fetchall():
+        items[item_id] = {
+            "name": name,
+            "description": description or "",
+            "category": category or "Khác",
+            "price": price,
+            "hash": item_hash(name, description or "", category or "Khác", price),
+        }
+    return items
+
+
+def diff_items(known_hashes, items):
+    """So với {id: hash} đã biết, trả về (id món mới/đổi, id món bị bỏ)"""
+    changed = [item_id for item_id, item in items.items()
+               if known_hashes.get(item_id) != item["hash"]]
+    removed = [item_id for item_id in known_hashes if item_id not in items]
+    return changed, removed
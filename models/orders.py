@@ -0,0 +1,92 @@
+"""Ghi đơn hàng: tạo đơn và đổi trạng thái.
+
+Các hàm nhận kết nối đang mở transaction ghi (thường qua run_write) và
+không đụng tới giao diện, nên dùng được cả từ OrderManager lẫn script đo
+hiệu năng. Câu SQL là hằng số để sqlite3 dùng lại câu lệnh đã biên dịch
+trong cache của kết nối.
+"""
+
+from datetime import datetime
+
+from models import daily_sales
+
+ORDER_STATUSES = ('pending', 'preparing', 'served', 'completed', 'cancelled')
+
+# Chỉ giành được bàn còn trống; trong transaction ghi nên hai máy không thể
+# cùng xếp khách vào một bàn
+CLAIM_TABLE = """
+    UPDATE tables
+    SET status = 'occupied'
+    WHERE id = ? AND status = 'available'
+"""
+
+INSERT_ORDER = """
+    INSERT INTO orders (user_id, table_id, total_amount, status, created_at)
+    VALUES (?, ?, ?, 'pending', ?)
+"""
+
+INSERT_ORDER_ITEM = """
+    INSERT INTO order_items (order_id, menu_item_id, quantity, price)
+    VALUES (?, ?, ?, ?)
+"""
+
+
+def create_order(conn, user_id, table_id, items, created_at=None):
+    """Tạo đơn 'pending' cho bàn trống, đánh dấu bàn đang có khách; trả về id đơn.
+
+    items là danh sách dict product_id, quantity, price. Trả về None (không
+    ghi gì) nếu bàn không còn trống.
+    """
+    created_at = created_at or datetime.now().strftime(daily_sales.DATETIME_FORMAT)
+    cursor = conn.cursor()
+
+    # Giành bàn trước khi ghi đơn
+    cursor.execute(CLAIM_TABLE, (table_id,))
+    if cursor.rowcount == 0:
+        return None
+
+    # Tạo đơn hàng mới
+    total_amount = sum(item["quantity"] * item["price"] for item in items)
+    cursor.execute(INSERT_ORDER, (user_id, table_id, total_amount, created_at))
+    order_id = cursor.lastrowid
+
+    # Thêm toàn bộ chi tiết đơn hàng trong một lần gọi
+    cursor.executemany(INSERT_ORDER_ITEM, [
+        (order_id, item["product_id"], item["quantity"], item["price"])
+        for item in items])
+    return order_id
+
+
+def update_order_status(conn, order_id, new_status):
+    """Đổi trạng thái đơn, cập nhật bảng tổng hợp và bàn; trả về trạng thái cũ.
+
+    Trả về None nếu không có đơn order_id.
+    """
+    cursor = conn.cursor()
+
+    # Lấy table_id và trạng thái cũ của đơn hàng
+    cursor.execute(
+        "SELECT table_id, status FROM orders WHERE id = ?", (order_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    table_id, old_status = row
+
+    # Cập nhật trạng thái đơn hàng
+    cursor.execute("""
+        UPDATE orders
+        SET status = ?
+        WHERE id = ?
+    """, (new_status, order_id))
+
+    # Cập nhật bảng tổng hợp doanh số cho báo cáo
+    daily_sales.apply_status_change(cursor, order_id, old_status, new_status)
+
+    # Nếu đơn hàng hoàn thành hoặc hủy, cập nhật trạng thái bàn thành trống
+    if new_status in ['completed', 'cancelled']:
+        cursor.execute("""
+            UPDATE tables
+            SET status = 'available'
+            WHERE id = ?
+        """, (table_id,))
+    return old_status
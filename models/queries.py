@@ -0,0 +1,148 @@
+"""Các truy vấn chạy thường xuyên trên bảng lớn (orders, order_items).
+Lịch sử kho có câu truy vấn dựng theo bộ lọc trong models/inventory_history.py.
+
+Mọi truy vấn ở đây phải dùng index (xem migration 2); test_query_plans.py
+kiểm tra điều này bằng EXPLAIN QUERY PLAN. Khi sửa truy vấn hoặc thêm
+truy vấn mới vào module này, cần bảo đảm test vẫn chạy qua.
+"""
+
+# Danh sách đơn hàng cho nhân viên: đơn chờ xử lý lên đầu.
+# Biểu thức CASE khớp với index idx_orders_status_rank_created; id là khóa
+# phụ khi trùng created_at, giống OrderManager.order_sort_key.
+STAFF_ORDERS = """
+    SELECT o.id, t.number, o.created_at, o.total_amount, o.status,
+           u.username as customer_name, o.revision
+    FROM orders o
+    LEFT JOIN tables t ON o.table_id = t.id
+    LEFT JOIN users u ON o.user_id = u.id
+    ORDER BY
+        CASE o.status
+            WHEN 'pending' THEN 1
+            WHEN 'preparing' THEN 2
+            WHEN 'served' THEN 3
+            WHEN 'completed' THEN 4
+            WHEN 'cancelled' THEN 5
+        END,
+        o.created_at DESC, o.id DESC
+"""
+
+# Đơn hàng của một người dùng
+USER_ORDERS = """
+    SELECT o.id, t.number, o.created_at, o.total_amount, o.status,
+           u.username as customer_name, o.revision
+    FROM orders o
+    LEFT JOIN tables t ON o.table_id = t.id
+    LEFT JOIN users u ON o.user_id = u.id
+    WHERE o.user_id = ?
+    ORDER BY o.created_at DESC, o.id DESC
+"""
+
+# Revision lớn nhất hiện có, làm mốc khi tải lại toàn bộ danh sách đơn
+LATEST_ORDER_REVISION = """
+    SELECT COALESCE(MAX(revision), 0) FROM orders
+"""
+
+# Các đơn thay đổi sau một revision (tải lại từng phần danh sách đơn)
+ORDERS_CHANGED_SINCE = """
+    SELECT o.id, t.number, o.created_at, o.total_amount, o.status,
+           u.username as customer_name, o.revision
+    FROM orders o
+    LEFT JOIN tables t ON o.table_id = t.id
+    LEFT JOIN users u ON o.user_id = u.id
+    WHERE o.revision > ?
+    ORDER BY o.revision
+"""
+
+# Các đơn của một người dùng thay đổi sau một revision
+USER_ORDERS_CHANGED_SINCE = """
+    SELECT o.id, t.number, o.created_at, o.total_amount, o.status,
+           u.username as customer_name, o.revision
+    FROM orders o
+    LEFT JOIN tables t ON o.table_id = t.id
+    LEFT JOIN users u ON o.user_id = u.id
+    WHERE o.revision > ? AND o.user_id = ?
+    ORDER BY o.revision
+"""
+
+# Các truy vấn REPORT_* đọc trực tiếp từ orders, chỉ dùng cho phần ngày
+# lẻ của khoảng báo cáo; ngày trọn vẹn đọc từ bảng tổng hợp (ROLLUP_*).
+# Xem models/daily_sales.py.
+
+# Báo cáo: doanh thu theo ngày
+REPORT_DAILY_REVENUE = """
+    SELECT DATE(created_at) as date,
+           COUNT(*) as order_count,
+           SUM(total_amount) as daily_revenue
+    FROM orders
+    WHERE created_at BETWEEN ? AND ?
+    AND status = 'completed'
+    GROUP BY DATE(created_at)
+    ORDER BY date
+"""
+
+# Báo cáo: doanh thu theo danh mục
+REPORT_BY_CATEGORY = """
+    SELECT c.id, c.name,
+           COUNT(DISTINCT o.id) as order_count,
+           SUM(oi.quantity * oi.price) as revenue
+    FROM categories c
+    JOIN menu_items m ON m.category_id = c.id
+    JOIN order_items oi ON oi.menu_item_id = m.id
+    JOIN orders o ON oi.order_id = o.id
+    WHERE o.created_at BETWEEN ? AND ?
+    AND o.status = 'completed'
+    GROUP BY c.id, c.name
+    ORDER BY revenue DESC
+"""
+
+# Báo cáo: số lượng bán và doanh thu theo món
+REPORT_BY_ITEM = """
+    SELECT m.id, m.name,
+           SUM(oi.quantity) as total_quantity,
+           SUM(oi.quantity * oi.price) as revenue
+    FROM menu_items m
+    JOIN order_items oi ON oi.menu_item_id = m.id
+    JOIN orders o ON oi.order_id = o.id
+    WHERE o.created_at BETWEEN ? AND ?
+    AND o.status = 'completed'
+    GROUP BY m.id, m.name
+    ORDER BY revenue DESC
+"""
+
+# Bảng tổng hợp: doanh thu theo ngày
+ROLLUP_DAILY_REVENUE = """
+    SELECT day, order_count, revenue
+    FROM daily_order_totals
+    WHERE day BETWEEN ? AND ?
+    ORDER BY day
+"""
+
+# Bảng tổng hợp: doanh thu theo danh mục
+ROLLUP_BY_CATEGORY = """
+    SELECT c.id, c.name,
+           SUM(s.order_count) as order_count,
+           SUM(s.revenue) as revenue
+    FROM daily_category_sales s
+    JOIN categories c ON c.id = s.category_id
+    WHERE s.day BETWEEN ? AND ?
+    GROUP BY c.id, c.name
+"""
+
+# Bảng tổng hợp: số lượng bán và doanh thu theo món
+ROLLUP_BY_ITEM = """
+    SELECT m.id, m.name,
+           SUM(s.quantity) as total_quantity,
+           SUM(s.revenue) as revenue
+    FROM daily_sales s
+    JOIN menu_items m ON m.id = s.menu_item_id
+    WHERE s.day BETWEEN ? AND ?
+    GROUP BY m.id, m.name
+"""
+
+# Nguyên liệu sắp hết/hết hàng, đọc từ index một phần idx_inventory_low_stock
+LOW_STOCK_ITEMS = """
+    SELECT id, name, quantity, unit, threshold
+    FROM inventory
+    WHERE quantity <= threshold
+    ORDER BY name
+"""
@@ -0,0 +1,31 @@
+"""Ghi tài khoản người dùng cùng hồ sơ nhân viên/khách hàng."""
+
+
+def exists(conn, username, email):
+    """Đã có tài khoản trùng tên đăng nhập hoặc email chưa"""
+    return conn.execute(
+        "SELECT 1 FROM users WHERE username = ? OR email = ?", (username, email)
+    ).fetchone() is not None
+
+
+def insert_user(conn, username, password_hash, role, email=None, phone=None):
+    """Thêm tài khoản, trả về id"""
+    cursor = conn.execute("""
+        INSERT INTO users (username, password, role, email, phone)
+        VALUES (?, ?, ?, ?, ?)
+    """, (username, password_hash, role, email, phone))
+    return cursor.lastrowid
+
+
+def insert_employee(conn, user_id, name, position, salary=None):
+    conn.execute("""
+        INSERT INTO employees (user_id, name, position, salary)
+        VALUES (?, ?, ?, ?)
+    """, (user_id, name, position, salary))
+
+
+def insert_customer(conn, user_id, name):
+    conn.execute("""
+        INSERT INTO customers (user_id, name)
+        VALUES (?, ?)
+    """, (user_id, name))
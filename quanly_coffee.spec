@@ -26,9 +26,32 @@ a = Analysis(
         'PyQt6.QtCore',
         'PyQt6.QtGui',
         'PyQt6.QtWidgets',
+        'PyQt6.QtNetwork',
+        'config.database',
+        'config.migrations',
+        'config.migrations.m0001_initial_schema',
+        'config.migrations.m0002_hot_path_indexes',
+        'config.migrations.m0003_daily_sales_rollup',
+        'config.migrations.m0004_order_revision',
+        'config.migrations.m0005_inventory_history_item_index',
+        'config.migrations.m0006_recipes',
+        'config.migrations.m0007_low_stock_index',
+        'config.migrations.m0008_order_id_tiebreak',
+        'models.queries',
+        'models.daily_sales',
+        'models.inventory_history',
+        'models.menu_catalog',
+        'models.orders',
+        'models.users',
+        'models.inventory',
+        'models.menu_availability',
+        'controllers.order_service',
+        'controllers.inventory_service',
+        'controllers.account_service',
         'utils.styles',
         'utils.validators',
         'utils.csv_importer',
+        'utils.event_bus',
         'views.dialogs.login_dialog',
         'views.dialogs.register_dialog',
         'views.windows.admin_window',
@@ -39,7 +62,10 @@ a = Analysis(
         'views.managers.menu_manager',
         'views.managers.order_manager',
         'views.managers.report_manager',
-        'views.managers.table_manager'
+        'views.managers.table_manager',
+        'views.workers',
+        'views.table_model',
+        'views.delegates'
     ],
     hookspath=[],
     hooksconfig={},
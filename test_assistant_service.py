@@ -0,0 +1,187 @@
+import threading
+import time
+
+import pytest
+
+from utils.assistant_service import AssistantClient, AssistantServer, RequestBatcher
+
+
+class FakeAssistant:
+    """Thay cho AIAssistant: ghi lại kích thước từng lô"""
+
+    def __init__(self):
+        self.chat_batches = []
+        self.stream_batches = []
+        self.refreshed = 0
+        self.stream_stopped = threading.Event()
+
+    def chat_batch(self, messages):
+        self.chat_batches.append(len(messages))
+        return [f"trả lời: {message}" for message in messages]
+
+    def stream_chat_batch(self, messages, stop_events, emit):
+        self.stream_batches.append(len(messages))
+        for i, message in enumerate(messages):
+            if message == "câu khó":
+                # Mô hình chưa sinh thêm token nào trong một lúc lâu
+                emit(i, "để tôi nghĩ")
+                stop_events[i].wait(3)
+            elif message == "kể chuyện":
+                # Giả lập mô hình sinh mãi từng token cho tới khi bị dừng
+                while not stop_events[i].wait(0.02):
+                    emit(i, ".")
+                self.stream_stopped.set()
+            else:
+                emit(i, "trả lời: ")
+                emit(i, message)
+
+    def recommend_batch(self, preferences_list):
+        return [f"gợi ý: {preferences}" for preferences in preferences_list]
+
+    def refresh_menu(self):
+        self.refreshed += 1
+        return 1, 0
+
+    def cache_stats(self):
+        return {"hits": 0, "near_hits": 0, "misses": 0}
+
+
+@pytest.fixture
+def service():
+    assistant = FakeAssistant()
+    server = AssistantServer(port=0, load_assistant=lambda: assistant, window=0.2)
+    server.start()
+    yield server, assistant, AssistantClient(port=server.server_port, timeout=10)
+    server.stop()
+
+
+def test_batcher_groups_requests_by_kind():
+    batches = []
+    batcher = RequestBatcher({
+        "double": lambda values: batches.append(values) or [v * 2 for v in values],
+    }, window=0.2)
+    futures = [batcher.submit("double", i) for i in range(3)]
+    batcher.start()
+
+    assert [future.result(timeout=5) for future in futures] == [0, 2, 4]
+    assert batches == [[0, 1, 2]]
+    batcher.stop()
+
+
+def test_batcher_respects_max_batch():
+    batches = []
+    batcher = RequestBatcher({
+        "echo": lambda values: batches.append(len(values)) or values,
+    }, window=0.2, max_batch=2)
+    futures = [batcher.submit("echo", i) for i in range(5)]
+    batcher.start()
+
+    assert [future.result(timeout=5) for future in futures] == list(range(5))
+    assert batches == [2, 2, 1]
+    batcher.stop()
+
+
+def test_batcher_reports_errors_to_every_request():
+    def fail(values):
+        raise RuntimeError("mô hình lỗi")
+
+    batcher = RequestBatcher({"chat": fail}, window=0)
+    batcher.start()
+    with pytest.raises(RuntimeError, match="mô hình lỗi"):
+        batcher.submit("chat", "xin chào").result(timeout=5)
+    batcher.stop()
+
+
+def test_concurrent_clients_share_one_batch(service):
+    server, assistant, client = service
+    client.wait_ready()
+    replies = [None] * 4
+
+    def ask(i):
+        replies[i] = client.chat_with_customer(f"câu {i}")
+
+    threads = [threading.Thread(target=ask, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert replies == [f"trả lời: câu {i}" for i in range(4)]
+    assert sum(assistant.chat_batches) == 4
+    assert len(assistant.chat_batches) < 4
+
+
+def test_concurrent_streams_share_one_batch(service):
+    server, assistant, client = service
+    client.wait_ready()
+    replies = [None] * 3
+
+    def ask(i):
+        replies[i] = list(client.stream_chat(f"câu {i}"))
+
+    threads = [threading.Thread(target=ask, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert replies == [["trả lời: ", f"câu {i}"] for i in range(3)]
+    assert sum(assistant.stream_batches) == 3
+    assert len(assistant.stream_batches) < 3
+
+
+def test_client_mirrors_assistant_methods(service):
+    server, assistant, client = service
+    client.wait_ready()
+
+    assert client.recommend_drinks("ngọt") == "gợi ý: ngọt"
+    assert list(client.stream_chat("xin chào")) == ["trả lời: ", "xin chào"]
+    assert client.refresh_menu() == (1, 0)
+    assert client.cache_stats()["misses"] == 0
+    assert client.health()["status"] == "ready"
+
+
+def test_failed_load_is_reported():
+    def fail():
+        raise RuntimeError("thiếu transformers")
+
+    server = AssistantServer(port=0, load_assistant=fail)
+    server.start()
+    client = AssistantClient(port=server.server_port, timeout=10)
+    try:
+        with pytest.raises(RuntimeError, match="thiếu transformers"):
+            client.wait_ready()
+        with pytest.raises(RuntimeError, match="thiếu transformers"):
+            client.chat_with_customer("xin chào")
+    finally:
+        server.stop()
+
+
+def test_stop_closes_stream_and_stops_generation(service):
+    server, assistant, client = service
+    client.wait_ready()
+    stop_event = threading.Event()
+
+    chunks = client.stream_chat("kể chuyện", stop_event)
+    assert next(chunks) == "."
+    threading.Timer(0.2, stop_event.set).start()
+    start = time.monotonic()
+    assert set(chunks) <= {"."}
+
+    assert time.monotonic() - start < 5
+    # Dịch vụ thấy kết nối bị đóng và dừng sinh câu trả lời
+    assert assistant.stream_stopped.wait(5)
+
+
+def test_stop_does_not_wait_for_next_chunk(service):
+    server, assistant, client = service
+    client.wait_ready()
+    stop_event = threading.Event()
+
+    chunks = client.stream_chat("câu khó", stop_event)
+    assert next(chunks) == "để tôi nghĩ"
+    threading.Timer(0.2, stop_event.set).start()
+    start = time.monotonic()
+
+    assert list(chunks) == []
+    assert time.monotonic() - start < 1
@@ -0,0 +1,106 @@
+import pytest
+
+from config import database
+from models import menu_availability
+from utils.csv_importer import CSVImporter
+
+
+def test_sample_data_imports(conn):
+    for name in ("categories", "menu_items", "users", "tables", "inventory", "recipes"):
+        result = getattr(CSVImporter, f"import_{name}")(
+            f"sample_data/{name}.csv", conn, batch_size=3)
+        assert result.rows > 0
+        assert result.rows_per_second > 0
+
+    # Món được gắn vào danh mục theo tên
+    assert conn.execute("""
+        SELECT c.name FROM menu_items m JOIN categories c ON c.id = m.category_id
+        WHERE m.name = 'Trà đào'
+    """).fetchone() == ("Trà",)
+    staff, customers = conn.execute("""
+        SELECT (SELECT COUNT(*) FROM employees e JOIN users u ON u.id = e.user_id
+                WHERE u.role = 'staff'),
+               (SELECT COUNT(*) FROM customers)
+    """).fetchone()
+    assert staff == conn.execute(
+        "SELECT COUNT(*) FROM users WHERE role = 'staff'").fetchone()[0] > 0
+    assert customers == conn.execute(
+        "SELECT COUNT(*) FROM users WHERE role = 'customer'").fetchone()[0]
+    # Công thức gắn món với nguyên liệu theo tên
+    assert conn.execute("""
+        SELECT i.name, r.quantity FROM recipes r
+        JOIN menu_items m ON m.id = r.menu_item_id
+        JOIN inventory i ON i.id = r.inventory_id
+        WHERE m.name = 'Latte' ORDER BY i.name
+    """).fetchall() == [("Cà phê hạt", 18), ("Sữa tươi", 200)]
+    # Trạng thái món có công thức đã khớp với tồn kho ngay sau khi import
+    assert menu_availability.refresh_all(conn) == []
+
+
+def test_legacy_category_id_and_available_columns(conn, write_csv):
+    CSVImporter.import_categories(
+        write_csv("c.csv", "name,description\nCà phê,\n"), conn)
+    category_id = conn.execute("SELECT id FROM categories").fetchone()[0]
+    path = write_csv("m.csv",
+                     "category_id,name,description,price,available\n"
+                     f"{category_id},Bạc xỉu,,29000,0\n")
+
+    assert CSVImporter.import_menu_items(path, conn).rows == 1
+    assert conn.execute(
+        "SELECT category_id, status FROM menu_items").fetchone() == \
+        (category_id, "out_of_stock")
+
+
+def test_bad_row_reports_line_number(conn, write_csv):
+    path = write_csv("t.csv",
+                     "number,capacity,status\n1,4,available\n2,bốn,available\n")
+
+    with pytest.raises(ValueError, match="Dòng 3"):
+        CSVImporter.import_tables(path, conn)
+
+
+def test_unknown_category_is_rejected(conn, write_csv):
+    path = write_csv("m.csv",
+                     "category,name,description,price,status\n"
+                     "Không có,Bạc xỉu,,29000,available\n")
+
+    with pytest.raises(ValueError, match="Không có"):
+        CSVImporter.import_menu_items(path, conn)
+
+
+def test_recipe_with_unknown_ingredient_is_rejected(conn, write_csv):
+    CSVImporter.import_categories(
+        write_csv("c.csv", "name,description\nCà phê,\n"), conn)
+    CSVImporter.import_menu_items(write_csv(
+        "m.csv", "category,name,description,price\nCà phê,Bạc xỉu,,29000\n"), conn)
+    path = write_csv("r.csv",
+                     "menu_item,ingredient,quantity\nBạc xỉu,Sữa đặc,30\n")
+
+    with pytest.raises(ValueError, match="Dòng 2.*Sữa đặc"):
+        CSVImporter.import_recipes(path, conn)
+
+
+def test_failed_import_writes_nothing(db_path, write_csv):
+    csv_path = write_csv("i.csv",
+                         "name,quantity,unit,threshold\n"
+                         "Sữa,10,ml,1\nĐường,nhiều,gram,1\n")
+    with pytest.raises(ValueError):
+        CSVImporter.import_inventory(csv_path, batch_size=1)
+    with database.get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM inventory").fetchone()[0] == 0
+
+
+def test_recipe_with_duplicate_menu_name_is_rejected(conn, write_csv):
+    CSVImporter.import_categories(
+        write_csv("c.csv", "name,description\nCà phê,\nTrà,\n"), conn)
+    CSVImporter.import_menu_items(write_csv(
+        "m.csv", "category,name,description,price\n"
+        "Cà phê,Bạc xỉu,,29000\nTrà,Bạc xỉu,,35000\n"), conn)
+    CSVImporter.import_inventory(write_csv(
+        "i.csv", "name,quantity,unit,threshold\nSữa đặc,1000,ml,100\n"), conn)
+    path = write_csv("r.csv",
+                     "menu_item,ingredient,quantity\nBạc xỉu,Sữa đặc,30\n")
+
+    with pytest.raises(ValueError, match="Dòng 2.*nhiều món cùng tên 'Bạc xỉu'"):
+        CSVImporter.import_recipes(path, conn)
+    assert conn.execute("SELECT COUNT(*) FROM recipes").fetchone()[0] == 0
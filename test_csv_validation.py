@@ -0,0 +1,83 @@
+import pytest
+
+from config import database
+from utils.csv_validation import (CSVValidationError, validate_and_import,
+                                  validate_file)
+
+USERS = (
+    "username,password,role,email,phone,name,position,salary\n"
+    "staff1,123,staff,staff1@coffee.com,0901234567,A,Thu ngân,8000000\n"
+    "khach1,123,guest,khach1@coffee.com,0901234568,B,,\n"
+    "khach2,123,customer,khach2-coffee.com,12345,C,,\n"
+    "staff1,123,staff,,,D,Pha chế,nhiều\n"
+)
+
+
+def test_sample_data_is_valid():
+    for kind in ("categories", "menu_items", "users", "tables", "inventory", "recipes"):
+        assert validate_file(kind, f"sample_data/{kind}.csv") == []
+
+
+def test_errors_are_reported_per_row(write_csv):
+    errors = validate_file("users", write_csv("u.csv", USERS), workers=1)
+
+    assert [(e.line, e.column) for e in errors] == [
+        (3, "role"),
+        (4, "email"),
+        (4, "phone"),
+        (5, "salary"),
+        (5, "username"),
+    ]
+    assert "trùng với dòng 2" in errors[-1].message
+
+
+def test_recipe_rows_are_checked(write_csv):
+    path = write_csv("r.csv",
+                     "menu_item,ingredient,quantity\n"
+                     "Latte,Sữa tươi,200\n"
+                     "Latte,Cà phê hạt,0\n"
+                     ",Đường,5\n"
+                     "Latte,Sữa tươi,150\n")
+
+    assert [(e.line, e.column) for e in validate_file("recipes", path, workers=1)] == [
+        (3, "quantity"),
+        (4, "menu_item"),
+        (5, "menu_item"),
+    ]
+
+
+def test_process_pool_matches_in_process_result(write_csv):
+    rows = "".join(f"{i},4,{'available' if i % 7 else 'broken'}\n"
+                   for i in range(1, 200))
+    path = write_csv("t.csv", "number,capacity,status\n" + rows + "5,4,available\n")
+
+    expected = validate_file("tables", path, workers=1, chunk_size=16)
+    assert validate_file("tables", path, workers=2, chunk_size=16) == expected
+    assert len(expected) == 200 // 7 + 1
+
+
+def test_missing_columns_are_reported_once(write_csv):
+    path = write_csv("i.csv", "name,quantity\nSữa,10\n")
+
+    errors = validate_file("inventory", path)
+    assert [(e.line, e.column) for e in errors] == [(1, "unit"), (1, "threshold")]
+
+
+def test_dry_run_never_opens_the_database(write_csv, monkeypatch):
+    def no_database():
+        raise AssertionError("dry run không được mở database")
+
+    monkeypatch.setattr(database, "get_db_path", no_database)
+    path = write_csv("c.csv", "name,description\nCà phê,\nTrà,\n")
+
+    assert validate_and_import("categories", path, dry_run=True) is None
+    with pytest.raises(CSVValidationError):
+        validate_and_import("users", write_csv("u.csv", USERS), dry_run=True)
+
+
+def test_invalid_file_is_rejected_before_writing(conn, write_csv):
+    before = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    with pytest.raises(CSVValidationError, match="5 lỗi"):
+        validate_and_import("users", write_csv("u.csv", USERS), conn=conn)
+    assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == before
@@ -0,0 +1,121 @@
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from config.migrations import migrate
+from models import daily_sales
+
+
+@pytest.fixture
+def conn(conn):
+    conn.executescript("""
+        INSERT INTO categories (id, name) VALUES (1, 'Cà phê'), (2, 'Trà');
+        INSERT INTO menu_items (id, category_id, name, price)
+        VALUES (1, 1, 'Cà phê đen', 25000),
+               (2, 1, 'Cà phê sữa', 30000),
+               (3, 2, 'Trà đào', 35000);
+    """)
+    return conn
+
+
+def add_order(conn, created_at, lines, status="pending"):
+    cursor = conn.cursor()
+    total = sum(quantity * price for _, quantity, price in lines)
+    cursor.execute("""
+        INSERT INTO orders (user_id, table_id, status, total_amount, created_at)
+        VALUES (1, 1, ?, ?, ?)
+    """, (status, total, created_at))
+    order_id = cursor.lastrowid
+    cursor.executemany("""
+        INSERT INTO order_items (order_id, menu_item_id, quantity, price)
+        VALUES (?, ?, ?, ?)
+    """, [(order_id, item, quantity, price) for item, quantity, price in lines])
+    return order_id
+
+
+def complete(conn, order_id, status="completed"):
+    cursor = conn.cursor()
+    old_status = cursor.execute(
+        "SELECT status FROM orders WHERE id = ?", (order_id,)).fetchone()[0]
+    cursor.execute("UPDATE orders SET status = ? WHERE id = ?",
+                   (status, order_id))
+    daily_sales.apply_status_change(cursor, order_id, old_status, status)
+
+
+def rollup_rows(conn):
+    return {
+        table: sorted(conn.execute(f"SELECT * FROM {table}").fetchall())
+        for table in ("daily_order_totals", "daily_sales",
+                      "daily_category_sales")
+    }
+
+
+def test_incremental_updates_match_rebuild(conn):
+    first = add_order(conn, "2024-03-01 09:00:00",
+                      [(1, 2, 25000), (2, 1, 30000)])
+    second = add_order(conn, "2024-03-01 15:30:00", [(3, 1, 35000)])
+    third = add_order(conn, "2024-03-02 08:00:00", [(1, 1, 25000)])
+    for order_id in (first, second, third):
+        complete(conn, order_id)
+    # Đơn bị chuyển ngược khỏi trạng thái hoàn thành
+    complete(conn, third, "cancelled")
+
+    incremental = rollup_rows(conn)
+    daily_sales.rebuild(conn)
+    assert incremental == rollup_rows(conn)
+    assert incremental["daily_order_totals"] == [("2024-03-01", 2, 115000.0)]
+    # Hai món cùng danh mục trong một đơn chỉ tính là một đơn
+    assert ("2024-03-01", 1, 3, 80000.0, 1) in incremental["daily_category_sales"]
+
+
+def test_split_range_keeps_partial_days_separate():
+    now = datetime(2024, 3, 10, 14, 0)
+    full, partial = daily_sales.split_range(
+        datetime(2024, 3, 3, 14, 0), now, now)
+
+    assert full == (datetime(2024, 3, 4).date(), datetime(2024, 3, 10).date())
+    assert partial == [(datetime(2024, 3, 3, 14, 0),
+                        datetime(2024, 3, 3, 23, 59, 59))]
+
+
+def test_summary_matches_raw_orders(conn):
+    orders = [
+        ("2024-03-03 10:00:00", [(1, 1, 25000)]),
+        ("2024-03-03 16:00:00", [(3, 2, 35000)]),
+        ("2024-03-05 09:00:00", [(1, 1, 25000), (2, 2, 30000)]),
+        ("2024-03-10 11:00:00", [(2, 1, 30000)]),
+    ]
+    for created_at, lines in orders:
+        complete(conn, add_order(conn, created_at, lines))
+    add_order(conn, "2024-03-05 12:00:00", [(3, 5, 35000)])  # chưa hoàn thành
+
+    now = datetime(2024, 3, 10, 14, 0)
+    summary = daily_sales.load_sales_summary(
+        conn, datetime(2024, 3, 3, 14, 0), now, now)
+
+    # Đơn lúc 10:00 ngày 03/03 nằm ngoài khoảng báo cáo
+    assert summary["total_orders"] == 3
+    assert summary["total_revenue"] == 70000 + 85000 + 30000
+    assert [row[0] for row in summary["daily"]] == [
+        "2024-03-03", "2024-03-05", "2024-03-10"]
+    assert summary["categories"] == [("Cà phê", 2, 115000.0),
+                                     ("Trà", 1, 70000.0)]
+    assert summary["items"][0] == ("Cà phê sữa", 3, 90000.0)
+
+
+def test_migration_backfills_existing_orders():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn, target=2)
+    conn.execute("INSERT INTO menu_items (id, category_id, name, price) "
+                 "VALUES (1, NULL, 'Bánh mì', 20000)")
+    add_order(conn, "2024-01-01 08:00:00", [(1, 3, 20000)], "completed")
+    conn.commit()
+
+    migrate(conn)
+
+    migrated = rollup_rows(conn)
+    daily_sales.rebuild(conn)
+    assert migrated == rollup_rows(conn)
+    assert migrated["daily_sales"] == [("2024-01-01", 1, 0, 3, 60000.0, 1)]
+    conn.close()
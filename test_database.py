@@ -0,0 +1,273 @@
+import sqlite3
+import threading
+
+import pytest
+
+from config import database
+
+
+def test_schema_bootstrap_runs_once(db_path, monkeypatch):
+    calls = []
+    original = database.migrate
+    monkeypatch.setattr(database, "migrate",
+                        lambda conn: calls.append(conn) or original(conn))
+
+    for _ in range(5):
+        conn = database.create_connection()
+        conn.execute("SELECT COUNT(*) FROM users").fetchone()
+        conn.close()
+
+    assert len(calls) == 1
+
+
+def test_same_thread_reuses_connection(db_path):
+    pool = database.get_pool()
+
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+    pool.release(second)
+
+    assert first is second
+
+
+def test_nested_checkout_shares_connection(db_path):
+    outer = database.create_connection()
+    inner = database.create_connection()
+    assert outer._conn is inner._conn
+
+    inner.close()
+    outer.execute("SELECT 1").fetchone()
+    outer.close()
+
+
+def test_nested_checkout_leaves_transaction_to_outermost(db_path):
+    with database.get_connection() as outer:
+        outer.execute("INSERT INTO tables (number, capacity) VALUES (41, 2)")
+        with database.get_connection() as inner:
+            inner.execute("INSERT INTO tables (number, capacity) VALUES (42, 2)")
+        # Lần mượn bên trong không commit thay cho bên ngoài
+        assert outer.in_transaction
+
+        with pytest.raises(ValueError):
+            with database.get_connection() as inner:
+                raise ValueError("lỗi bên trong")
+        # và cũng không rollback mất dữ liệu của bên ngoài
+        assert outer.in_transaction
+
+    with database.get_connection() as conn:
+        assert conn.execute(
+            "SELECT COUNT(*) FROM tables WHERE number IN (41, 42)").fetchone()[0] == 2
+
+
+def test_opening_connection_does_not_block_pool(db_path, monkeypatch):
+    pool = database.ConnectionPool(db_path)
+    opening = threading.Event()
+    finish = threading.Event()
+    original = database.configure_connection
+
+    def slow_configure(conn, pragmas=None):
+        if threading.current_thread() is opener:
+            opening.set()
+            finish.wait(5)
+        original(conn, pragmas)
+
+    monkeypatch.setattr(database, "configure_connection", slow_configure)
+    opener = threading.Thread(target=lambda: pool.release(pool.acquire()))
+    opener.start()
+    assert opening.wait(5)
+
+    # Thread khác vẫn mượn được kết nối trong lúc opener đang mở kết nối
+    def borrow():
+        conn = pool.acquire()
+        conn.execute("SELECT COUNT(*) FROM users").fetchone()
+        pool.release(conn)
+
+    other = threading.Thread(target=borrow)
+    other.start()
+    other.join(2)
+    blocked = other.is_alive()
+    finish.set()
+    opener.join()
+    other.join()
+    pool.close()
+    assert not blocked
+
+
+def test_release_rolls_back_open_transaction(db_path):
+    conn = database.create_connection()
+    conn.execute("INSERT INTO tables (number, capacity) VALUES (99, 2)")
+    conn.close()
+
+    with database.get_connection() as conn:
+        count = conn.execute(
+            "SELECT COUNT(*) FROM tables WHERE number = 99").fetchone()[0]
+    assert count == 0
+
+
+def test_context_manager_commits(db_path):
+    with database.get_connection() as conn:
+        conn.execute("INSERT INTO tables (number, capacity) VALUES (42, 2)")
+
+    with database.get_connection() as conn:
+        count = conn.execute(
+            "SELECT COUNT(*) FROM tables WHERE number = 42").fetchone()[0]
+    assert count == 1
+
+
+def test_pool_is_bounded(db_path):
+    pool = database.ConnectionPool(db_path, max_size=1, timeout=0.05)
+    held = pool.acquire()
+    errors = []
+
+    def borrow():
+        try:
+            pool.acquire()
+        except sqlite3.OperationalError as e:
+            errors.append(e)
+
+    worker = threading.Thread(target=borrow)
+    worker.start()
+    worker.join()
+
+    assert len(errors) == 1
+    pool.release(held)
+    pool.close()
+
+
+def test_migrate_is_noop_once_up_to_date(tmp_path):
+    from config.migrations import LATEST_VERSION, get_version, migrate
+
+    conn = sqlite3.connect(str(tmp_path / "fresh.db"))
+    assert migrate(conn) == list(range(1, LATEST_VERSION + 1))
+    assert get_version(conn) == LATEST_VERSION
+    assert migrate(conn) == []
+
+    admins = conn.execute(
+        "SELECT COUNT(*) FROM users WHERE username = ?",
+        (database.DEFAULT_ADMIN_USERNAME,)).fetchone()[0]
+    assert admins == 1
+    conn.close()
+
+
+def test_migrate_upgrades_legacy_database(tmp_path):
+    from config.migrations import LATEST_VERSION, get_version, migrate
+
+    # Database cũ: đã có bảng và dữ liệu nhưng user_version = 0
+    conn = sqlite3.connect(str(tmp_path / "legacy.db"))
+    conn.execute("""
+        CREATE TABLE tables (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            number INTEGER UNIQUE NOT NULL,
+            capacity INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'available'
+        )
+    """)
+    conn.execute("INSERT INTO tables (number, capacity) VALUES (1, 4)")
+    conn.commit()
+
+    migrate(conn)
+
+    assert get_version(conn) == LATEST_VERSION
+    assert conn.execute("SELECT COUNT(*) FROM tables").fetchone()[0] == 1
+    conn.close()
+
+
+def test_order_revision_increases_on_every_change(tmp_path):
+    from config.migrations import migrate
+
+    conn = sqlite3.connect(str(tmp_path / "revision.db"))
+    migrate(conn)
+    for _ in range(2):
+        conn.execute("""
+            INSERT INTO orders (status, total_amount, created_at)
+            VALUES ('pending', 10000, '2024-03-01 09:00:00')
+        """)
+    conn.execute("UPDATE orders SET status = 'served' WHERE id = 1")
+
+    revisions = dict(conn.execute("SELECT id, revision FROM orders"))
+    assert revisions == {1: 3, 2: 2}
+    # Chỉ đơn vừa đổi nằm sau mốc revision cũ
+    changed = conn.execute(
+        "SELECT id FROM orders WHERE revision > 2").fetchall()
+    assert changed == [(1,)]
+    conn.close()
+
+
+def test_reset_database_seeds_defaults(db_path):
+    database.reset_database()
+
+    with database.get_connection() as conn:
+        users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        tables = conn.execute("SELECT COUNT(*) FROM tables").fetchone()[0]
+    assert users == 1
+    assert tables == 10
+
+
+def test_connections_use_wal_and_pragmas(db_path):
+    with database.get_connection() as conn:
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        temp_store = conn.execute("PRAGMA temp_store").fetchone()[0]
+    assert journal_mode == "wal"
+    assert temp_store == 2  # MEMORY
+
+
+def test_pragmas_can_be_overridden_by_environment(monkeypatch):
+    monkeypatch.setenv("COFFEE_SHOP_SQLITE_SYNCHRONOUS", "FULL")
+    assert database.get_pragmas()["synchronous"] == "FULL"
+
+
+def test_run_write_retries_while_database_is_locked(db_path, monkeypatch):
+    monkeypatch.setattr(database, "BUSY_TIMEOUT", 0)
+    database.init_db()
+
+    # Một "cửa sổ" khác giữ khóa ghi trong thời gian ngắn
+    locker = sqlite3.connect(db_path, check_same_thread=False)
+    locker.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.2, locker.commit).start()
+
+    def write(conn):
+        conn.execute("INSERT INTO tables (number, capacity) VALUES (77, 2)")
+        return "ok"
+
+    assert database.run_write(write, retries=8, backoff=0.02) == "ok"
+    locker.close()
+
+    with database.get_connection() as conn:
+        count = conn.execute(
+            "SELECT COUNT(*) FROM tables WHERE number = 77").fetchone()[0]
+    assert count == 1
+
+
+def test_nested_run_write_leaves_retry_to_outer_transaction(db_path, monkeypatch):
+    monkeypatch.setattr(database, "BUSY_BACKOFF", 0)
+    database.init_db()
+    calls = []
+
+    def inner(conn):
+        conn.execute("INSERT INTO tables (number, capacity) VALUES (?, 2)",
+                     (len(calls) + 80,))
+        calls.append(1)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+
+    # Lỗi khóa ở lần gọi lồng bên trong: chỉ transaction ngoài cùng được
+    # rollback rồi chạy lại, không ghi trùng
+    database.run_write(lambda conn: database.run_write(inner, retries=3), retries=3)
+
+    assert len(calls) == 2
+    with database.get_connection() as conn:
+        assert conn.execute(
+            "SELECT number FROM tables WHERE number >= 80").fetchall() == [(81,)]
+
+
+def test_run_write_gives_up_on_other_errors(db_path):
+    calls = []
+
+    def write(conn):
+        calls.append(1)
+        conn.execute("INSERT INTO missing_table VALUES (1)")
+
+    with pytest.raises(sqlite3.OperationalError):
+        database.run_write(write)
+    assert len(calls) == 1
@@ -0,0 +1,94 @@
+import pytest
+
+from models.inventory_history import build_history_query, fetch_history_page
+
+
+@pytest.fixture
+def conn(conn):
+    conn.executescript("""
+        INSERT INTO inventory (id, name, quantity, unit)
+        VALUES (1, 'Cà phê hạt', 10, 'kg'), (2, 'Sữa tươi', 20, 'l');
+    """)
+    rows = []
+    for i in range(25):
+        # Nhiều dòng cùng thời điểm để kiểm tra phân trang khi timestamp trùng
+        rows.append((1 + i % 2, "import" if i % 3 else "export", i + 1,
+                     1000, "Trung Nguyên" if i % 4 == 0 else "Vinamilk",
+                     f"2024-03-{1 + i // 5:02d} 08:00:00"))
+    conn.executemany("""
+        INSERT INTO inventory_history
+            (inventory_id, type, quantity, price, supplier, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, rows)
+    return conn
+
+
+def fetch_all(conn, limit, **filters):
+    rows = []
+    after = None
+    while True:
+        page = fetch_history_page(conn, after=after, limit=limit, **filters)
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        after = (page[-1][1], page[-1][0])
+
+
+def expected(conn, where="1", params=()):
+    return conn.execute(f"""
+        SELECT h.id, h.timestamp, h.type, i.name, h.quantity, h.price,
+               h.supplier, h.note
+        FROM inventory_history h
+        JOIN inventory i ON h.inventory_id = i.id
+        WHERE {where}
+        ORDER BY h.timestamp DESC, h.id DESC
+    """, params).fetchall()
+
+
+@pytest.mark.parametrize("limit", [1, 4, 7, 100])
+def test_pages_cover_history_without_gaps(conn, limit):
+    assert fetch_all(conn, limit) == expected(conn)
+
+
+def test_filters_are_applied_in_sql(conn):
+    rows = fetch_all(conn, 3, inventory_id=2, history_type="import",
+                     supplier="vina", start="2024-03-02 00:00:00",
+                     end="2024-03-04 23:59:59")
+    assert rows == expected(conn, """
+        h.inventory_id = 2 AND h.type = 'import'
+        AND h.supplier = 'Vinamilk'
+        AND h.timestamp BETWEEN '2024-03-02' AND '2024-03-04 23:59:59'
+    """)
+    assert rows
+
+
+def test_before_returns_rows_added_after_first_page(conn):
+    first_page = fetch_history_page(conn, limit=5)
+    conn.executemany("""
+        INSERT INTO inventory_history (inventory_id, type, quantity, timestamp)
+        VALUES (?, 'import', 1, ?)
+    """, [(1, "2024-03-05 08:00:00"), (2, "2024-03-06 09:00:00")])
+
+    before = (first_page[0][1], first_page[0][0])
+    newer = fetch_history_page(conn, before=before)
+    assert newer + first_page == expected(conn)[:7]
+    assert fetch_history_page(conn, before=before, inventory_id=1) == \
+        expected(conn, "h.id = 26")
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"after": ("2024-03-03 08:00:00", 12)},
+    {"inventory_id": 1, "after": ("2024-03-03 08:00:00", 12)},
+    {"before": ("2024-03-03 08:00:00", 12)},
+    {"history_type": "export", "start": "2024-03-01 00:00:00",
+     "end": "2024-03-02 23:59:59"},
+])
+def test_history_query_uses_index(conn, filters):
+    sql, params = build_history_query(**filters)
+    plan = [row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN " + sql + " LIMIT 10", params)]
+
+    assert not [step for step in plan
+                if step.startswith("SCAN") and " USING " not in step], plan
+    assert not [step for step in plan if "TEMP B-TREE" in step], plan
@@ -0,0 +1,41 @@
+import pytest
+
+from models.menu_catalog import diff_items, load_recommendable_items
+
+
+@pytest.fixture
+def conn(conn):
+    conn.executescript("""
+        INSERT INTO categories (id, name) VALUES (1, 'Cà phê'), (2, 'Trà');
+        INSERT INTO menu_items (id, category_id, name, description, price, status)
+        VALUES (1, 1, 'Cà phê sữa', 'Cà phê pha với sữa đặc', 30000, 'available'),
+               (2, 2, 'Trà đào', 'Trà đen với đào tươi', 35000, 'available'),
+               (3, 2, 'Trà vải', 'Trà với vải', 35000, 'out_of_stock'),
+               (4, 1, 'Bạc xỉu', NULL, 32000, 'discontinued');
+    """)
+    return conn
+
+
+def hashes(items):
+    return {item_id: item["hash"] for item_id, item in items.items()}
+
+
+def test_only_available_items_are_recommendable(conn):
+    items = load_recommendable_items(conn)
+
+    assert sorted(items) == [1, 2]
+    assert items[1]["category"] == "Cà phê"
+    assert items[2]["price"] == 35000
+
+
+def test_diff_reports_only_changed_items(conn):
+    known = hashes(load_recommendable_items(conn))
+    assert diff_items(known, load_recommendable_items(conn)) == ([], [])
+
+    conn.execute("UPDATE menu_items SET price = 32000 WHERE id = 1")
+    conn.execute("UPDATE menu_items SET status = 'out_of_stock' WHERE id = 2")
+    conn.execute("UPDATE menu_items SET status = 'available' WHERE id = 3")
+
+    changed, removed = diff_items(known, load_recommendable_items(conn))
+    assert sorted(changed) == [1, 3]
+    assert removed == [2]
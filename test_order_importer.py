@@ -0,0 +1,106 @@
+import pytest
+
+from utils.order_importer import import_order_history
+
+ORDERS = (
+    "order_ref,table_number,username,status,total_amount,created_at\n"
+    "A-1,1,khach1,completed,55000,2023-05-01 08:15:00\n"
+    "A-2,2,,completed,,2023-05-01T19:40:00\n"
+    "A-3,,khach1,cancelled,30000,2023-05-02 10:00:00\n"
+)
+
+ITEMS = (
+    "order_ref,menu_item,quantity,price\n"
+    "A-1,Cà phê đen,1,25000\n"
+    "A-1,Cà phê sữa,1,30000\n"
+    "A-2,Trà đào,2,35000\n"
+    "A-3,Cà phê sữa,1,30000\n"
+)
+
+
+@pytest.fixture
+def conn(conn):
+    conn.executescript("""
+        INSERT INTO categories (id, name) VALUES (1, 'Cà phê'), (2, 'Trà');
+        INSERT INTO menu_items (id, category_id, name, price)
+        VALUES (1, 1, 'Cà phê đen', 25000),
+               (2, 1, 'Cà phê sữa', 30000),
+               (3, 2, 'Trà đào', 35000);
+        INSERT INTO tables (number, capacity, status)
+        VALUES (1, 4, 'available'), (2, 4, 'available');
+        INSERT INTO users (username, password, role) VALUES ('khach1', 'x', 'customer');
+        INSERT INTO orders (status, total_amount, created_at)
+        VALUES ('completed', 10000, '2023-04-30 12:00:00');
+    """)
+    return conn
+
+
+def test_orders_and_items_are_linked_by_reference(conn, write_csv):
+    result, days = import_order_history(
+        write_csv("orders.csv", ORDERS),
+        write_csv("items.csv", ITEMS), conn, batch_size=2)
+
+    assert result.rows == 7
+    orders = conn.execute("""
+        SELECT o.id, t.number, u.username, o.status, o.total_amount, o.created_at
+        FROM orders o
+        LEFT JOIN tables t ON t.id = o.table_id
+        LEFT JOIN users u ON u.id = o.user_id
+        WHERE o.id > 1 ORDER BY o.id
+    """).fetchall()
+    assert orders == [
+        (2, 1, "khach1", "completed", 55000, "2023-05-01 08:15:00"),
+        # Tổng tiền để trống được tính từ chi tiết đơn
+        (3, 2, None, "completed", 70000, "2023-05-01 19:40:00"),
+        (4, None, "khach1", "cancelled", 30000, "2023-05-02 10:00:00"),
+    ]
+    assert conn.execute(
+        "SELECT order_id, COUNT(*) FROM order_items GROUP BY order_id").fetchall() == \
+        [(2, 2), (3, 1), (4, 1)]
+
+    # Bảng tổng hợp chỉ được tính lại cho các ngày vừa import
+    assert days == 1
+    assert conn.execute(
+        "SELECT day, order_count, revenue FROM daily_order_totals").fetchall() == \
+        [("2023-05-01", 2, 125000)]
+    assert conn.execute("""
+        SELECT menu_item_id, quantity FROM daily_sales ORDER BY menu_item_id
+    """).fetchall() == [(1, 1), (2, 1), (3, 2)]
+    assert conn.execute(
+        "SELECT name FROM sqlite_temp_master WHERE name = 'import_order_refs'"
+    ).fetchone() is None
+
+
+def test_unknown_menu_item_reports_line(conn, write_csv):
+    items = ITEMS + "A-2,Bạc xỉu,1,29000\n"
+
+    with pytest.raises(ValueError, match="Dòng 6.*Bạc xỉu"):
+        import_order_history(write_csv("orders.csv", ORDERS),
+                             write_csv("items.csv", items), conn)
+
+
+def test_duplicated_menu_name_reports_line(conn, write_csv):
+    conn.execute("""
+        INSERT INTO menu_items (category_id, name, price) VALUES (2, 'Trà đào', 40000)
+    """)
+
+    with pytest.raises(ValueError, match="Dòng 4.*nhiều món cùng tên 'Trà đào'"):
+        import_order_history(write_csv("orders.csv", ORDERS),
+                             write_csv("items.csv", ITEMS), conn)
+    assert conn.execute("SELECT COUNT(*) FROM order_items").fetchone()[0] == 0
+
+
+def test_item_without_order_is_rejected(conn, write_csv):
+    items = ITEMS + "A-9,Trà đào,1,35000\n"
+
+    with pytest.raises(ValueError, match="order_ref"):
+        import_order_history(write_csv("orders.csv", ORDERS),
+                             write_csv("items.csv", items), conn)
+
+
+def test_duplicate_reference_is_rejected(conn, write_csv):
+    orders = ORDERS + "A-1,1,,completed,1000,2023-05-03 08:00:00\n"
+
+    with pytest.raises(ValueError, match="trùng"):
+        import_order_history(write_csv("orders.csv", orders),
+                             write_csv("items.csv", ITEMS), conn)
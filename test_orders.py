@@ -0,0 +1,94 @@
+import sqlite3
+from datetime import datetime
+
+from config.migrations import migrate
+from models import orders, queries
+from utils.synthetic_data import generate_dataset
+
+
+def test_order_lifecycle_updates_table_and_daily_sales(conn):
+    conn.executescript("""
+        INSERT INTO categories (id, name) VALUES (1, 'Cà phê');
+        INSERT INTO menu_items (id, category_id, name, price)
+        VALUES (1, 1, 'Cà phê đen', 25000), (2, 1, 'Cà phê sữa', 30000);
+        INSERT INTO tables (id, number, capacity, status) VALUES (1, 1, 4, 'available');
+        INSERT INTO users (username, password, role) VALUES ('khach1', 'x', 'customer');
+    """)
+    items = [{"product_id": 1, "quantity": 2, "price": 25000},
+             {"product_id": 2, "quantity": 1, "price": 30000}]
+
+    user_id = conn.execute("SELECT id FROM users WHERE username = 'khach1'").fetchone()[0]
+
+    order_id = orders.create_order(conn, user_id, 1, items, "2024-03-01 09:30:00")
+
+    assert conn.execute(
+        "SELECT status, total_amount FROM orders WHERE id = ?", (order_id,)
+    ).fetchone() == ("pending", 80000)
+    assert conn.execute("SELECT COUNT(*) FROM order_items").fetchone()[0] == 2
+    assert conn.execute("SELECT status FROM tables").fetchone()[0] == "occupied"
+
+    # Bàn đang có khách thì không tạo thêm đơn
+    assert orders.create_order(conn, user_id, 1, items) is None
+    assert conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 1
+
+    assert orders.update_order_status(conn, order_id, "preparing") == "pending"
+    assert orders.update_order_status(conn, order_id, "completed") == "preparing"
+    assert conn.execute("SELECT status FROM tables").fetchone()[0] == "available"
+    assert conn.execute(
+        "SELECT day, order_count, revenue FROM daily_order_totals").fetchall() == \
+        [("2024-03-01", 1, 80000)]
+
+
+def test_synthetic_dataset_is_consistent(conn):
+    end = datetime(2024, 3, 31)
+    counts = generate_dataset(conn, tables=5, menu_items=12, customers=20,
+                              orders=3000, days=30, seed=7, end=end)
+
+    assert counts["orders"] == conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+    assert counts["order_items"] == \
+        conn.execute("SELECT COUNT(*) FROM order_items").fetchone()[0]
+    # Tổng tiền mỗi đơn khớp với chi tiết đơn
+    assert conn.execute("""
+        SELECT COUNT(*) FROM orders o
+        WHERE total_amount != (SELECT SUM(quantity * price) FROM order_items
+                               WHERE order_id = o.id)
+    """).fetchone()[0] == 0
+    # Chỉ đơn của ngày cuối còn đang xử lý, và đơn nằm trong giờ mở cửa
+    assert conn.execute("""
+        SELECT COUNT(*) FROM orders
+        WHERE status NOT IN ('completed', 'cancelled') AND created_at < '2024-03-31'
+    """).fetchone()[0] == 0
+    hours = {row[0] for row in conn.execute(
+        "SELECT DISTINCT CAST(strftime('%H', created_at) AS INTEGER) FROM orders")}
+    assert hours <= set(range(7, 23))
+    # Bảng tổng hợp khớp với truy vấn trực tiếp
+    assert conn.execute(
+        "SELECT SUM(revenue) FROM daily_order_totals").fetchone()[0] == \
+        conn.execute(
+            "SELECT SUM(total_amount) FROM orders WHERE status = 'completed'"
+        ).fetchone()[0]
+
+    # Cùng seed cho ra cùng dữ liệu
+    other = sqlite3.connect(":memory:")
+    migrate(other)
+    generate_dataset(other, tables=5, menu_items=12, customers=20,
+                     orders=3000, days=30, seed=7, end=end)
+    query = "SELECT user_id, table_id, status, total_amount, created_at FROM orders"
+    assert other.execute(query).fetchall() == conn.execute(query).fetchall()
+    other.close()
+
+
+def test_order_lists_break_created_at_ties_by_id(conn):
+    # Nhiều máy ghi đơn trong cùng một giây
+    conn.executescript("""
+        INSERT INTO users (username, password, role) VALUES ('khach1', 'x', 'customer');
+        INSERT INTO orders (user_id, status, total_amount, created_at)
+        SELECT (SELECT id FROM users WHERE username = 'khach1'), 'pending', 25000,
+               '2024-03-01 09:30:00'
+        FROM (SELECT 1 UNION ALL SELECT 2 UNION ALL SELECT 3 UNION ALL SELECT 4);
+    """)
+    user_id = conn.execute("SELECT id FROM users WHERE username = 'khach1'").fetchone()[0]
+    ids = [row[0] for row in conn.execute("SELECT id FROM orders ORDER BY id DESC")]
+
+    assert [row[0] for row in conn.execute(queries.STAFF_ORDERS)] == ids
+    assert [row[0] for row in conn.execute(queries.USER_ORDERS, (user_id,))] == ids
@@ -0,0 +1,34 @@
+import pytest
+
+from models import queries
+
+SHIPPED_QUERIES = {
+    name: sql for name, sql in vars(queries).items()
+    if name.isupper() and isinstance(sql, str)
+}
+
+
+def test_module_exposes_queries():
+    assert SHIPPED_QUERIES
+
+
+@pytest.mark.parametrize("name", sorted(SHIPPED_QUERIES))
+def test_query_uses_index(conn, name):
+    sql = SHIPPED_QUERIES[name]
+    params = (None,) * sql.count("?")
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+    # Mọi lần truy cập bảng phải qua index hoặc khóa chính, không quét toàn bảng
+    full_scans = [step for step in plan
+                  if step.startswith("SCAN") and " USING " not in step]
+    assert not full_scans, f"{name} quét toàn bảng: {plan}"
+
+
+@pytest.mark.parametrize("name", ["STAFF_ORDERS", "USER_ORDERS"])
+def test_order_lists_read_index_order(conn, name):
+    sql = SHIPPED_QUERIES[name]
+    plan = [row[3] for row in conn.execute(
+        "EXPLAIN QUERY PLAN " + sql, (None,) * sql.count("?"))]
+
+    # Thứ tự (created_at, id) lấy sẵn từ index, không sắp xếp lại
+    assert not any("TEMP B-TREE" in step for step in plan), plan
@@ -0,0 +1,79 @@
+from utils.response_cache import ResponseCache, normalize_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_key_ignores_case_accents_and_punctuation():
+    assert normalize_key("Giá Cappuccino bao nhiêu?") == \
+        normalize_key("gia cappuccino  bao nhieu")
+    assert normalize_key("Có món gì ngọt không") == "co mon gi ngot khong"
+    assert normalize_key("Đồ uống") == "do uong"
+
+
+def test_hits_and_misses_are_counted():
+    cache = ResponseCache()
+    assert cache.get("có món gì ngọt không") is None
+    cache.put("có món gì ngọt không", "Có sinh tố xoài ạ")
+
+    assert cache.get("Có món gì ngọt không?") == "Có sinh tố xoài ạ"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_size=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = ResponseCache(ttl=60, clock=clock)
+    cache.put("giá latte", "35.000 VNĐ")
+    clock.now += 59
+    assert cache.get("giá latte") == "35.000 VNĐ"
+    clock.now += 2
+    assert cache.get("giá latte") is None
+
+
+def test_near_duplicate_lookup():
+    def find_similar(question, questions):
+        return 0 if "cappuccino" in question else None
+
+    cache = ResponseCache(find_similar=find_similar)
+    cache.put("giá cappuccino", "45.000 VNĐ")
+
+    assert cache.get("cappuccino giá bao nhiêu") == "45.000 VNĐ"
+    assert cache.get("giá latte") is None
+    assert cache.stats()["near_hits"] == 1
+
+
+def test_cache_is_persisted(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = ResponseCache(path)
+    cache.put("giờ mở cửa", "7h - 22h")
+
+    reloaded = ResponseCache(path)
+    assert reloaded.get("Giờ mở cửa?") == "7h - 22h"
+
+
+def test_expired_entries_are_dropped_on_load(tmp_path):
+    path = str(tmp_path / "cache.json")
+    clock = FakeClock()
+    ResponseCache(path, clock=clock).put("wifi", "coffee123")
+
+    clock.now += 120
+    assert ResponseCache(path, ttl=60, clock=clock).stats()["size"] == 0
@@ -0,0 +1,67 @@
+"""Đo hiệu năng các service trên database trong bộ nhớ (cần pytest-benchmark).
+
+    python -m pytest test_service_benchmarks.py --benchmark-json=ket_qua.json
+"""
+import itertools
+from datetime import datetime
+
+import pytest
+
+from controllers import account_service, inventory_service, order_service
+from utils.synthetic_data import generate_dataset
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture
+def conn(conn):
+    generate_dataset(conn, tables=20, menu_items=60, customers=200,
+                     orders=20000, days=90, end=datetime(2024, 3, 31))
+    conn.execute("""
+        INSERT INTO inventory (name, quantity, unit, threshold)
+        VALUES ('Cà phê hạt', 0, 'gram', 100)
+    """)
+    conn.commit()
+    return conn
+
+
+@pytest.mark.parametrize("with_recipes", [True, False])
+def test_place_order(benchmark, conn, with_recipes):
+    if not with_recipes:
+        conn.execute("DELETE FROM recipes")
+    table_id = conn.execute("SELECT MIN(id) FROM tables").fetchone()[0]
+    items = [{"product_id": item_id, "quantity": 1, "price": price}
+             for item_id, price in conn.execute(
+                 "SELECT id, price FROM menu_items LIMIT 3")]
+
+    def free_table():
+        conn.execute("UPDATE tables SET status = 'available' WHERE id = ?", (table_id,))
+
+    benchmark.pedantic(order_service.place_order, (conn, None, table_id, items),
+                       setup=free_table, rounds=2000)
+
+
+def test_change_order_status(benchmark, conn):
+    order_ids = itertools.cycle(row[0] for row in conn.execute(
+        "SELECT id FROM orders WHERE status = 'completed' LIMIT 1000").fetchall())
+    statuses = itertools.cycle(["cancelled", "completed"])
+
+    benchmark(lambda: order_service.change_order_status(
+        conn, next(order_ids), next(statuses)))
+
+
+def test_import_stock(benchmark, conn):
+    item_id = conn.execute("SELECT id FROM inventory").fetchone()[0]
+
+    benchmark(inventory_service.import_stock, conn, item_id, 100, 50000,
+              "Nhà cung cấp", None)
+
+
+def test_register(benchmark, conn):
+    numbers = itertools.count()
+
+    def register():
+        i = next(numbers)
+        account_service.register(conn, f"khach_{i}", "123", f"khach_{i}@gmail.com")
+
+    benchmark(register)
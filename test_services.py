@@ -0,0 +1,312 @@
+import sqlite3
+import threading
+
+import pytest
+
+from config import database
+from controllers import account_service, inventory_service, order_service
+from models import inventory, menu_availability, queries
+
+
+@pytest.fixture
+def conn(conn):
+    conn.executescript("""
+        INSERT INTO categories (id, name) VALUES (1, 'Cà phê');
+        INSERT INTO menu_items (id, category_id, name, price)
+        VALUES (1, 1, 'Cà phê đen', 25000), (2, 1, 'Cà phê sữa', 30000);
+        INSERT INTO tables (id, number, capacity, status) VALUES (1, 1, 4, 'available');
+        INSERT INTO inventory (id, name, quantity, unit, threshold)
+        VALUES (1, 'Cà phê hạt', 500, 'gram', 100);
+    """)
+    return conn
+
+
+ITEMS = [{"product_id": 1, "quantity": 2, "price": 25000}]
+
+
+def test_place_order_and_change_status(conn):
+    commit = order_service.place_order(conn, None, 1, ITEMS)
+
+    assert commit.total_amount == 50000
+    assert order_service.change_order_status(conn, commit.order_id, "completed") == "pending"
+    assert conn.execute("SELECT status FROM tables").fetchone()[0] == "available"
+
+
+@pytest.mark.parametrize("table_id, items, message", [
+    (1, [], "thêm sản phẩm"),
+    (None, ITEMS, "chọn bàn"),
+    (1, [{"product_id": 1, "quantity": 0, "price": 25000}], "lớn hơn 0"),
+])
+def test_place_order_rejects_invalid_input(conn, table_id, items, message):
+    with pytest.raises(ValueError, match=message):
+        order_service.place_order(conn, None, table_id, items)
+    assert conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 0
+
+
+def test_change_status_of_missing_order(conn):
+    with pytest.raises(ValueError, match="Không tìm thấy"):
+        order_service.change_order_status(conn, 99, "completed")
+    with pytest.raises(ValueError, match="không hợp lệ"):
+        order_service.change_order_status(conn, 99, "done")
+
+
+def test_import_stock_updates_quantity_and_history(conn):
+    inventory_service.import_stock(conn, 1, 250, 120000, "Trung Nguyên", "Lô mới")
+
+    assert conn.execute("SELECT quantity FROM inventory").fetchone()[0] == 750
+    assert conn.execute(
+        "SELECT type, quantity, price, supplier FROM inventory_history"
+    ).fetchall() == [("import", 250, 120000, "Trung Nguyên")]
+
+    with pytest.raises(ValueError, match="Không tìm thấy"):
+        inventory_service.import_stock(conn, 99, 10, 1000)
+    with pytest.raises(ValueError, match="lớn hơn 0"):
+        inventory_service.import_stock(conn, 1, 0, 1000)
+
+
+def test_add_and_delete_item(conn):
+    change = inventory_service.add_item(conn, "Sữa tươi", 5, "l", 10)
+
+    assert change == inventory.StockChange(
+        change.inventory_id, "Sữa tươi", 5, 10, inventory.STOCK_LOW, None)
+    assert inventory.level_alerts([change._asdict()]) == [change._asdict()]
+    with pytest.raises(ValueError, match="tên nguyên liệu"):
+        inventory_service.add_item(conn, "", 5, "l", 10)
+
+    inventory_service.import_stock(conn, change.inventory_id, 20, 1000)
+    conn.execute("INSERT INTO recipes (menu_item_id, inventory_id, quantity) VALUES (2, ?, 50)",
+                 (change.inventory_id,))
+    menu_availability.refresh_all(conn)
+    assert conn.execute("SELECT status FROM menu_items WHERE id = 2").fetchone()[0] == \
+        "out_of_stock"
+
+    # Món chỉ thiếu nguyên liệu vừa xóa được bán lại
+    assert inventory_service.delete_item(conn, change.inventory_id) == [
+        menu_availability.MenuChange(2, "Cà phê sữa", 30000, "available")]
+    assert conn.execute("SELECT id FROM inventory").fetchall() == [(1,)]
+    assert conn.execute("SELECT COUNT(*) FROM inventory_history").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM recipes").fetchone()[0] == 0
+    with pytest.raises(ValueError, match="Không tìm thấy"):
+        inventory_service.delete_item(conn, change.inventory_id)
+
+
+def test_register_creates_profile_by_role(conn):
+    customer_id = account_service.register(conn, "khach1", "123", "khach1@gmail.com")
+    staff_id = account_service.register(
+        conn, "nv1", "123", "nv1@gmail.com", "0901234567", role="staff")
+
+    assert conn.execute(
+        "SELECT name FROM customers WHERE user_id = ?", (customer_id,)).fetchone() == ("khach1",)
+    assert conn.execute(
+        "SELECT name, position FROM employees WHERE user_id = ?", (staff_id,)
+    ).fetchone() == ("nv1", account_service.NEW_EMPLOYEE_POSITION)
+    assert conn.execute(
+        "SELECT password FROM users WHERE id = ?", (customer_id,)
+    ).fetchone()[0] == account_service.hash_password("123")
+
+    with pytest.raises(ValueError, match="đã tồn tại"):
+        account_service.register(conn, "khach2", "123", "khach1@gmail.com")
+
+
+@pytest.mark.parametrize("email, phone, message", [
+    ("", "", "bắt buộc"),
+    ("khong-hop-le", "", "Email"),
+    ("a@gmail.com", "12345", "Số điện thoại"),
+])
+def test_account_validation(conn, email, phone, message):
+    with pytest.raises(ValueError, match=message):
+        account_service.add_employee(conn, "nv2", "123", "Nhân viên 2", email, phone)
+    assert conn.execute(
+        "SELECT COUNT(*) FROM users WHERE username = 'nv2'").fetchone()[0] == 0
+
+
+def test_add_employee_stores_profile(conn):
+    user_id = account_service.add_employee(
+        conn, "nv3", "123", "Nguyễn Văn A", "nv3@gmail.com", "0912345678",
+        "Pha chế", 7000000)
+
+    assert conn.execute("SELECT role FROM users WHERE id = ?", (user_id,)).fetchone() == ("staff",)
+    assert conn.execute(
+        "SELECT name, position, salary FROM employees WHERE user_id = ?", (user_id,)
+    ).fetchone() == ("Nguyễn Văn A", "Pha chế", 7000000)
+
+
+def test_commit_order_reports_timing(conn):
+    commit = order_service.commit_order(None, 1, ITEMS, conn=conn)
+
+    assert commit.total_amount == 50000
+    assert commit.seconds >= 0
+    assert conn.execute(
+        "SELECT total_amount FROM orders WHERE id = ?", (commit.order_id,)
+    ).fetchone() == (50000,)
+
+    with pytest.raises(ValueError, match="Bàn đã có khách"):
+        order_service.commit_order(None, 1, ITEMS, conn=conn)
+
+
+def test_two_tills_cannot_seat_the_same_table(db_path):
+    database.run_write(lambda conn: conn.executescript("""
+        INSERT INTO categories (id, name) VALUES (1, 'Cà phê');
+        INSERT INTO menu_items (id, category_id, name, price) VALUES (1, 1, 'Cà phê đen', 25000);
+        INSERT INTO tables (id, number, capacity, status) VALUES (1, 1, 4, 'available');
+    """))
+    barrier = threading.Barrier(4)
+    outcomes = []
+
+    def till():
+        barrier.wait()
+        try:
+            outcomes.append(order_service.commit_order(None, 1, ITEMS).order_id)
+        except ValueError:
+            outcomes.append(None)
+
+    threads = [threading.Thread(target=till) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(outcomes) == 4 and outcomes.count(None) == 3
+    check = sqlite3.connect(db_path)
+    assert check.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 1
+    assert check.execute("SELECT COUNT(*) FROM order_items").fetchone()[0] == 1
+    check.close()
+
+
+def test_order_deducts_stock_by_recipe(conn):
+    conn.executescript("""
+        INSERT INTO inventory (id, name, quantity, unit, threshold)
+        VALUES (2, 'Sữa tươi', 1000, 'ml', 200);
+        INSERT INTO recipes (menu_item_id, inventory_id, quantity)
+        VALUES (1, 1, 20), (2, 1, 20), (2, 2, 40);
+    """)
+    items = ITEMS + [{"product_id": 2, "quantity": 3, "price": 30000}]
+
+    commit = order_service.place_order(conn, None, 1, items, "2024-03-01 09:30:00")
+    order_id = commit.order_id
+
+    assert conn.execute("SELECT id, quantity FROM inventory ORDER BY id").fetchall() == \
+        [(1, 400), (2, 880)]
+    # Số lượng mới được trả về dù chưa nguyên liệu nào đổi mức
+    assert [(change.inventory_id, change.quantity) for change in commit.stock_changes] == \
+        [(1, 400), (2, 880)]
+    assert inventory.level_alerts(
+        [change._asdict() for change in commit.stock_changes]) == []
+    # Mỗi nguyên liệu một dòng xuất kho cho cả đơn
+    assert conn.execute("""
+        SELECT inventory_id, type, quantity, note, timestamp
+        FROM inventory_history ORDER BY inventory_id
+    """).fetchall() == [
+        (1, "export", 100, f"Đơn hàng #{order_id}", "2024-03-01 09:30:00"),
+        (2, "export", 120, f"Đơn hàng #{order_id}", "2024-03-01 09:30:00"),
+    ]
+
+
+def test_fractional_recipe_is_rounded_per_order(conn):
+    conn.executescript("""
+        INSERT INTO inventory (id, name, quantity, unit, threshold)
+        VALUES (2, 'Muối', 100, 'gram', 10);
+        INSERT INTO recipes (menu_item_id, inventory_id, quantity)
+        VALUES (1, 1, 7.4), (1, 2, 0.2);
+    """)
+
+    order_service.place_order(conn, None, 1, ITEMS)
+
+    # 2 ly: 14.8 gram hạt làm tròn thành 15, 0.4 gram muối làm tròn về 0
+    assert conn.execute(
+        "SELECT id, quantity, typeof(quantity) FROM inventory ORDER BY id"
+    ).fetchall() == [(1, 485, "integer"), (2, 100, "integer")]
+    assert conn.execute(
+        "SELECT inventory_id, quantity, typeof(quantity) FROM inventory_history"
+    ).fetchall() == [(1, 15, "integer")]
+
+
+def test_order_without_recipes_leaves_stock(conn):
+    order_service.place_order(conn, None, 1, ITEMS)
+
+    assert conn.execute("SELECT quantity FROM inventory").fetchone()[0] == 500
+    assert conn.execute("SELECT COUNT(*) FROM inventory_history").fetchone()[0] == 0
+
+
+def test_stock_alerts_when_crossing_threshold(conn):
+    conn.execute("INSERT INTO recipes (menu_item_id, inventory_id, quantity) VALUES (1, 1, 100)")
+
+    def levels(changes):
+        return [(change.quantity, change.previous_level, change.level)
+                for change in changes]
+
+    # 500 -> 300: vẫn trên ngưỡng 100
+    changes = order_service.place_order(conn, None, 1, ITEMS).stock_changes
+    assert levels(changes) == [(300, inventory.STOCK_OK, inventory.STOCK_OK)]
+    conn.execute("UPDATE tables SET status = 'available'")
+
+    # 300 -> 100: sắp hết
+    changes = order_service.place_order(conn, None, 1, ITEMS).stock_changes
+    assert changes == [inventory.StockChange(
+        1, "Cà phê hạt", 100, 100, inventory.STOCK_LOW, inventory.STOCK_OK)]
+    conn.execute("UPDATE tables SET status = 'available'")
+
+    # 100 -> -100: hết hàng
+    changes = order_service.place_order(conn, None, 1, ITEMS).stock_changes
+    assert levels(changes) == [(-100, inventory.STOCK_LOW, inventory.STOCK_OUT)]
+    assert conn.execute(queries.LOW_STOCK_ITEMS).fetchall() == \
+        [(1, "Cà phê hạt", -100, "gram", 100)]
+
+    # Nhập thêm 150: còn 50, từ hết hàng về sắp hết; thêm 100 nữa thì đủ hàng
+    changes = inventory_service.import_stock(conn, 1, 150, 1000).stock_changes
+    assert levels(changes) == [(50, inventory.STOCK_OUT, inventory.STOCK_LOW)]
+    changes = inventory_service.import_stock(conn, 1, 100, 1000).stock_changes
+    assert levels(changes) == [(150, inventory.STOCK_LOW, inventory.STOCK_OK)]
+    assert conn.execute(queries.LOW_STOCK_ITEMS).fetchall() == []
+    changes = inventory_service.import_stock(conn, 1, 100, 1000).stock_changes
+    assert inventory.level_alerts([change._asdict() for change in changes]) == []
+
+
+def test_alert_message_from_event_payload():
+    alert = inventory.StockChange(
+        2, "Sữa tươi", 800, 1000, inventory.STOCK_LOW, inventory.STOCK_OK)
+
+    assert inventory.format_alert(alert._asdict()) == "Sữa tươi: Sắp hết (800/1000)"
+
+
+def test_menu_availability_follows_stock(conn):
+    conn.executescript("""
+        INSERT INTO inventory (id, name, quantity, unit, threshold)
+        VALUES (2, 'Sữa tươi', 1000, 'ml', 200);
+        INSERT INTO menu_items (id, category_id, name, price, status)
+        VALUES (3, 1, 'Bạc xỉu', 35000, 'available'),
+               (4, 1, 'Cà phê muối', 40000, 'discontinued'),
+               (5, 1, 'Nước suối', 10000, 'out_of_stock');
+        INSERT INTO recipes (menu_item_id, inventory_id, quantity)
+        VALUES (1, 1, 200), (2, 1, 20), (2, 2, 40), (3, 2, 100), (4, 1, 20);
+    """)
+    status = "SELECT id, status FROM menu_items ORDER BY id"
+
+    # 500 -> 100: không đủ cho một ly cà phê đen, cà phê sữa vẫn đủ
+    commit = order_service.place_order(conn, None, 1, ITEMS)
+    assert commit.menu_changes == [
+        menu_availability.MenuChange(1, "Cà phê đen", 25000, "out_of_stock")]
+    # Món ngừng bán và món không có công thức giữ nguyên
+    assert conn.execute(status).fetchall() == [
+        (1, "out_of_stock"), (2, "available"), (3, "available"),
+        (4, "discontinued"), (5, "out_of_stock")]
+
+    # Nhập thêm hạt thì cà phê đen bán lại được, chỉ tính lại món dùng hạt
+    result = inventory_service.import_stock(conn, 1, 100, 1000)
+    assert result.menu_changes == [
+        menu_availability.MenuChange(1, "Cà phê đen", 25000, "available")]
+    assert inventory_service.import_stock(conn, 1, 100, 1000).menu_changes == []
+
+
+def test_menu_availability_refresh_all(conn):
+    conn.executescript("""
+        INSERT INTO recipes (menu_item_id, inventory_id, quantity)
+        VALUES (1, 1, 600), (2, 1, 20);
+        UPDATE menu_items SET status = 'out_of_stock' WHERE id = 2;
+    """)
+
+    changes = menu_availability.refresh_all(conn)
+
+    assert [(change.name, change.status) for change in changes] == [
+        ("Cà phê sữa", "available"), ("Cà phê đen", "out_of_stock")]
+    assert menu_availability.refresh_all(conn) == []
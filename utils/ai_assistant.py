@@ -1,29 +1,228 @@
+import os
+import queue
 import re
+import threading
+from pathlib import Path
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from transformers import pipeline
+from config.database import get_connection
+from utils.menu_index import MenuIndex, get_index_path
+from utils.response_cache import ResponseCache, get_cache_path
+
+MODEL_NAME = "VietAI/vit5-base"
+
+# Cách chạy mô hình chat: "pipeline" (mặc định, float32), "quantized" (int8
+# lượng tử hóa động bằng PyTorch) hoặc "onnx" (ONNX Runtime, cần
+# optimum[onnxruntime]). Đổi bằng biến môi trường COFFEE_SHOP_AI_BACKEND.
+DEFAULT_BACKEND = "pipeline"
+
+# Tham số sinh câu trả lời cho chat_with_customer/chat_batch
+CHAT_GENERATION_KWARGS = {
+    "max_length": 100,  # Giảm độ dài tối đa
+    "num_beams": 2,     # Giảm số beam để tập trung vào câu trả lời chính
+    "length_penalty": 1.0,
+    "do_sample": True,
+    "temperature": 0.5,  # Giảm temperature để có câu trả lời ổn định hơn
+    "no_repeat_ngram_size": 2,
+}
+
+# Tham số sinh câu trả lời từng đoạn (stream_chat_batch): streamer của
+# transformers chỉ dùng được với num_beams=1
+STREAM_GENERATION_KWARGS = {
+    "max_length": 100,
+    "num_beams": 1,
+    "do_sample": True,
+    "temperature": 0.5,
+    "no_repeat_ngram_size": 2,
+}
+
+# Ngưỡng độ tương đồng TF-IDF để dùng lại câu trả lời của câu hỏi gần giống;
+# None là chỉ dùng lại khi câu hỏi trùng khớp sau chuẩn hóa
+NEAR_DUPLICATE_THRESHOLD = None
+
+_assistant = None
+_assistant_lock = threading.Lock()
+
+
+def get_assistant():
+    """AIAssistant dùng chung cho cả process.
+
+    Lần gọi đầu tiên tải mô hình (mất vài giây), nên gọi từ thread nền;
+    các lời gọi đồng thời chờ cùng một lần tải.
+    """
+    global _assistant
+    with _assistant_lock:
+        if _assistant is None:
+            _assistant = AIAssistant()
+        return _assistant
+
+
+def is_assistant_loaded():
+    return _assistant is not None
+
+
+class InferenceBackend:
+    """Mô hình seq2seq cùng tokenizer; mọi backend sinh câu trả lời giống nhau,
+    chỉ khác cách nạp mô hình. model.generate() nhận streamer như transformers.
+    """
+    name = None
+
+    def __init__(self, tokenizer, model):
+        self.tokenizer = tokenizer
+        self.model = model
+
+    def generate(self, prompt, **generation_kwargs):
+        return self.generate_batch([prompt], **generation_kwargs)[0]
+
+    def generate_batch(self, prompts, **generation_kwargs):
+        """Sinh câu trả lời cho nhiều prompt trong một lần chạy mô hình"""
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True)
+        output = self.model.generate(**inputs, **generation_kwargs)
+        return self.tokenizer.batch_decode(output, skip_special_tokens=True)
+
+
+class PipelineBackend(InferenceBackend):
+    """Pipeline text2text-generation của transformers, float32 trên CPU"""
+    name = "pipeline"
+
+    def __init__(self, model_name=MODEL_NAME):
+        # Import transformers ở đây vì bản thân việc import đã mất vài giây
+        from transformers import pipeline
+
+        self.pipeline = pipeline(
+            "text2text-generation",
+            model=model_name,
+            device=-1  # Sử dụng CPU
+        )
+        super().__init__(self.pipeline.tokenizer, self.pipeline.model)
+
+    def generate_batch(self, prompts, **generation_kwargs):
+        outputs = self.pipeline(prompts, batch_size=len(prompts), **generation_kwargs)
+        return [output['generated_text'] for output in outputs]
+
+
+class QuantizedBackend(InferenceBackend):
+    """Các lớp Linear được lượng tử hóa động sang int8 (nhỏ hơn, nhanh hơn trên CPU)"""
+    name = "quantized"
+
+    def __init__(self, model_name=MODEL_NAME):
+        import torch
+        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+        model.eval()
+        model = torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8)
+        super().__init__(AutoTokenizer.from_pretrained(model_name), model)
+
+
+class OnnxBackend(InferenceBackend):
+    """Mô hình xuất sang ONNX, chạy bằng ONNX Runtime.
+
+    Lần đầu xuất mô hình vào ~/.coffee_shop/onnx, các lần sau nạp lại từ đó.
+    """
+    name = "onnx"
+
+    def __init__(self, model_name=MODEL_NAME):
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        except ImportError:
+            raise RuntimeError(
+                "Backend onnx cần cài đặt: pip install optimum[onnxruntime]")
+        from transformers import AutoTokenizer
+
+        export_dir = os.path.join(str(Path.home()), '.coffee_shop', 'onnx',
+                                  model_name.replace('/', '__'))
+        if os.path.exists(os.path.join(export_dir, 'config.json')):
+            model = ORTModelForSeq2SeqLM.from_pretrained(export_dir)
+            tokenizer = AutoTokenizer.from_pretrained(export_dir)
+        else:
+            model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True)
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+            model.save_pretrained(export_dir)
+            tokenizer.save_pretrained(export_dir)
+        super().__init__(tokenizer, model)
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (PipelineBackend, QuantizedBackend, OnnxBackend)
+}
+
+
+def load_backend(name=None, model_name=MODEL_NAME):
+    """Nạp backend theo tên, mặc định lấy từ COFFEE_SHOP_AI_BACKEND"""
+    name = name or os.environ.get("COFFEE_SHOP_AI_BACKEND", DEFAULT_BACKEND)
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Backend không hợp lệ: {name} (chọn một trong {', '.join(BACKENDS)})")
+    return BACKENDS[name](model_name)
+
+
+class BatchStreamer:
+    """Streamer cho model.generate() khi sinh cả lô: mỗi bước nhận token mới
+    của mọi dòng, giải mã lại từng dòng và gửi phần chữ mới qua
+    emit(dòng, đoạn). Chỉ gửi tới hết từ cuối cùng để không cắt đôi một từ;
+    phần còn lại được gửi khi dòng gặp token kết thúc hoặc khi sinh xong.
+    (TextIteratorStreamer của transformers chỉ hỗ trợ lô một câu.)
+    """
+
+    def __init__(self, tokenizer, rows, emit):
+        self.tokenizer = tokenizer
+        self.emit = emit
+        self.tokens = [[] for _ in range(rows)]
+        self.sent = [""] * rows
+        self.finished = [False] * rows
+
+    def put(self, value):
+        for row, ids in enumerate(value.tolist()):
+            if self.finished[row]:
+                continue
+            ids = ids if isinstance(ids, list) else [ids]
+            self.tokens[row].extend(ids)
+            if self.tokenizer.eos_token_id in ids:
+                self.finished[row] = True
+            self.flush(row, final=self.finished[row])
+
+    def end(self):
+        for row in range(len(self.tokens)):
+            if not self.finished[row]:
+                self.finished[row] = True
+                self.flush(row, final=True)
+
+    def text(self, row):
+        return self.tokenizer.decode(self.tokens[row], skip_special_tokens=True)
+
+    def flush(self, row, final=False):
+        text = self.text(row)
+        if not final:
+            text = text[:text.rfind(" ") + 1]
+        if len(text) > len(self.sent[row]) and text.startswith(self.sent[row]):
+            self.emit(row, text[len(self.sent[row]):])
+            self.sent[row] = text
 
 
 class AIAssistant:
-    def __init__(self):
+    def __init__(self, near_duplicate_threshold=NEAR_DUPLICATE_THRESHOLD,
+                 backend=None):
         # Khởi tạo các mô hình
         print("Đang tải mô hình AI...")
 
         # Mô hình cho chat
-        self.chat_model = pipeline(
-            "text2text-generation",
-            model="VietAI/vit5-base",
-            device=-1  # Sử dụng CPU
-        )
+        self.backend = backend if isinstance(backend, InferenceBackend) \
+            else load_backend(backend)
 
-        # Dữ liệu menu
-        self.menu_context = self.load_menu_context()
+        # Chỉ mục các món đang bán cho gợi ý: đọc từ file đã lưu rồi chỉ
+        # cập nhật những món thay đổi trong database
+        self.menu_lock = threading.Lock()
+        self.menu_index_path = get_index_path()
+        self.menu_index = MenuIndex.load(self.menu_index_path)
+        self.refresh_menu()
 
-        # Vectorizer cho tìm kiếm tương đồng
-        self.vectorizer = TfidfVectorizer()
-        self.menu_vectors = None
-        self.prepare_menu_vectors()
+        # Cache câu trả lời của mô hình, giữ lại giữa các lần mở ứng dụng
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.response_cache = ResponseCache(
+            get_cache_path(),
+            find_similar=self.find_similar_question if near_duplicate_threshold else None)
 
         # Các câu trả lời mẫu cho trường hợp phổ biến
         self.common_responses = {
@@ -45,81 +244,43 @@ class AIAssistant:
         }
 
     def load_menu_context(self):
-        """Load thông tin menu"""
-        menu_items = {
-            "Cà phê": [
-                {"name": "Cà phê đen", "description": "Cà phê đen truyền thống"},
-                {"name": "Cà phê sữa", "description": "Cà phê pha với sữa đặc"},
-                {"name": "Cappuccino", "description": "Cà phê Ý với sữa tươi đánh bông"},
-                {"name": "Latte", "description": "Cà phê với sữa tươi và ít bọt sữa"},
-                {"name": "Espresso", "description": "Cà phê đậm đặc kiểu Ý"},
-                {"name": "Mocha", "description": "Cà phê pha với sữa và socola"},
-                {"name": "Americano", "description": "Espresso pha với nước nóng"},
-                {"name": "Cold Brew", "description": "Cà phê ủ lạnh 24 giờ"}
-            ],
-            "Trà": [
-                {"name": "Trà xanh", "description": "Trà xanh truyền thống"},
-                {"name": "Trà đen", "description": "Trà đen đậm đà"},
-                {"name": "Trà sữa", "description": "Trà pha với sữa tươi"},
-                {"name": "Trà đào", "description": "Trà đen với đào tươi và syrup đào"},
-                {"name": "Trà vải", "description": "Trà pha với vải và syrup vải"},
-                {"name": "Trà chanh", "description": "Trà tươi với chanh và mật ong"},
-                {"name": "Trà gừng", "description": "Trà nóng với gừng tươi"},
-                {"name": "Trà hoa cúc", "description": "Trà hoa cúc thư giãn"}
-            ],
-            "Nước ép & Sinh tố": [
-                {"name": "Nước cam", "description": "Nước cam tươi"},
-                {"name": "Nước táo", "description": "Nước ép táo"},
-                {"name": "Sinh tố xoài", "description": "Sinh tố xoài với sữa tươi"},
-                {"name": "Sinh tố dâu", "description": "Sinh tố dâu tây với sữa chua"},
-                {"name": "Nước ép dứa", "description": "Nước ép dứa tươi"},
-                {"name": "Nước ép cà rốt", "description": "Nước ép cà rốt tươi"},
-                {"name": "Sinh tố bơ", "description": "Sinh tố bơ béo ngậy"},
-                {"name": "Sinh tố việt quất",
-                    "description": "Sinh tố việt quất với sữa chua"}
-            ],
-            "Đồ ăn nhẹ": [
-                {"name": "Bánh mì", "description": "Bánh mì truyền thống"},
-                {"name": "Bánh ngọt", "description": "Bánh ngọt đặc biệt"},
-                {"name": "Sandwich", "description": "Sandwich với nhiều loại nhân"},
-                {"name": "Croissant", "description": "Bánh sừng bò truyền thống Pháp"},
-                {"name": "Muffin", "description": "Bánh muffin nhiều hương vị"},
-                {"name": "Cookies", "description": "Bánh quy giòn tan"},
-                {"name": "Tiramisu", "description": "Bánh tiramisu Ý"},
-                {"name": "Cheesecake", "description": "Bánh phô mai New York"}
-            ],
-            "Đồ uống đặc biệt": [
-                {"name": "Sữa chua đá", "description": "Sữa chua với đá bào"},
-                {"name": "Matcha đá xay", "description": "Matcha Nhật Bản xay với đá"},
-                {"name": "Socola nóng", "description": "Socola nóng với kem tươi"},
-                {"name": "Smoothie trái cây",
-                    "description": "Smoothie hỗn hợp trái cây"},
-                {"name": "Trà sữa trân châu",
-                    "description": "Trà sữa với trân châu đường đen"},
-                {"name": "Yakult đào", "description": "Yakult với syrup đào"},
-                {"name": "Nước chanh sả", "description": "Nước chanh với sả tươi"},
-                {"name": "Soda Italian", "description": "Soda với syrup hoa quả"}
-            ]
-        }
-        return menu_items
+        """Load thông tin menu: {danh mục: [món, ...]} các món đang bán"""
+        with self.menu_lock:
+            return self.menu_index.by_category()
 
-    def prepare_menu_vectors(self):
-        """Chuẩn bị vectors cho menu items"""
-        menu_texts = []
-        for category, items in self.menu_context.items():
-            for item in items:
-                menu_texts.append(f"{item['name']} - {item['description']}")
-        self.menu_vectors = self.vectorizer.fit_transform(menu_texts)
-        self.menu_items_flat = menu_texts
+    def refresh_menu(self):
+        """Đồng bộ chỉ mục gợi ý với bảng menu_items.
+
+        Chỉ các món mới/sửa được tính lại; trả về (số món mới/đổi, số món bị bỏ).
+        """
+        with self.menu_lock:
+            with get_connection() as conn:
+                changed, removed = self.menu_index.refresh(conn)
+            if changed or removed:
+                self.menu_index.save(self.menu_index_path)
+        return changed, removed
+
+    def strip_special_chars(self, text):
+        """Loại bỏ các ký tự đặc biệt không cần thiết"""
+        return re.sub(r'[^\w\s,.!?:;()-]', '', text)
 
     def clean_text(self, text):
         """Làm sạch văn bản"""
-        # Loại bỏ các ký tự đặc biệt không cần thiết
-        text = re.sub(r'[^\w\s,.!?:;()-]', '', text)
+        text = self.strip_special_chars(text)
         # Chuẩn hóa khoảng trắng
         text = ' '.join(text.split())
         return text
 
+    def find_similar_question(self, question, questions):
+        """Chỉ số của câu hỏi gần giống question nhất theo TF-IDF, hoặc None"""
+        with self.menu_lock:
+            vectors = self.menu_index.transform([question] + questions)
+        similarities = (vectors[1:] @ vectors[0].T).toarray().ravel()
+        best = similarities.argmax()
+        if similarities[best] >= self.near_duplicate_threshold:
+            return int(best)
+        return None
+
     def is_greeting(self, text):
         """Kiểm tra xem có phải là câu chào không"""
         greetings = ['chào', 'xin chào', 'hello', 'hi', 'hey']
@@ -149,73 +310,169 @@ class AIAssistant:
             return random.choice(self.common_responses['thanks'])
         return None
 
+    def quick_reply(self, clean_message):
+        """Câu trả lời không cần chạy mô hình (chào hỏi, menu, đã cache) hoặc None"""
+        # Kiểm tra các trường hợp đơn giản trước
+        simple_response = self.get_simple_response(clean_message)
+        if simple_response:
+            return simple_response
+
+        # Kiểm tra nếu khách hàng hỏi về menu
+        if "menu" in clean_message.lower():
+            return self._format_menu()
+
+        # Câu hỏi đã được trả lời trước đó
+        return self.response_cache.get(clean_message)
+
     def chat_with_customer(self, user_message):
         """Xử lý chat với khách hàng"""
+        return self.chat_batch([user_message])[0]
+
+    def chat_batch(self, user_messages):
+        """Trả lời nhiều câu hỏi cùng lúc; các câu cần mô hình được sinh
+        chung trong một lần chạy (xem utils/assistant_service.py).
+        """
         try:
             # Làm sạch tin nhắn của người dùng
-            clean_message = self.clean_text(user_message)
+            clean_messages = [self.clean_text(message) for message in user_messages]
+            replies = [self.quick_reply(message) for message in clean_messages]
+            pending = [i for i, reply in enumerate(replies) if not reply]
+            if not pending:
+                return replies
 
-            # Kiểm tra các trường hợp đơn giản trước
-            simple_response = self.get_simple_response(clean_message)
-            if simple_response:
-                return simple_response
+            # Xử lý các câu hỏi phức tạp hơn
+            prompts = [f"Hãy trả lời ngắn gọn và lịch sự: {clean_messages[i]}"
+                       for i in pending]
+            responses = self.backend.generate_batch(prompts, **CHAT_GENERATION_KWARGS)
 
-            # Kiểm tra nếu khách hàng hỏi về menu
-            if "menu" in clean_message.lower():
-                return self._format_menu()
+            for i, response in zip(pending, responses):
+                # Làm sạch và định dạng phản hồi
+                response = self.clean_text(response)
 
-            # Xử lý các câu hỏi phức tạp hơn
-            prompt = f"Hãy trả lời ngắn gọn và lịch sự: {clean_message}"
+                # Nếu response trống hoặc không hợp lệ
+                if not response or len(response.strip()) < 5:
+                    replies[i] = "Xin lỗi, tôi không hiểu câu hỏi. Bạn có thể nói rõ hơn được không?"
+                    continue
 
-            # Tạo câu trả lời
-            response = self.chat_model(
-                prompt,
-                max_length=100,  # Giảm độ dài tối đa
-                num_beams=2,     # Giảm số beam để tập trung vào câu trả lời chính
-                length_penalty=1.0,
-                do_sample=True,
-                temperature=0.5,  # Giảm temperature để có câu trả lời ổn định hơn
-                no_repeat_ngram_size=2
-            )[0]['generated_text']
+                self.response_cache.put(clean_messages[i], response)
+                replies[i] = response
+            return replies
 
-            # Làm sạch và định dạng phản hồi
-            response = self.clean_text(response)
+        except Exception as e:
+            return [f"Xin lỗi, tôi đang gặp vấn đề kỹ thuật: {str(e)}"] * len(user_messages)
 
-            # Nếu response trống hoặc không hợp lệ
-            if not response or len(response.strip()) < 5:
-                return "Xin lỗi, tôi không hiểu câu hỏi. Bạn có thể nói rõ hơn được không?"
+    def cache_stats(self):
+        return self.response_cache.stats()
 
-            return response
+    def stream_chat_batch(self, user_messages, stop_events, emit):
+        """Trả lời nhiều câu hỏi, gửi từng đoạn câu trả lời qua emit(i, đoạn)
+        ngay khi mô hình sinh ra. Các câu cần mô hình được sinh chung một lần
+        (padding theo câu dài nhất).
 
-        except Exception as e:
-            return f"Xin lỗi, tôi đang gặp vấn đề kỹ thuật: {str(e)}"
+        stop_events[i] (threading.Event) dừng câu thứ i: không gửi thêm đoạn
+        nào của câu đó, và mô hình dừng khi mọi câu đều đã dừng. Lỗi được ném
+        ra cho nơi gọi xử lý. Sinh từng token chỉ làm được với num_beams=1
+        nên câu trả lời dùng sampling thay cho beam search.
+        """
+        from transformers import StoppingCriteria, StoppingCriteriaList
 
-    def recommend_drinks(self, preferences):
-        """Gợi ý đồ uống dựa trên sở thích"""
-        try:
-            # Vector hóa preferences
-            pref_vector = self.vectorizer.transform([preferences])
+        def send(i, chunk):
+            if not stop_events[i].is_set():
+                emit(i, chunk)
 
-            # Tính similarity
-            similarities = cosine_similarity(pref_vector, self.menu_vectors)
+        clean_messages = [self.clean_text(message) for message in user_messages]
+        pending = []
+        for i, clean_message in enumerate(clean_messages):
+            # Các trường hợp đơn giản trả lời ngay
+            quick_reply = self.quick_reply(clean_message)
+            if quick_reply:
+                send(i, quick_reply)
+            else:
+                pending.append(i)
+        if not pending:
+            return
 
-            # Lấy top 3 đồ uống phù hợp nhất
-            top_indices = similarities[0].argsort()[-3:][::-1]
+        class StopWhenAllStopped(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                return all(stop_events[i].is_set() for i in pending)
 
-            recommendations = []
-            for idx in top_indices:
-                recommendations.append(self.menu_items_flat[idx])
+        tokenizer = self.backend.tokenizer
+        streamer = BatchStreamer(
+            tokenizer, len(pending),
+            lambda row, chunk: send(pending[row], self.strip_special_chars(chunk)))
+        inputs = tokenizer(
+            [f"Hãy trả lời ngắn gọn và lịch sự: {clean_messages[i]}" for i in pending],
+            return_tensors="pt", padding=True)
+        self.backend.model.generate(
+            **inputs,
+            streamer=streamer,
+            stopping_criteria=StoppingCriteriaList([StopWhenAllStopped()]),
+            **STREAM_GENERATION_KWARGS
+        )
+
+        for row, i in enumerate(pending):
+            if stop_events[i].is_set():
+                continue
+            response = self.clean_text(streamer.text(row))
+            if len(response) < 5:
+                if not response:
+                    send(i, "Xin lỗi, tôi không hiểu câu hỏi. Bạn có thể nói rõ hơn được không?")
+                continue
+            self.response_cache.put(clean_messages[i], response)
+
+    def stream_chat(self, user_message, stop_event=None):
+        """Như stream_chat_batch cho một câu hỏi: trả về từng đoạn câu trả lời.
+        Đặt stop_event (threading.Event) để dừng giữa chừng."""
+        stop_event = stop_event or threading.Event()
+        chunks = queue.Queue()
+        errors = []
+
+        def generate():
+            try:
+                self.stream_chat_batch([user_message], [stop_event],
+                                       lambda i, chunk: chunks.put(chunk))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                chunks.put(None)
+
+        threading.Thread(target=generate, daemon=True).start()
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            yield chunk
+        if errors:
+            raise errors[0]
 
-            return "Dựa trên sở thích của bạn, tôi gợi ý:\n" + "\n".join(
-                f"- {rec}" for rec in recommendations
-            )
+    def recommend_drinks(self, preferences):
+        """Gợi ý đồ uống dựa trên sở thích"""
+        return self.recommend_batch([preferences])[0]
+
+    def recommend_batch(self, preferences_list):
+        """Gợi ý cho nhiều sở thích cùng lúc"""
+        try:
+            # Lấy top 3 món đang bán phù hợp nhất
+            with self.menu_lock:
+                results = self.menu_index.search_many(preferences_list, top_n=3)
         except Exception as e:
-            return f"Xin lỗi, không thể tạo gợi ý: {str(e)}"
+            return [f"Xin lỗi, không thể tạo gợi ý: {str(e)}"] * len(preferences_list)
+
+        replies = []
+        for recommendations in results:
+            if not recommendations:
+                replies.append("Xin lỗi, hiện chưa có món nào để gợi ý.")
+                continue
+            replies.append("Dựa trên sở thích của bạn, tôi gợi ý:\n" + "\n".join(
+                f"- {rec['name']} - {rec['description']} ({rec['price']:,.0f} VNĐ)"
+                for rec in recommendations
+            ))
+        return replies
 
     def _format_menu(self):
         """Format menu để hiển thị"""
         menu_text = "🍵 MENU CỦA CHÚNG TÔI 🍵\n\n"
-        for category, items in self.menu_context.items():
+        for category, items in self.load_menu_context().items():
             menu_text += f"=== {category} ===\n"
             for item in items:
                 menu_text += f"• {item['name']}: {item['description']}\n"
@@ -0,0 +1,501 @@
+"""Dịch vụ trợ lý ảo dùng chung cho mọi cửa sổ chạy trên cùng một máy.
+
+Mỗi process (admin, nhân viên, khách) tự tải mô hình thì mỗi cửa sổ giữ
+một bản mô hình trong RAM. Thay vào đó, process đầu tiên mở một HTTP
+server trên localhost, tải mô hình một lần và phục vụ mọi cửa sổ; các
+process sau chỉ dùng AssistantClient. Khi process giữ dịch vụ tắt, client
+đầu tiên gặp lỗi kết nối sẽ tự mở lại dịch vụ (giống hub của event bus).
+
+Các yêu cầu chat/gợi ý đến gần nhau (trong BATCH_WINDOW) được gom lại và
+chạy chung một lần qua AIAssistant.chat_batch/recommend_batch. Khung chat
+dùng POST /chat_stream: các câu hỏi cũng được gom lô (stream_chat_batch),
+câu trả lời được gửi về từng đoạn ngay khi mô hình sinh ra, và client đóng
+kết nối để dừng giữa chừng. Mọi lần gọi mô hình đều chạy trên thread của
+bộ gom nên không có hai lần generate() chạy song song trên cùng mô hình.
+Có thể chạy dịch vụ riêng bằng assistant_server.py.
+"""
+
+import http.client
+import json
+import os
+import queue
+import select
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Thời gian chờ gom thêm yêu cầu sau yêu cầu đầu tiên của một lô (giây)
+BATCH_WINDOW = 0.02
+MAX_BATCH = 8
+
+# Lần gọi đầu có thể phải chờ tải mô hình
+REQUEST_TIMEOUT = 600
+
+# Chu kỳ kiểm tra yêu cầu dừng khi đang nhận câu trả lời từng đoạn (giây)
+STOP_POLL_INTERVAL = 0.1
+
+_server = None
+_server_lock = threading.Lock()
+
+# Kết nối thẳng tới localhost, bỏ qua proxy trong biến môi trường
+_opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+
+def get_port():
+    """Cổng của dịch vụ, đổi bằng biến môi trường COFFEE_SHOP_AI_PORT"""
+    return int(os.environ.get("COFFEE_SHOP_AI_PORT", DEFAULT_PORT))
+
+
+class RequestBatcher:
+    """Thread gom các yêu cầu cùng loại rồi xử lý theo lô.
+
+    handlers là dict {loại: hàm nhận danh sách đầu vào, trả về danh sách
+    kết quả cùng thứ tự}. submit() trả về Future của từng yêu cầu.
+    """
+
+    def __init__(self, handlers, window=BATCH_WINDOW, max_batch=MAX_BATCH):
+        self.handlers = handlers
+        self.window = window
+        self.max_batch = max_batch
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.batches = 0
+        self.batched_requests = 0
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.requests.put(None)
+        self.thread.join()
+
+    def submit(self, kind, value):
+        if kind not in self.handlers:
+            raise ValueError(f"Loại yêu cầu không hợp lệ: {kind}")
+        future = Future()
+        self.requests.put((kind, value, future))
+        return future
+
+    def next_batch(self):
+        """Chờ yêu cầu đầu tiên rồi gom thêm trong window giây; None khi dừng"""
+        request = self.requests.get()
+        if request is None:
+            return None
+        batch = [request]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                # Xử lý nốt lô hiện tại rồi mới dừng
+                self.requests.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            if batch is None:
+                return
+            groups = defaultdict(list)
+            for kind, value, future in batch:
+                groups[kind].append((value, future))
+
+            for kind, requests in groups.items():
+                self.batches += 1
+                self.batched_requests += len(requests)
+                try:
+                    results = self.handlers[kind]([value for value, _ in requests])
+                except Exception as e:
+                    for _, future in requests:
+                        future.set_exception(e)
+                    continue
+                for (_, future), result in zip(requests, results):
+                    future.set_result(result)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "requests": self.batched_requests,
+            "average_batch": (self.batched_requests / self.batches
+                              if self.batches else 0.0),
+        }
+
+
+class ChatStream:
+    """Một yêu cầu /chat_stream trong bộ gom: các đoạn câu trả lời được đưa
+    vào chunks (None là hết), stop_event dừng riêng yêu cầu này."""
+
+    def __init__(self, message):
+        self.message = message
+        self.chunks = queue.Queue()
+        self.stop_event = threading.Event()
+
+
+class AssistantRequestHandler(BaseHTTPRequestHandler):
+    """GET /health, GET /stats, POST /chat, POST /chat_stream, POST /recommend,
+    POST /refresh_menu.
+
+    Dữ liệu gửi/nhận là JSON; lỗi trả về {"error": ...} với mã 4xx/5xx.
+    """
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.send_json(200, self.server.health())
+        elif self.path == "/stats":
+            self.run_request(lambda assistant: assistant.cache_stats())
+        else:
+            self.send_json(404, {"error": f"Không có đường dẫn {self.path}"})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self.send_json(400, {"error": "Dữ liệu JSON không hợp lệ"})
+            return
+
+        if self.path == "/chat":
+            self.run_batched("chat", data.get("message", ""))
+        elif self.path == "/chat_stream":
+            self.stream_chat(data.get("message", ""))
+        elif self.path == "/recommend":
+            self.run_batched("recommend", data.get("preferences", ""))
+        elif self.path == "/refresh_menu":
+            self.run_request(lambda assistant: list(assistant.refresh_menu()))
+        else:
+            self.send_json(404, {"error": f"Không có đường dẫn {self.path}"})
+
+    def run_batched(self, kind, value):
+        try:
+            reply = self.server.batcher.submit(kind, value).result()
+        except Exception as e:
+            self.send_json(500, {"error": str(e)})
+        else:
+            self.send_json(200, {"reply": reply})
+
+    def stream_chat(self, message):
+        """Gửi từng đoạn câu trả lời ngay khi sinh ra, mỗi dòng một JSON
+        {"chunk": ...}; dòng cuối là {"done": true} hoặc {"error": ...}.
+
+        Câu hỏi đi qua bộ gom yêu cầu như /chat nên các khung chat hỏi cùng
+        lúc được sinh chung một lô. Không có Content-Length, client đọc tới
+        khi kết nối đóng. Client đóng kết nối (bấm Dừng) thì lần ghi tiếp
+        theo lỗi (hoặc lần kiểm tra khi chưa có đoạn mới thấy kết nối đã
+        đóng) và việc sinh câu trả lời dừng qua stop_event.
+        """
+        stream = ChatStream(message)
+        future = self.server.batcher.submit("chat_stream", stream)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            while True:
+                try:
+                    chunk = stream.chunks.get(timeout=STOP_POLL_INTERVAL)
+                except queue.Empty:
+                    if self.client_closed():
+                        return
+                    continue
+                if chunk is None:
+                    break
+                self.send_line({"chunk": chunk})
+            error = future.exception()
+            self.send_line({"error": str(error)} if error else {"done": True})
+        except OSError:
+            # Client đã dừng hoặc đóng cửa sổ
+            pass
+        finally:
+            stream.stop_event.set()
+
+    def client_closed(self):
+        """Client đã đóng kết nối chưa (đọc thử mà không lấy dữ liệu)"""
+        try:
+            readable, _, _ = select.select([self.connection], [], [], 0)
+            return bool(readable) and not self.connection.recv(1, socket.MSG_PEEK)
+        except OSError:
+            return True
+
+    def send_line(self, data):
+        self.wfile.write(json.dumps(data, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+    def run_request(self, work):
+        try:
+            result = work(self.server.wait_assistant())
+        except Exception as e:
+            self.send_json(500, {"error": str(e)})
+        else:
+            self.send_json(200, {"result": result})
+
+    def send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Không in log cho từng yêu cầu
+        pass
+
+
+class AssistantServer(ThreadingHTTPServer):
+    """HTTP server giữ một AIAssistant và gom yêu cầu qua RequestBatcher.
+
+    Cổng được mở ngay để process khác biết dịch vụ đã có chủ; mô hình được
+    tải ở thread nền, các yêu cầu đến trong lúc tải sẽ chờ.
+    """
+    daemon_threads = True
+    # Không cho process khác mở chồng lên cùng cổng (SO_REUSEADDR trên Windows)
+    allow_reuse_address = False
+
+    def __init__(self, port=None, load_assistant=None,
+                 window=BATCH_WINDOW, max_batch=MAX_BATCH):
+        super().__init__((HOST, get_port() if port is None else port),
+                         AssistantRequestHandler)
+        self.load_assistant = load_assistant
+        self.assistant = None
+        self.error = None
+        self.ready = threading.Event()
+        self.batcher = RequestBatcher({
+            "chat": lambda messages: self.wait_assistant().chat_batch(messages),
+            "chat_stream": self.stream_chat_batch,
+            "recommend": lambda preferences:
+                self.wait_assistant().recommend_batch(preferences),
+        }, window, max_batch)
+
+    def start(self):
+        """Chạy server, bộ gom yêu cầu và việc tải mô hình ở các thread nền"""
+        self.batcher.start()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        threading.Thread(target=self.load, daemon=True).start()
+
+    def load(self):
+        try:
+            load_assistant = self.load_assistant
+            if load_assistant is None:
+                # Import ở đây để process chỉ làm client không phải import transformers
+                from utils.ai_assistant import get_assistant
+                load_assistant = get_assistant
+            self.assistant = load_assistant()
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.ready.set()
+
+    def wait_assistant(self):
+        self.ready.wait()
+        if self.assistant is None:
+            raise RuntimeError(f"Không thể tải mô hình AI: {self.error}")
+        return self.assistant
+
+    def stream_chat_batch(self, streams):
+        """Sinh chung một lô câu trả lời từng đoạn, chuyển mỗi đoạn vào
+        hàng đợi của đúng yêu cầu"""
+        try:
+            self.wait_assistant().stream_chat_batch(
+                [stream.message for stream in streams],
+                [stream.stop_event for stream in streams],
+                lambda i, chunk: streams[i].chunks.put(chunk))
+        finally:
+            for stream in streams:
+                stream.chunks.put(None)
+        return [None] * len(streams)
+
+    def health(self):
+        if not self.ready.is_set():
+            status = "loading"
+        else:
+            status = "ready" if self.assistant is not None else "failed"
+        return {"status": status, "error": self.error, "pid": os.getpid(),
+                **self.batcher.stats()}
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self.batcher.stop()
+
+
+def start_server(port=None, load_assistant=None):
+    """Mở dịch vụ trong process này nếu cổng còn trống.
+
+    Trả về server đang chạy trong process, hoặc None nếu process khác đã
+    giữ cổng.
+    """
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+        try:
+            server = AssistantServer(port, load_assistant)
+        except OSError:
+            return None
+        server.start()
+        _server = server
+        return server
+
+
+class AssistantClient:
+    """Các phương thức của AIAssistant mà giao diện dùng, gọi qua dịch vụ.
+
+    Nếu không kết nối được (process giữ dịch vụ đã tắt), client tự mở lại
+    dịch vụ trong process này rồi gửi lại yêu cầu.
+    """
+
+    def __init__(self, port=None, timeout=REQUEST_TIMEOUT):
+        self.port = get_port() if port is None else port
+        self.timeout = timeout
+
+    def _request(self, path, data=None):
+        url = f"http://{HOST}:{self.port}{path}"
+        body = None if data is None else json.dumps(data).encode("utf-8")
+        request = urllib.request.Request(
+            url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            with _opener.open(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                error = json.loads(e.read()).get("error")
+            except ValueError:
+                error = None
+            raise RuntimeError(error or str(e))
+
+    def call(self, path, data=None):
+        try:
+            return self._request(path, data)
+        except urllib.error.URLError:
+            self.wait_ready()
+            return self._request(path, data)
+
+    def wait_ready(self, poll_interval=0.5):
+        """Chờ dịch vụ tải xong mô hình, tự mở dịch vụ nếu chưa có ai mở"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                health = self._request("/health")
+            except urllib.error.URLError:
+                start_server(self.port)
+                health = {"status": "loading"}
+            if health["status"] == "ready":
+                return
+            if health["status"] == "failed":
+                raise RuntimeError(f"Không thể tải mô hình AI: {health['error']}")
+            if time.monotonic() > deadline:
+                raise RuntimeError("Hết thời gian chờ tải mô hình AI")
+            time.sleep(poll_interval)
+
+    def health(self):
+        return self._request("/health")
+
+    def chat_with_customer(self, user_message):
+        return self.call("/chat", {"message": user_message})["reply"]
+
+    def _open_stream(self, user_message):
+        connection = http.client.HTTPConnection(HOST, self.port, timeout=self.timeout)
+        try:
+            connection.request(
+                "POST", "/chat_stream",
+                json.dumps({"message": user_message}).encode("utf-8"),
+                {"Content-Type": "application/json"})
+            # getresponse() bỏ connection.sock khi máy chủ sẽ đóng kết nối,
+            # nên giữ lại socket để có thể ngắt khi bấm Dừng
+            sock = connection.sock
+            response = connection.getresponse()
+            if response.status != 200:
+                try:
+                    error = json.loads(response.read()).get("error")
+                except ValueError:
+                    error = None
+                raise RuntimeError(error or f"HTTP {response.status}")
+        except BaseException:
+            connection.close()
+            raise
+        return connection, sock, response
+
+    def stream_chat(self, user_message, stop_event=None):
+        """Nhận từng đoạn câu trả lời qua POST /chat_stream ngay khi dịch vụ
+        sinh ra. Đặt stop_event (threading.Event) để dừng giữa chừng: kết nối
+        bị đóng ngay cả khi đang chờ đoạn tiếp theo, và dịch vụ dừng sinh.
+        """
+        try:
+            connection, sock, response = self._open_stream(user_message)
+        except ConnectionError:
+            self.wait_ready()
+            connection, sock, response = self._open_stream(user_message)
+
+        finished = threading.Event()
+
+        def watch_stop():
+            while not finished.is_set():
+                if stop_event.wait(STOP_POLL_INTERVAL):
+                    # Ngắt socket để lần đọc đang chờ trả về ngay
+                    try:
+                        sock.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+                    return
+
+        if stop_event is not None:
+            threading.Thread(target=watch_stop, daemon=True).start()
+        try:
+            while True:
+                try:
+                    line = response.readline()
+                except OSError:
+                    line = b""
+                if stop_event is not None and stop_event.is_set():
+                    return
+                if not line:
+                    raise RuntimeError("Dịch vụ trợ lý ảo ngắt kết nối giữa chừng")
+                data = json.loads(line)
+                if "error" in data:
+                    raise RuntimeError(data["error"])
+                if data.get("done"):
+                    return
+                yield data["chunk"]
+        finally:
+            finished.set()
+            response.close()
+            connection.close()
+
+    def recommend_drinks(self, preferences):
+        return self.call("/recommend", {"preferences": preferences})["reply"]
+
+    def refresh_menu(self):
+        return tuple(self.call("/refresh_menu", {})["result"])
+
+    def cache_stats(self):
+        """Thống kê cache, None nếu dịch vụ không phản hồi (gọi từ giao diện
+        nên không tự mở lại dịch vụ)"""
+        try:
+            return self._request("/stats")["result"]
+        except (OSError, RuntimeError):
+            return None
+
+
+def connect_assistant(port=None):
+    """Client tới dịch vụ trợ lý; nếu chưa có dịch vụ thì mở trong process
+    này và tải mô hình. Chờ tới khi mô hình sẵn sàng nên gọi từ thread nền.
+    """
+    start_server(port)
+    client = AssistantClient(port)
+    client.wait_ready()
+    return client
@@ -1,127 +1,240 @@
+"""Import dữ liệu từ file CSV vào database.
+
+File được đọc từng dòng (không nạp cả file vào bộ nhớ) và ghi theo lô
+bằng executemany, mỗi lần import là một transaction duy nhất (BEGIN
+IMMEDIATE qua run_write): lỗi ở bất kỳ dòng nào sẽ hủy toàn bộ lần
+import thay vì để lại dữ liệu ghi dở. Khóa ngoại viết bằng tên (tên danh
+mục, username) được đổi sang id bằng bảng tra trong bộ nhớ hoặc truy vấn
+con theo cột UNIQUE; tên ứng với nhiều dòng bị báo lỗi thay vì đoán.
+"""
+
 import csv
-import hashlib
+import time
+from itertools import islice
+
+from config.database import run_write
+from controllers.account_service import hash_password
+from models import menu_availability
+
+# Số dòng mỗi lần executemany
+BATCH_SIZE = 5000
+
+# Cột 'available' cũ (1/0) của menu_items.csv
+LEGACY_AVAILABILITY = {'1': 'available', '0': 'out_of_stock'}
+
+
+class ImportResult:
+    """Kết quả một lần import: số dòng và tốc độ"""
+
+    def __init__(self, rows, seconds):
+        self.rows = rows
+        self.seconds = seconds
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else float(self.rows)
+
+    def __str__(self):
+        return (f"{self.rows} dòng trong {self.seconds:.2f} giây "
+                f"({self.rows_per_second:,.0f} dòng/giây)")
+
+
+def read_csv(file_path):
+    """Đọc từng dòng CSV dưới dạng dict, kèm số dòng trong file (tính cả tiêu đề)"""
+    with open(file_path, 'r', encoding='utf-8', newline='') as file:
+        for line_number, row in enumerate(csv.DictReader(file), start=2):
+            yield line_number, row
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def convert_rows(rows, convert):
+    """Đổi từng dòng CSV sang tham số INSERT, báo lỗi kèm số dòng"""
+    for line_number, row in rows:
+        try:
+            yield convert(row)
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Dòng {line_number}: dữ liệu không hợp lệ ({e!r})")
+
+
+def bulk_insert(cursor, sql, params, batch_size=BATCH_SIZE):
+    """executemany theo từng lô batch_size dòng, trả về số dòng đã ghi"""
+    count = 0
+    for chunk in chunked(params, batch_size):
+        cursor.executemany(sql, chunk)
+        count += len(chunk)
+    return count
+
+
+def run_import(work, conn=None):
+    """Chạy work(conn) trong một transaction và đo thời gian.
 
-from config.database import create_connection
+    Nếu có conn thì chạy luôn trên kết nối đó (nơi gọi tự commit), nếu
+    không thì mở transaction ghi riêng qua run_write.
+    """
+    start = time.perf_counter()
+    rows = work(conn) if conn is not None else run_write(work)
+    return ImportResult(rows, time.perf_counter() - start)
+
+
+def name_ids(cursor, table, column="name"):
+    """{tên: id} của bảng table theo cột column; tên có nhiều dòng ứng với None"""
+    ids = {}
+    for name, row_id in cursor.execute(f"SELECT {column}, id FROM {table}"):
+        ids[name] = None if name in ids else row_id
+    return ids
+
+
+def lookup_id(ids, name, label):
+    """id theo tên từ name_ids, báo lỗi nếu không có hoặc có nhiều dòng cùng tên"""
+    if name not in ids:
+        raise ValueError(f"không có {label} '{name}'")
+    if ids[name] is None:
+        raise ValueError(f"có nhiều {label} cùng tên '{name}'")
+    return ids[name]
 
 
 class CSVImporter:
     @staticmethod
-    def import_categories(file_path):
-        conn = create_connection()
-        if conn:
+    def import_categories(file_path, conn=None, batch_size=BATCH_SIZE):
+        def work(conn):
+            return bulk_insert(conn.cursor(), """
+                INSERT INTO categories (name, description)
+                VALUES (?, ?)
+            """, convert_rows(read_csv(file_path), lambda row: (
+                row['name'],
+                row['description']
+            )), batch_size)
+
+        return run_import(work, conn)
+
+    @staticmethod
+    def import_menu_items(file_path, conn=None, batch_size=BATCH_SIZE):
+        """Cột category là tên danh mục (hoặc category_id là id), cột status
+        mặc định 'available'"""
+        def work(conn):
             cursor = conn.cursor()
-            with open(file_path, 'r', encoding='utf-8') as file:
-                csv_reader = csv.DictReader(file)
-                for row in csv_reader:
-                    cursor.execute("""
-                        INSERT INTO categories (name, description)
-                        VALUES (?, ?)
-                    """, (row['name'], row['description']))
-            conn.commit()
-            conn.close()
+            categories = name_ids(cursor, "categories")
+
+            def convert(row):
+                if row.get('category'):
+                    category_id = lookup_id(categories, row['category'], "danh mục")
+                else:
+                    category_id = int(row['category_id'])
+                status = row.get('status') or LEGACY_AVAILABILITY.get(
+                    row.get('available'), 'available')
+                return (
+                    category_id,
+                    row['name'],
+                    row['description'],
+                    float(row['price']),
+                    status
+                )
+
+            return bulk_insert(cursor, """
+                INSERT INTO menu_items (category_id, name, description, price, status)
+                VALUES (?, ?, ?, ?, ?)
+            """, convert_rows(read_csv(file_path), convert), batch_size)
+
+        return run_import(work, conn)
 
     @staticmethod
-    def import_menu_items(file_path):
-        conn = create_connection()
-        if conn:
+    def import_users(file_path, conn=None, batch_size=BATCH_SIZE):
+        def work(conn):
             cursor = conn.cursor()
-            with open(file_path, 'r', encoding='utf-8') as file:
-                csv_reader = csv.DictReader(file)
-                for row in csv_reader:
-                    cursor.execute("""
-                        INSERT INTO menu_items (category_id, name, description, price, available)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (
-                        int(row['category_id']),
+            count = 0
+            for chunk in chunked(read_csv(file_path), batch_size):
+                count += bulk_insert(cursor, """
+                    INSERT INTO users (username, password, role, email, phone)
+                    VALUES (?, ?, ?, ?, ?)
+                """, convert_rows(chunk, lambda row: (
+                    row['username'],
+                    hash_password(row['password']),
+                    row['role'],
+                    row['email'],
+                    row['phone']
+                )), batch_size)
+
+                # Thêm thông tin bổ sung tùy theo role, user_id tra theo username
+                bulk_insert(cursor, """
+                    INSERT INTO employees (user_id, name, position, salary)
+                    SELECT id, ?, ?, ? FROM users WHERE username = ?
+                """, convert_rows(
+                    ((line, row) for line, row in chunk if row['role'] == 'staff'),
+                    lambda row: (
                         row['name'],
-                        row['description'],
-                        float(row['price']),
-                        int(row['available'])
-                    ))
-            conn.commit()
-            conn.close()
+                        row['position'],
+                        float(row['salary']),
+                        row['username']
+                    )), batch_size)
+                bulk_insert(cursor, """
+                    INSERT INTO customers (user_id, name)
+                    SELECT id, ? FROM users WHERE username = ?
+                """, convert_rows(
+                    ((line, row) for line, row in chunk if row['role'] == 'customer'),
+                    lambda row: (row['name'], row['username'])), batch_size)
+            return count
+
+        return run_import(work, conn)
 
     @staticmethod
-    def import_users(file_path):
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor()
-            with open(file_path, 'r', encoding='utf-8') as file:
-                csv_reader = csv.DictReader(file)
-                for row in csv_reader:
-                    # Hash mật khẩu
-                    hashed_password = hashlib.sha256(
-                        row['password'].encode()).hexdigest()
-
-                    # Thêm user
-                    cursor.execute("""
-                        INSERT INTO users (username, password, role, email, phone)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (
-                        row['username'],
-                        hashed_password,
-                        row['role'],
-                        row['email'],
-                        row['phone']
-                    ))
-
-                    user_id = cursor.lastrowid
-
-                    # Thêm thông tin bổ sung tùy theo role
-                    if row['role'] == 'staff':
-                        cursor.execute("""
-                            INSERT INTO employees (user_id, name, position, salary)
-                            VALUES (?, ?, ?, ?)
-                        """, (
-                            user_id,
-                            row['name'],
-                            row['position'],
-                            float(row['salary'])
-                        ))
-                    elif row['role'] == 'customer':
-                        cursor.execute("""
-                            INSERT INTO customers (user_id, name)
-                            VALUES (?, ?)
-                        """, (user_id, row['name']))
-
-            conn.commit()
-            conn.close()
+    def import_tables(file_path, conn=None, batch_size=BATCH_SIZE):
+        def work(conn):
+            return bulk_insert(conn.cursor(), """
+                INSERT INTO tables (number, capacity, status)
+                VALUES (?, ?, ?)
+            """, convert_rows(read_csv(file_path), lambda row: (
+                int(row['number']),
+                int(row['capacity']),
+                row['status']
+            )), batch_size)
+
+        return run_import(work, conn)
 
     @staticmethod
-    def import_tables(file_path):
-        conn = create_connection()
-        if conn:
-            cursor = conn.cursor()
-            with open(file_path, 'r', encoding='utf-8') as file:
-                csv_reader = csv.DictReader(file)
-                for row in csv_reader:
-                    cursor.execute("""
-                        INSERT INTO tables (number, capacity, status)
-                        VALUES (?, ?, ?)
-                    """, (
-                        int(row['number']),
-                        int(row['capacity']),
-                        row['status']
-                    ))
-            conn.commit()
-            conn.close()
+    def import_inventory(file_path, conn=None, batch_size=BATCH_SIZE):
+        def work(conn):
+            return bulk_insert(conn.cursor(), """
+                INSERT INTO inventory (name, quantity, unit, threshold)
+                VALUES (?, ?, ?, ?)
+            """, convert_rows(read_csv(file_path), lambda row: (
+                row['name'],
+                int(row['quantity']),
+                row['unit'],
+                int(row['threshold'])
+            )), batch_size)
+
+        return run_import(work, conn)
 
     @staticmethod
-    def import_inventory(file_path):
-        conn = create_connection()
-        if conn:
+    def import_recipes(file_path, conn=None, batch_size=BATCH_SIZE):
+        """Cột menu_item và ingredient là tên món và tên nguyên liệu trong kho,
+        quantity là lượng nguyên liệu cho một phần món (theo đơn vị trong kho)"""
+        def work(conn):
             cursor = conn.cursor()
-            with open(file_path, 'r', encoding='utf-8') as file:
-                csv_reader = csv.DictReader(file)
-                for row in csv_reader:
-                    cursor.execute("""
-                        INSERT INTO inventory (name, quantity, unit, threshold)
-                        VALUES (?, ?, ?, ?)
-                    """, (
-                        row['name'],
-                        int(row['quantity']),
-                        row['unit'],
-                        int(row['threshold'])
-                    ))
-            conn.commit()
-            conn.close()
+            menu_items = name_ids(cursor, "menu_items")
+            ingredients = name_ids(cursor, "inventory")
+
+            def convert(row):
+                return (
+                    lookup_id(menu_items, row['menu_item'], "món"),
+                    lookup_id(ingredients, row['ingredient'], "nguyên liệu"),
+                    float(row['quantity'])
+                )
+
+            count = bulk_insert(cursor, """
+                INSERT INTO recipes (menu_item_id, inventory_id, quantity)
+                VALUES (?, ?, ?)
+            """, convert_rows(read_csv(file_path), convert), batch_size)
+            # Món vừa có công thức nhận trạng thái theo tồn kho hiện tại
+            menu_availability.refresh_all(conn)
+            return count
+
+        return run_import(work, conn)
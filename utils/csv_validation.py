@@ -0,0 +1,251 @@
+"""Kiểm tra file CSV trước khi import.
+
+Mỗi dòng được kiểm tra kiểu dữ liệu, giá trị bắt buộc, các giá trị liệt kê
+(role, trạng thái bàn/món, khớp với CHECK trong lược đồ) và email/số điện
+thoại bằng utils.validators. File lớn được chia thành từng khối và kiểm tra
+song song trong process pool; kết quả là danh sách lỗi theo dòng, không
+đọc hay ghi database.
+
+validate_and_import() kiểm tra xong mới import, nên file lỗi bị từ chối
+trước khi ghi dòng nào; dry_run=True chỉ kiểm tra.
+"""
+
+import csv
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.csv_importer import CSVImporter, chunked, read_csv
+from utils.validators import validate_email, validate_phone
+
+# Số dòng mỗi khối gửi cho một process
+CHUNK_SIZE = 20000
+
+# Số khối đang chờ mỗi process, giới hạn bộ nhớ khi đọc file lớn
+PENDING_PER_WORKER = 2
+
+# File nhỏ hơn kích thước này được kiểm tra luôn trong process hiện tại
+POOL_MIN_BYTES = 1024 * 1024
+
+ROLES = ('admin', 'staff', 'customer')
+TABLE_STATUSES = ('available', 'occupied', 'reserved')
+MENU_STATUSES = ('available', 'out_of_stock', 'discontinued')
+
+RowError = namedtuple('RowError', ['line', 'column', 'message'])
+
+
+class CSVValidationError(ValueError):
+    """File CSV có dòng không hợp lệ; errors là danh sách RowError"""
+
+    def __init__(self, errors, shown=10):
+        self.errors = errors
+        lines = [f"Dòng {e.line}, cột {e.column}: {e.message}" for e in errors[:shown]]
+        if len(errors) > shown:
+            lines.append(f"... và {len(errors) - shown} lỗi khác")
+        super().__init__(f"{len(errors)} lỗi trong file CSV:\n" + "\n".join(lines))
+
+
+class RowChecker:
+    """Gom lỗi của một dòng"""
+
+    def __init__(self, line, row):
+        self.line = line
+        self.row = row
+        self.errors = []
+
+    def error(self, column, message):
+        self.errors.append(RowError(self.line, column, message))
+
+    def text(self, column, required=True):
+        value = (self.row.get(column) or '').strip()
+        if required and not value:
+            self.error(column, "không được để trống")
+        return value
+
+    def number(self, column, parse=int, required=True):
+        value = self.text(column, required)
+        if not value:
+            return None
+        try:
+            number = parse(value)
+        except ValueError:
+            self.error(column, f"'{value}' không phải là số")
+            return None
+        if number < 0:
+            self.error(column, "không được âm")
+        return number
+
+    def choice(self, column, choices, required=True):
+        value = self.text(column, required)
+        if value and value not in choices:
+            self.error(column, f"'{value}' không hợp lệ (chọn: {', '.join(choices)})")
+        return value
+
+
+def check_category(check):
+    return check.text('name')
+
+
+def check_menu_item(check):
+    if 'category' in check.row:
+        check.text('category')
+    else:
+        check.number('category_id')
+    check.text('name')
+    check.number('price', float)
+    if 'status' in check.row:
+        check.choice('status', MENU_STATUSES, required=False)
+    elif check.row.get('available'):
+        check.choice('available', ('1', '0'))
+
+
+def check_user(check):
+    username = check.text('username')
+    check.text('password')
+    role = check.choice('role', ROLES)
+    email = check.text('email', required=False)
+    if email and not validate_email(email):
+        check.error('email', f"'{email}' không đúng định dạng email")
+    phone = check.text('phone', required=False)
+    if phone and not validate_phone(phone):
+        check.error('phone', f"'{phone}' phải có 10 chữ số và bắt đầu bằng 0")
+    if role in ('staff', 'customer'):
+        check.text('name')
+    if role == 'staff':
+        check.text('position')
+        check.number('salary', float)
+    return username
+
+
+def check_table(check):
+    number = check.number('number')
+    check.number('capacity')
+    check.choice('status', TABLE_STATUSES)
+    return number
+
+
+def check_inventory(check):
+    name = check.text('name')
+    check.number('quantity')
+    check.text('unit')
+    check.number('threshold')
+    return name
+
+
+def check_recipe(check):
+    menu_item = check.text('menu_item')
+    ingredient = check.text('ingredient')
+    quantity = check.number('quantity', float)
+    if quantity == 0:
+        check.error('quantity', "phải lớn hơn 0")
+    if menu_item and ingredient:
+        return f"{menu_item} / {ingredient}"
+    return None
+
+
+# Loại import -> (các cột bắt buộc, hàm kiểm tra trả về khóa UNIQUE hoặc None)
+SCHEMAS = {
+    'categories': (('name', 'description'), check_category),
+    'menu_items': (('name', 'description', 'price'), check_menu_item),
+    'users': (('username', 'password', 'role', 'email', 'phone'), check_user),
+    'tables': (('number', 'capacity', 'status'), check_table),
+    'inventory': (('name', 'quantity', 'unit', 'threshold'), check_inventory),
+    'recipes': (('menu_item', 'ingredient', 'quantity'), check_recipe),
+}
+
+
+def validate_chunk(kind, rows):
+    """Kiểm tra một khối dòng [(số dòng, dict)], trả về (lỗi, [(số dòng, khóa)]).
+
+    Hàm ở mức module để process pool gửi được sang process con.
+    """
+    check_row = SCHEMAS[kind][1]
+    errors = []
+    keys = []
+    for line, row in rows:
+        check = RowChecker(line, row)
+        key = check_row(check)
+        errors.extend(check.errors)
+        if key not in (None, ''):
+            keys.append((line, key))
+    return errors, keys
+
+
+def check_header(kind, file_path):
+    """Lỗi thiếu cột (dòng 1), hoặc [] nếu đủ cột"""
+    columns, _ = SCHEMAS[kind]
+    with open(file_path, 'r', encoding='utf-8', newline='') as file:
+        header = next(csv.reader(file), [])
+    missing = [column for column in columns if column not in header]
+    if kind == 'menu_items' and not {'category', 'category_id'} & set(header):
+        missing.append('category')
+    return [RowError(1, column, "thiếu cột") for column in missing]
+
+
+def validate_file(kind, file_path, workers=None, chunk_size=CHUNK_SIZE):
+    """Kiểm tra toàn bộ file, trả về danh sách RowError theo thứ tự dòng.
+
+    workers là số process (mặc định số CPU, hoặc 1 với file nhỏ hơn
+    POOL_MIN_BYTES); workers=1 kiểm tra ngay trong process hiện tại.
+    """
+    if kind not in SCHEMAS:
+        raise ValueError(f"Loại dữ liệu không hợp lệ: {kind}")
+    errors = check_header(kind, file_path)
+    if errors:
+        return errors
+
+    if workers is None:
+        small = os.path.getsize(file_path) < POOL_MIN_BYTES
+        workers = 1 if small else os.cpu_count() or 1
+    chunks = chunked(read_csv(file_path), chunk_size)
+    if workers == 1:
+        results = (validate_chunk(kind, chunk) for chunk in chunks)
+    else:
+        results = _validate_in_pool(kind, chunks, workers)
+
+    seen = {}
+    for chunk_errors, keys in results:
+        errors.extend(chunk_errors)
+        # Khóa trùng trong file sẽ làm hỏng ràng buộc UNIQUE khi import
+        for line, key in keys:
+            if key in seen:
+                errors.append(RowError(
+                    line, SCHEMAS[kind][0][0], f"'{key}' trùng với dòng {seen[key]}"))
+            else:
+                seen[key] = line
+    errors.sort(key=lambda error: error.line)
+    return errors
+
+
+def _validate_in_pool(kind, chunks, workers):
+    """Kết quả từng khối theo đúng thứ tự, chỉ đọc trước vài khối mỗi process"""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = []
+        for chunk in chunks:
+            pending.append(executor.submit(validate_chunk, kind, chunk))
+            if len(pending) >= workers * PENDING_PER_WORKER:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def write_error_report(errors, file_path):
+    """Ghi danh sách lỗi ra file CSV (line, column, message)"""
+    with open(file_path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(RowError._fields)
+        writer.writerows(errors)
+
+
+def validate_and_import(kind, file_path, dry_run=False, workers=None, conn=None):
+    """Kiểm tra file rồi import bằng CSVImporter.import_<kind>.
+
+    Ném CSVValidationError nếu có lỗi. dry_run=True dừng sau bước kiểm
+    tra (không mở database) và trả về None; ngược lại trả về ImportResult.
+    """
+    errors = validate_file(kind, file_path, workers)
+    if errors:
+        raise CSVValidationError(errors)
+    if dry_run:
+        return None
+    return getattr(CSVImporter, f"import_{kind}")(file_path, conn)
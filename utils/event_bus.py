@@ -0,0 +1,172 @@
+import json
+import os
+import random
+import uuid
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+
+SERVER_NAME = "coffee_shop_events"
+
+# Hub đang bận có thể nhận kết nối chậm: thử lại với thời gian chờ tăng dần
+# (mili giây) trước khi hẹn kết nối lại sau, không tự mở hub thứ hai
+CONNECT_TIMEOUT = 200
+CONNECT_RETRIES = 3
+RECONNECT_DELAY = 1000
+
+# Lỗi kết nối cho thấy chắc chắn không có hub nào đang chạy
+NO_HUB_ERRORS = (
+    QLocalSocket.LocalSocketError.ServerNotFoundError,
+    QLocalSocket.LocalSocketError.ConnectionRefusedError,
+)
+
+# Sự kiện vòng đời đơn hàng
+ORDER_CREATED = "order.created"
+ORDER_STATUS_CHANGED = "order.status_changed"
+ORDER_CANCELLED = "order.cancelled"
+
+# Menu thay đổi (thêm, xóa món hoặc đổi trạng thái)
+MENU_CHANGED = "menu.changed"
+
+# Số lượng nguyên liệu thay đổi (trừ theo đơn, nhập kho, thêm hoặc xóa
+# nguyên liệu), payload {"items": [StockChange dạng dict], "deleted": [id]};
+# nguyên liệu có level khác previous_level là nguyên liệu vừa đổi mức tồn
+# kho (nguyên liệu mới thêm có previous_level None), "deleted" chỉ có khi
+# xóa nguyên liệu
+STOCK_CHANGED = "inventory.stock_changed"
+
+# Món tự chuyển còn bán/hết hàng theo tồn kho, payload
+# {"items": [MenuChange dạng dict]}
+MENU_AVAILABILITY_CHANGED = "menu.availability_changed"
+
+_bus = None
+
+
+class EventBus(QObject):
+    """Kênh sự kiện giữa các cửa sổ trong process và giữa các process
+    (admin, nhân viên, khách) chạy trên cùng một máy.
+
+    Process đầu tiên mở QLocalServer và làm hub: nhận sự kiện từ một process
+    rồi chuyển tiếp cho các process còn lại. Các process sau kết nối tới hub
+    bằng QLocalSocket. Khi hub tắt, các process còn lại tự bầu hub mới.
+    Mỗi sự kiện là một dòng JSON {"topic", "payload", "origin"}.
+    """
+    event_received = pyqtSignal(str, dict)
+
+    def __init__(self, server_name=SERVER_NAME, parent=None):
+        super().__init__(parent)
+        self.server_name = server_name
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._server = None
+        self._socket = None
+        self._peers = []  # Các process đang kết nối tới hub này
+        self._buffers = {}
+        self._connect()
+
+    def is_hub(self):
+        return self._server is not None
+
+    def publish(self, topic, payload):
+        """Phát sự kiện cho mọi cửa sổ, kể cả cửa sổ trong process này"""
+        message = {"topic": topic, "payload": payload, "origin": self.origin}
+        self.event_received.emit(topic, payload)
+        self._forward(message)
+
+    def _connect(self):
+        for attempt in range(CONNECT_RETRIES):
+            socket = QLocalSocket(self)
+            socket.connectToServer(self.server_name)
+            if socket.waitForConnected(CONNECT_TIMEOUT * 2 ** attempt):
+                self._attach_client(socket)
+                return
+            error = socket.error()
+            socket.abort()
+            socket.deleteLater()
+            if error in NO_HUB_ERRORS:
+                self._become_hub(error)
+                return
+
+        # Hub vẫn còn nhưng chưa nhận kết nối: mở thêm hub sẽ tách kênh sự
+        # kiện làm hai, nên chỉ hẹn kết nối lại
+        QTimer.singleShot(RECONNECT_DELAY, self._connect)
+
+    def _become_hub(self, connect_error):
+        server = QLocalServer(self)
+        if not server.listen(self.server_name):
+            server.deleteLater()
+            if connect_error != QLocalSocket.LocalSocketError.ConnectionRefusedError:
+                # Process khác vừa mở hub trước: kết nối tới hub đó
+                QTimer.singleShot(random.randint(50, 500), self._connect)
+                return
+            # Tên còn sót lại từ process đã thoát không đúng cách (không còn
+            # ai nhận kết nối)
+            QLocalServer.removeServer(self.server_name)
+            server = QLocalServer(self)
+            if not server.listen(self.server_name):
+                print(f"Không thể mở kênh sự kiện: {server.errorString()}")
+                server.deleteLater()
+                return
+        server.newConnection.connect(self._on_new_connection)
+        self._server = server
+
+    def _attach_client(self, socket):
+        self._socket = socket
+        self._buffers[socket] = b""
+        socket.readyRead.connect(lambda: self._on_ready_read(socket))
+        socket.disconnected.connect(self._on_hub_lost)
+
+    def _on_hub_lost(self):
+        if self._socket is not None:
+            self._buffers.pop(self._socket, None)
+            self._socket.deleteLater()
+            self._socket = None
+        # Chờ ngẫu nhiên để các process không cùng lúc tranh làm hub
+        QTimer.singleShot(random.randint(50, 500), self._connect)
+
+    def _on_new_connection(self):
+        while self._server.hasPendingConnections():
+            peer = self._server.nextPendingConnection()
+            self._peers.append(peer)
+            self._buffers[peer] = b""
+            peer.readyRead.connect(lambda peer=peer: self._on_ready_read(peer))
+            peer.disconnected.connect(lambda peer=peer: self._on_peer_lost(peer))
+
+    def _on_peer_lost(self, peer):
+        if peer in self._peers:
+            self._peers.remove(peer)
+        self._buffers.pop(peer, None)
+        peer.deleteLater()
+
+    def _on_ready_read(self, socket):
+        data = self._buffers.get(socket, b"") + bytes(socket.readAll())
+        *lines, rest = data.split(b"\n")
+        self._buffers[socket] = rest
+        for line in lines:
+            if not line:
+                continue
+            try:
+                message = json.loads(line.decode("utf-8"))
+            except ValueError:
+                continue
+            if message.get("origin") == self.origin:
+                continue
+            self.event_received.emit(message["topic"], message["payload"])
+            if self.is_hub():
+                self._forward(message, exclude=socket)
+
+    def _forward(self, message, exclude=None):
+        data = json.dumps(message).encode("utf-8") + b"\n"
+        if self.is_hub():
+            for peer in self._peers:
+                if peer is not exclude:
+                    peer.write(data)
+        elif self._socket is not None:
+            self._socket.write(data)
+
+
+def get_event_bus():
+    """Lấy kênh sự kiện dùng chung của process (cần QApplication đã tạo)"""
+    global _bus
+    if _bus is None:
+        _bus = EventBus()
+    return _bus
@@ -0,0 +1,135 @@
+"""Chỉ mục TF-IDF của các món đang bán cho gợi ý đồ uống.
+
+Vector đếm từ của từng món được tính bằng HashingVectorizer (không cần
+học từ điển), nên khi menu thay đổi chỉ các món mới/sửa phải tách từ lại;
+IDF được tính từ số món chứa mỗi từ, cập nhật cộng/trừ theo món. Chỉ mục
+được lưu ra file để lần mở sau không phải tính lại từ đầu.
+"""
+
+import os
+import pickle
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+from models.menu_catalog import diff_items, load_recommendable_items
+
+N_FEATURES = 2 ** 18
+INDEX_VERSION = 1
+
+
+def get_index_path():
+    """Đường dẫn file chỉ mục, nằm cạnh database trong ~/.coffee_shop"""
+    app_dir = os.path.join(str(Path.home()), '.coffee_shop')
+    if not os.path.exists(app_dir):
+        os.makedirs(app_dir)
+    return os.path.join(app_dir, 'menu_index.pkl')
+
+
+def item_text(item):
+    return f"{item['name']} - {item['description']} - {item['category']}"
+
+
+class MenuIndex:
+    def __init__(self):
+        self.vectorizer = HashingVectorizer(
+            n_features=N_FEATURES, alternate_sign=False, norm=None)
+        self.items = {}   # id -> thông tin món (xem models/menu_catalog.py)
+        self.counts = {}  # id -> vector đếm từ (1 x N_FEATURES)
+        self.document_frequency = np.zeros(N_FEATURES, dtype=np.int32)
+        self.ids = []
+        self.matrix = None
+
+    def refresh(self, conn):
+        """Đồng bộ với bảng menu_items, trả về (số món mới/đổi, số món bị bỏ)"""
+        items = load_recommendable_items(conn)
+        changed, removed = diff_items(
+            {item_id: item["hash"] for item_id, item in self.items.items()}, items)
+
+        for item_id in removed + [i for i in changed if i in self.items]:
+            self.document_frequency[self.counts.pop(item_id).indices] -= 1
+            del self.items[item_id]
+
+        if changed:
+            counts = self.vectorizer.transform(
+                [item_text(items[item_id]) for item_id in changed]).tocsr()
+            for row, item_id in enumerate(changed):
+                self.items[item_id] = items[item_id]
+                self.counts[item_id] = counts[row]
+                self.document_frequency[counts[row].indices] += 1
+
+        if changed or removed or self.matrix is None:
+            self._build_matrix()
+        return len(changed), len(removed)
+
+    def idf(self):
+        # Cùng công thức với TfidfVectorizer(smooth_idf=True)
+        n = len(self.items)
+        return np.log((1 + n) / (1 + self.document_frequency)) + 1
+
+    def _build_matrix(self):
+        self.ids = sorted(self.items)
+        if not self.ids:
+            self.matrix = None
+            return
+        counts = sparse.vstack([self.counts[item_id] for item_id in self.ids])
+        self.matrix = normalize(counts.multiply(self.idf()).tocsr())
+
+    def transform(self, texts):
+        """Vector TF-IDF (chuẩn hóa L2) của các đoạn văn bản bất kỳ"""
+        counts = self.vectorizer.transform(texts)
+        return normalize(counts.multiply(self.idf()).tocsr())
+
+    def search(self, text, top_n=3):
+        """Các món gần với text nhất, giống nhất lên đầu"""
+        return self.search_many([text], top_n)[0]
+
+    def search_many(self, texts, top_n=3):
+        """Như search() cho nhiều câu cùng lúc bằng một phép nhân ma trận"""
+        if self.matrix is None:
+            return [[] for _ in texts]
+        similarities = (self.matrix @ self.transform(texts).T).toarray()
+        results = []
+        for column in similarities.T:
+            top_indices = column.argsort()[-top_n:][::-1]
+            results.append([self.items[self.ids[i]] for i in top_indices])
+        return results
+
+    def by_category(self):
+        """{danh mục: [món, ...]} để hiển thị menu"""
+        menu = {}
+        for item in sorted(self.items.values(),
+                           key=lambda item: (item["category"], item["name"])):
+            menu.setdefault(item["category"], []).append(item)
+        return menu
+
+    def save(self, path):
+        data = {
+            "version": INDEX_VERSION,
+            "items": self.items,
+            "counts": self.counts,
+            "document_frequency": self.document_frequency,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Đọc chỉ mục đã lưu; file hỏng hoặc khác phiên bản thì trả về chỉ mục rỗng"""
+        index = cls()
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return index
+        if data.get("version") != INDEX_VERSION:
+            return index
+        index.items = data["items"]
+        index.counts = data["counts"]
+        index.document_frequency = data["document_frequency"]
+        return index
@@ -0,0 +1,199 @@
+"""Import lịch sử đơn hàng (orders, order_items) từ hệ thống bán hàng cũ.
+
+Hai file, CSV hoặc Parquet (cần pyarrow hoặc pandas):
+
+- orders: order_ref, table_number, username, status, total_amount, created_at
+- order_items: order_ref, menu_item, quantity, price
+
+order_ref là mã đơn bên hệ thống cũ, dùng để nối chi tiết với đơn.
+Số bàn, username và tên món được đổi sang id bằng bảng tra trong bộ nhớ
+(username, số bàn để trống thì ghi NULL; total_amount để trống thì tính từ
+chi tiết đơn). Dữ liệu được đọc từng khối và ghi bằng executemany trong
+một transaction, sau đó bảng tổng hợp doanh số được tính lại cho khoảng
+ngày vừa import.
+"""
+
+import sqlite3
+from datetime import datetime
+
+from models import daily_sales
+from utils.csv_importer import (BATCH_SIZE, chunked, convert_rows, lookup_id,
+                                name_ids, read_csv, run_import)
+
+ORDER_STATUSES = ('pending', 'preparing', 'served', 'completed', 'cancelled')
+
+
+def read_parquet(file_path, batch_size=BATCH_SIZE):
+    """Đọc từng dòng Parquet dưới dạng dict, kèm số thứ tự dòng (từ 1)"""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        pq = None
+
+    if pq is not None:
+        batches = (batch.to_pylist() for batch in
+                   pq.ParquetFile(file_path).iter_batches(batch_size=batch_size))
+    else:
+        try:
+            import pandas as pd
+        except ImportError:
+            raise RuntimeError("Đọc file Parquet cần cài đặt pyarrow hoặc pandas")
+        # pandas không đọc được từng phần, cả file được nạp vào bộ nhớ
+        batches = [pd.read_parquet(file_path).to_dict('records')]
+
+    line_number = 0
+    for batch in batches:
+        for row in batch:
+            line_number += 1
+            yield line_number, row
+
+
+def read_rows(file_path, batch_size=BATCH_SIZE):
+    """Đọc CSV hoặc Parquet (theo đuôi file)"""
+    if file_path.lower().endswith(('.parquet', '.pq')):
+        return read_parquet(file_path, batch_size)
+    return read_csv(file_path)
+
+
+def text(value):
+    """Giá trị ô dưới dạng chuỗi đã bỏ khoảng trắng ('' nếu trống/NaN)"""
+    if value is None or value != value:  # NaN của pandas
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # Cột số nguyên có ô trống được pandas đọc thành float (5 -> 5.0)
+        value = int(value)
+    return str(value).strip()
+
+
+def parse_timestamp(value):
+    """Chuẩn hóa thời gian về 'YYYY-MM-DD HH:MM:SS' như cột created_at"""
+    if isinstance(value, datetime):
+        timestamp = value
+    else:
+        timestamp = datetime.fromisoformat(text(value))
+    return timestamp.strftime(daily_sales.DATETIME_FORMAT)
+
+
+def lookup(ids, value, label):
+    value = text(value)
+    if not value:
+        return None
+    return lookup_id(ids, value, label)
+
+
+class OrderHistoryImporter:
+    """Import đơn hàng cũ trên một kết nối đang mở transaction ghi"""
+
+    def __init__(self, conn, batch_size=BATCH_SIZE):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.batch_size = batch_size
+        # Tên món có thể trùng nhau: lookup báo lỗi thay vì chọn một món
+        self.table_ids = {str(number): table_id for number, table_id
+                          in name_ids(self.cursor, "tables", "number").items()}
+        self.user_ids = name_ids(self.cursor, "users", "username")
+        self.menu_ids = name_ids(self.cursor, "menu_items")
+
+    def import_orders(self, rows):
+        """Ghi các đơn, nhớ order_ref -> id mới trong bảng tạm; trả về số đơn"""
+        self.cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS import_order_refs (
+                ref TEXT PRIMARY KEY,
+                order_id INTEGER NOT NULL
+            )
+        """)
+        self.cursor.execute("DELETE FROM import_order_refs")
+        # Cấp id trước để ghi được cả đơn và mã tham chiếu bằng executemany;
+        # transaction ghi đang giữ khóa nên không process nào chen vào
+        next_id = self.cursor.execute(
+            "SELECT COALESCE(MAX(id), 0) + 1 FROM orders").fetchone()[0]
+
+        def convert(row):
+            status = text(row['status'])
+            if status not in ORDER_STATUSES:
+                raise ValueError(f"trạng thái '{status}' không hợp lệ")
+            total = text(row.get('total_amount'))
+            return (
+                text(row['order_ref']),
+                lookup(self.user_ids, row.get('username'), "người dùng"),
+                lookup(self.table_ids, row.get('table_number'), "bàn số"),
+                status,
+                float(total) if total else None,
+                parse_timestamp(row['created_at'])
+            )
+
+        count = 0
+        for chunk in chunked(convert_rows(rows, convert), self.batch_size):
+            ids = range(next_id, next_id + len(chunk))
+            next_id += len(chunk)
+            self.cursor.executemany("""
+                INSERT INTO orders (id, user_id, table_id, status, total_amount, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, [(order_id, *order[1:]) for order_id, order in zip(ids, chunk)])
+            try:
+                self.cursor.executemany("""
+                    INSERT INTO import_order_refs (ref, order_id) VALUES (?, ?)
+                """, [(order[0], order_id) for order_id, order in zip(ids, chunk)])
+            except sqlite3.IntegrityError as e:
+                raise ValueError(f"order_ref bị trùng ({e})")
+            count += len(chunk)
+        return count
+
+    def import_items(self, rows):
+        """Ghi chi tiết đơn, nối với đơn qua order_ref; trả về số dòng"""
+        def convert(row):
+            return (
+                lookup(self.menu_ids, row['menu_item'], "món"),
+                int(text(row['quantity'])),
+                float(text(row['price'])),
+                text(row['order_ref'])
+            )
+
+        count = 0
+        for chunk in chunked(convert_rows(rows, convert), self.batch_size):
+            self.cursor.executemany("""
+                INSERT INTO order_items (order_id, menu_item_id, quantity, price)
+                SELECT order_id, ?, ?, ? FROM import_order_refs WHERE ref = ?
+            """, chunk)
+            if self.cursor.rowcount != len(chunk):
+                raise ValueError("Có chi tiết đơn với order_ref không có trong file orders")
+            count += len(chunk)
+        return count
+
+    def finish(self):
+        """Tính tổng tiền còn thiếu và bảng tổng hợp; trả về số ngày đã tính lại"""
+        self.cursor.execute("""
+            UPDATE orders
+            SET total_amount = (
+                SELECT COALESCE(SUM(quantity * price), 0)
+                FROM order_items WHERE order_id = orders.id
+            )
+            WHERE total_amount IS NULL
+            AND id IN (SELECT order_id FROM import_order_refs)
+        """)
+        start, end = self.cursor.execute("""
+            SELECT MIN(o.created_at), MAX(o.created_at)
+            FROM import_order_refs r JOIN orders o ON o.id = r.order_id
+        """).fetchone()
+        self.cursor.execute("DROP TABLE import_order_refs")
+        if start is None:
+            return 0
+        return daily_sales.rebuild(self.conn, start[:10], end[:10])
+
+
+def import_order_history(orders_path, items_path, conn=None, batch_size=BATCH_SIZE):
+    """Import hai file đơn hàng và chi tiết trong một transaction.
+
+    Trả về (ImportResult, số ngày của bảng tổng hợp đã được tính lại).
+    """
+    days = []
+
+    def work(conn):
+        importer = OrderHistoryImporter(conn, batch_size)
+        count = importer.import_orders(read_rows(orders_path, batch_size))
+        count += importer.import_items(read_rows(items_path, batch_size))
+        days.append(importer.finish())
+        return count
+
+    result = run_import(work, conn)
+    return result, days[-1]
@@ -0,0 +1,148 @@
+"""Bộ nhớ đệm câu trả lời của trợ lý ảo.
+
+Khách hỏi đi hỏi lại cùng vài câu, mỗi lần chạy mô hình mất vài giây.
+Câu trả lời được lưu theo câu hỏi đã chuẩn hóa (chữ thường, bỏ dấu, bỏ
+dấu câu) với giới hạn số lượng (LRU) và thời gian sống (TTL), và được ghi
+ra file JSON để dùng lại giữa các lần mở ứng dụng.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+CACHE_SIZE = 256
+CACHE_TTL = 24 * 60 * 60  # giây
+
+
+def get_cache_path():
+    """Đường dẫn file cache, nằm cạnh database trong ~/.coffee_shop"""
+    app_dir = os.path.join(str(Path.home()), '.coffee_shop')
+    if not os.path.exists(app_dir):
+        os.makedirs(app_dir)
+    return os.path.join(app_dir, 'ai_response_cache.json')
+
+
+def fold_accents(text):
+    """Bỏ dấu tiếng Việt: 'giá cà phê' -> 'gia ca phe'"""
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    return ''.join(ch for ch in unicodedata.normalize('NFD', text)
+                   if not unicodedata.combining(ch))
+
+
+def normalize_key(text):
+    """Khóa cache của một câu hỏi: chữ thường, bỏ dấu và dấu câu"""
+    text = fold_accents(text.lower())
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return ' '.join(text.split())
+
+
+class ResponseCache:
+    """Cache LRU + TTL cho câu trả lời, an toàn khi dùng từ nhiều thread.
+
+    find_similar (tùy chọn) nhận câu hỏi và danh sách câu hỏi đã lưu, trả
+    về chỉ số câu gần giống nhất hoặc None; dùng khi không có khóa trùng.
+    Số lần trúng/trượt xem qua stats().
+    """
+
+    def __init__(self, path=None, max_size=CACHE_SIZE, ttl=CACHE_TTL,
+                 find_similar=None, clock=time.time):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self.find_similar = find_similar
+        self.clock = clock
+        self.lock = threading.Lock()
+        # key -> (câu hỏi gốc, câu trả lời, thời điểm lưu)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        if path:
+            self.load()
+
+    def get(self, question):
+        """Câu trả lời đã lưu cho câu hỏi, hoặc None"""
+        key = normalize_key(question)
+        with self.lock:
+            self._expire()
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][1]
+
+            if self.find_similar and self.entries:
+                keys = list(self.entries)
+                index = self.find_similar(
+                    question, [self.entries[k][0] for k in keys])
+                if index is not None:
+                    self.entries.move_to_end(keys[index])
+                    self.near_hits += 1
+                    return self.entries[keys[index]][1]
+
+            self.misses += 1
+            return None
+
+    def put(self, question, response):
+        key = normalize_key(question)
+        if not key:
+            return
+        with self.lock:
+            self.entries[key] = (question, response, self.clock())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        if self.path:
+            self.save()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+        if self.path:
+            self.save()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.near_hits) / lookups if lookups else 0.0,
+            }
+
+    def _expire(self):
+        deadline = self.clock() - self.ttl
+        # Mục cũ nhất theo thời gian lưu không nhất thiết đứng đầu (LRU) nên
+        # phải duyệt hết; cache nhỏ nên không đáng kể
+        for key in [k for k, entry in self.entries.items() if entry[2] < deadline]:
+            del self.entries[key]
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self.lock:
+            for key, question, response, saved_at in data.get("entries", []):
+                self.entries[key] = (question, response, saved_at)
+            self._expire()
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def save(self):
+        with self.lock:
+            data = {"entries": [[key, *entry] for key, entry in self.entries.items()]}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Không thể lưu cache câu trả lời: {e}")
@@ -0,0 +1,155 @@
+"""Sinh dữ liệu giả lập với khối lượng lớn để đo hiệu năng.
+
+Đơn hàng rải đều theo ngày nhưng dồn vào các giờ cao điểm (sáng, trưa,
+tối) như ở quán thật; phần lớn đơn đã hoàn thành, các đơn của ngày cuối
+còn đang xử lý. Mỗi món có công thức 2-4 nguyên liệu; đơn giả lập được ghi
+như lịch sử nên không trừ kho. Cùng seed cho ra cùng dữ liệu để so sánh
+giữa các lần đo.
+"""
+
+import hashlib
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from models import daily_sales
+
+CATEGORIES = ["Cà phê", "Trà", "Nước ép", "Sinh tố", "Bánh ngọt", "Đồ ăn nhẹ"]
+
+# Trọng số số đơn theo giờ mở cửa (7h-22h): cao điểm 8h, 12h và 18h-19h
+HOUR_WEIGHTS = {
+    7: 6, 8: 10, 9: 7, 10: 5, 11: 7, 12: 9, 13: 6, 14: 4,
+    15: 5, 16: 5, 17: 6, 18: 9, 19: 9, 20: 7, 21: 4, 22: 2,
+}
+
+# Tỉ lệ trạng thái của đơn các ngày trước
+PAST_STATUSES = {"completed": 93, "cancelled": 7}
+OPEN_STATUSES = ["pending", "preparing", "served"]
+
+CHUNK_SIZE = 10000
+
+
+def random_created_at(rng, day, hours, cum_weights):
+    hour = rng.choices(hours, cum_weights=cum_weights)[0]
+    moment = day + timedelta(hours=hour, minutes=rng.randrange(60),
+                             seconds=rng.randrange(60))
+    return moment.strftime(daily_sales.DATETIME_FORMAT)
+
+
+def generate_dataset(conn, tables=20, menu_items=60, customers=500, orders=100000,
+                     days=365, max_items=4, ingredients=30, seed=42, end=None):
+    """Ghi dữ liệu giả lập vào database (đã chạy migration) qua conn.
+
+    Đơn hàng trải trên days ngày kết thúc ở end (mặc định hôm nay). Nơi gọi
+    tự quản lý transaction. Trả về dict số dòng đã tạo theo bảng.
+    """
+    rng = random.Random(seed)
+    cursor = conn.cursor()
+    end = (end or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    first_day = end - timedelta(days=days - 1)
+
+    category_ids = []
+    for name in CATEGORIES:
+        cursor.execute("INSERT INTO categories (name, description) VALUES (?, ?)",
+                       (name, f"Các loại {name.lower()}"))
+        category_ids.append(cursor.lastrowid)
+
+    first_item = cursor.execute(
+        "SELECT COALESCE(MAX(id), 0) + 1 FROM menu_items").fetchone()[0]
+    menu = []
+    for i in range(menu_items):
+        category_id = category_ids[i % len(category_ids)]
+        menu.append((first_item + i, category_id,
+                     f"{CATEGORIES[i % len(CATEGORIES)]} số {i + 1}",
+                     f"Món thử nghiệm số {i + 1}",
+                     rng.randrange(20000, 80001, 5000), "available"))
+    cursor.executemany("""
+        INSERT INTO menu_items (id, category_id, name, description, price, status)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, menu)
+    first_ingredient = cursor.execute(
+        "SELECT COALESCE(MAX(id), 0) + 1 FROM inventory").fetchone()[0]
+    ingredient_ids = [first_ingredient + i for i in range(ingredients)]
+    cursor.executemany("""
+        INSERT INTO inventory (id, name, quantity, unit, threshold)
+        VALUES (?, ?, ?, 'gram', ?)
+    """, [(ingredient_id, f"Nguyên liệu số {ingredient_id}", 10 ** 9, 1000)
+          for ingredient_id in ingredient_ids])
+    recipes = [(item[0], ingredient_id, rng.choice((5, 10, 20, 50, 100)))
+               for item in menu
+               for ingredient_id in rng.sample(
+                   ingredient_ids, min(rng.randint(2, 4), ingredients))]
+    cursor.executemany("""
+        INSERT INTO recipes (menu_item_id, inventory_id, quantity) VALUES (?, ?, ?)
+    """, recipes)
+
+    # Món bán chạy theo phân phối lệch: vài món chiếm phần lớn đơn
+    item_weights = list(accumulate(1 / (rank + 1) for rank in range(menu_items)))
+
+    first_number = cursor.execute(
+        "SELECT COALESCE(MAX(number), 0) + 1 FROM tables").fetchone()[0]
+    cursor.executemany("""
+        INSERT INTO tables (number, capacity, status) VALUES (?, ?, 'available')
+    """, [(first_number + i, rng.choice((2, 4, 4, 6))) for i in range(tables)])
+    table_ids = [row[0] for row in cursor.execute(
+        "SELECT id FROM tables WHERE number >= ?", (first_number,))]
+
+    password = hashlib.sha256(b"benchmark").hexdigest()
+    cursor.executemany("""
+        INSERT INTO users (username, password, role) VALUES (?, ?, 'customer')
+    """, [(f"bench_customer_{seed}_{i}", password) for i in range(customers)])
+    user_ids = [row[0] for row in cursor.execute(
+        "SELECT id FROM users WHERE username LIKE ?", (f"bench_customer_{seed}_%",))]
+
+    hours = list(HOUR_WEIGHTS)
+    hour_weights = list(accumulate(HOUR_WEIGHTS.values()))
+    statuses = list(PAST_STATUSES)
+    status_weights = list(accumulate(PAST_STATUSES.values()))
+    next_order = cursor.execute(
+        "SELECT COALESCE(MAX(id), 0) + 1 FROM orders").fetchone()[0]
+    line_count = 0
+
+    for chunk_start in range(0, orders, CHUNK_SIZE):
+        order_rows = []
+        item_rows = []
+        for i in range(chunk_start, min(chunk_start + CHUNK_SIZE, orders)):
+            order_id = next_order + i
+            day = first_day + timedelta(days=i * days // orders)
+            if day == end:
+                status = rng.choice(OPEN_STATUSES + ["completed"])
+            else:
+                status = rng.choices(statuses, cum_weights=status_weights)[0]
+
+            total = 0
+            picked = rng.choices(menu, cum_weights=item_weights,
+                                 k=rng.randint(1, max_items))
+            for item in {item[0]: item for item in picked}.values():
+                quantity = rng.choice((1, 1, 1, 2, 3))
+                item_rows.append((order_id, item[0], quantity, item[4]))
+                total += quantity * item[4]
+            order_rows.append((
+                order_id, rng.choice(user_ids), rng.choice(table_ids), status,
+                total, random_created_at(rng, day, hours, hour_weights)))
+
+        cursor.executemany("""
+            INSERT INTO orders (id, user_id, table_id, status, total_amount, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, order_rows)
+        cursor.executemany("""
+            INSERT INTO order_items (order_id, menu_item_id, quantity, price)
+            VALUES (?, ?, ?, ?)
+        """, item_rows)
+        line_count += len(item_rows)
+
+    daily_sales.rebuild(conn, first_day.strftime(daily_sales.DATE_FORMAT),
+                        end.strftime(daily_sales.DATE_FORMAT))
+    return {
+        "categories": len(category_ids),
+        "menu_items": menu_items,
+        "inventory": ingredients,
+        "recipes": len(recipes),
+        "tables": tables,
+        "users": customers,
+        "orders": orders,
+        "order_items": line_count,
+    }
@@ -1,19 +1,192 @@
-from PyQt6.QtWidgets import (QHBoxLayout, QLabel, QPushButton, QTextEdit,
-                             QVBoxLayout, QWidget)
+import queue
+import threading
 
-from utils.ai_assistant import AIAssistant
+from PyQt6.QtCore import QObject, QThread, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtWidgets import (QApplication, QHBoxLayout, QLabel, QProgressBar,
+                             QPushButton, QTextEdit, QVBoxLayout, QWidget)
+
+from utils.assistant_service import connect_assistant
+from utils.event_bus import (MENU_AVAILABILITY_CHANGED, MENU_CHANGED,
+                             get_event_bus)
+from views.workers import Worker
+
+_loader = None
+
+
+class AssistantLoader(QObject):
+    """Kết nối tới dịch vụ trợ lý ảo ở thread nền, một lần cho cả process.
+
+    Mọi AIAssistantView trong process dùng chung loader này; mô hình nằm ở
+    dịch vụ dùng chung cho cả máy (xem utils/assistant_service.py), process
+    đầu tiên cần tới trợ lý sẽ mở dịch vụ và tải mô hình.
+    """
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.assistant = None
+        self.error = None
+        self.worker = None
+        self.refresh_worker = None
+        self.refresh_pending = False
+        # Cập nhật chỉ mục gợi ý khi menu thay đổi ở bất kỳ cửa sổ nào
+        get_event_bus().event_received.connect(self.on_event)
+
+    def is_loading(self):
+        return self.worker is not None
+
+    def load(self):
+        """Bắt đầu tải nếu chưa tải và chưa đang tải"""
+        if self.assistant is not None or self.is_loading():
+            return
+        self.error = None
+        self.worker = Worker(connect_assistant)
+        self.worker.signals.finished.connect(self.on_loaded)
+        self.worker.signals.error.connect(self.on_failed)
+        QThreadPool.globalInstance().start(self.worker)
+
+    def on_loaded(self, assistant):
+        self.worker = None
+        self.assistant = assistant
+        self.loaded.emit(assistant)
+
+    def on_failed(self, error):
+        self.worker = None
+        self.error = error
+        self.failed.emit(error)
+
+    def on_event(self, topic, payload):
+        if (topic in (MENU_CHANGED, MENU_AVAILABILITY_CHANGED)
+                and self.assistant is not None):
+            self.refresh_menu()
+
+    def refresh_menu(self):
+        """Cập nhật chỉ mục ở thread nền, gộp các lần đổi menu liên tiếp"""
+        if self.refresh_worker is not None:
+            self.refresh_pending = True
+            return
+        self.refresh_worker = Worker(self.assistant.refresh_menu)
+        self.refresh_worker.signals.finished.connect(self.on_menu_refreshed)
+        self.refresh_worker.signals.error.connect(self.on_menu_refreshed)
+        QThreadPool.globalInstance().start(self.refresh_worker)
+
+    def on_menu_refreshed(self, result):
+        self.refresh_worker = None
+        if self.refresh_pending:
+            self.refresh_pending = False
+            self.refresh_menu()
+
+
+def get_assistant_loader():
+    """Loader dùng chung của process (cần QApplication đã tạo)"""
+    global _loader
+    if _loader is None:
+        _loader = AssistantLoader()
+    return _loader
+
+
+class ChatWorker(QThread):
+    """Thread trả lời lần lượt các câu hỏi trong hàng đợi.
+
+    Câu trả lời được gửi về từng đoạn qua chunk_ready để hiện dần trên giao
+    diện. cancel_all() bỏ các câu hỏi đang chờ và dừng câu đang sinh.
+    """
+    reply_started = pyqtSignal(int)
+    chunk_ready = pyqtSignal(int, str)
+    reply_finished = pyqtSignal(int, bool)  # (mã câu hỏi, đã bị dừng)
+    reply_failed = pyqtSignal(int, str)
+
+    def __init__(self, assistant, parent=None):
+        super().__init__(parent)
+        self.assistant = assistant
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.current_stop = None
+        self.next_id = 0
+
+    def submit(self, message):
+        """Đưa câu hỏi vào hàng đợi, trả về mã câu hỏi"""
+        self.next_id += 1
+        self.requests.put((self.next_id, message, threading.Event()))
+        return self.next_id
+
+    def pending_count(self):
+        return self.requests.qsize()
+
+    def cancel_all(self):
+        while True:
+            try:
+                self.requests.get_nowait()
+            except queue.Empty:
+                break
+        with self.lock:
+            if self.current_stop is not None:
+                self.current_stop.set()
+
+    def shutdown(self):
+        self.cancel_all()
+        self.requests.put(None)
+        self.wait()
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            request_id, message, stop_event = request
+            with self.lock:
+                self.current_stop = stop_event
+
+            self.reply_started.emit(request_id)
+            try:
+                for chunk in self.assistant.stream_chat(message, stop_event):
+                    if stop_event.is_set():
+                        break
+                    self.chunk_ready.emit(request_id, chunk)
+            except Exception as e:
+                self.reply_failed.emit(request_id, str(e))
+            else:
+                self.reply_finished.emit(request_id, stop_event.is_set())
+            finally:
+                with self.lock:
+                    self.current_stop = None
 
 
 class AIAssistantView(QWidget):
     def __init__(self):
         super().__init__()
-        self.ai = AIAssistant()
+        # Mô hình chỉ được tải khi trang trợ lý được mở lần đầu
+        self.ai = None
+        self.chat_worker = None
+        self.recommend_worker = None
+        self.stats_worker = None
+        self.loader = get_assistant_loader()
+        self.loader.loaded.connect(self.on_assistant_loaded)
+        self.loader.failed.connect(self.on_assistant_failed)
         self.init_ui()
+        if self.loader.assistant is not None:
+            self.on_assistant_loaded(self.loader.assistant)
 
     def init_ui(self):
         """Khởi tạo giao diện"""
         layout = QVBoxLayout()
 
+        # Trạng thái tải mô hình
+        status_layout = QHBoxLayout()
+        self.status_label = QLabel("Trợ lý ảo sẽ được tải khi mở trang này.")
+        status_layout.addWidget(self.status_label)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)  # Không biết trước thời gian tải
+        self.progress_bar.setVisible(False)
+        status_layout.addWidget(self.progress_bar)
+        self.retry_button = QPushButton("Thử lại")
+        self.retry_button.clicked.connect(self.load_assistant)
+        self.retry_button.setVisible(False)
+        status_layout.addWidget(self.retry_button)
+        layout.addLayout(status_layout)
+
         # Chat area
         self.chat_history = QTextEdit()
         self.chat_history.setReadOnly(True)
@@ -24,10 +197,15 @@ class AIAssistantView(QWidget):
         input_layout = QHBoxLayout()
         self.chat_input = QTextEdit()
         self.chat_input.setMaximumHeight(50)
-        send_button = QPushButton("Gửi")
-        send_button.clicked.connect(self.send_message)
+        self.send_button = QPushButton("Gửi")
+        self.send_button.clicked.connect(self.send_message)
+        self.send_button.setEnabled(False)
+        self.stop_button = QPushButton("Dừng")
+        self.stop_button.clicked.connect(self.stop_replies)
+        self.stop_button.setEnabled(False)
         input_layout.addWidget(self.chat_input)
-        input_layout.addWidget(send_button)
+        input_layout.addWidget(self.send_button)
+        input_layout.addWidget(self.stop_button)
         layout.addLayout(input_layout)
 
         # Recommendation area
@@ -37,28 +215,137 @@ class AIAssistantView(QWidget):
         self.pref_input.setMaximumHeight(50)
         self.pref_input.setPlaceholderText(
             "Nhập sở thích của bạn (vd: đồ uống ngọt, có sữa)")
-        recommend_button = QPushButton("Gợi ý")
-        recommend_button.clicked.connect(self.get_recommendations)
+        self.recommend_button = QPushButton("Gợi ý")
+        self.recommend_button.clicked.connect(self.get_recommendations)
+        self.recommend_button.setEnabled(False)
         pref_layout.addWidget(self.pref_input)
-        pref_layout.addWidget(recommend_button)
+        pref_layout.addWidget(self.recommend_button)
         layout.addLayout(pref_layout)
 
         self.setLayout(layout)
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.ai is None and self.loader.error is None:
+            self.load_assistant()
+
+    def load_assistant(self):
+        self.status_label.setText("Đang tải mô hình AI...")
+        self.progress_bar.setVisible(True)
+        self.retry_button.setVisible(False)
+        self.loader.load()
+
+    def on_assistant_loaded(self, assistant):
+        self.ai = assistant
+        self.status_label.setText("Trợ lý ảo đã sẵn sàng.")
+        self.progress_bar.setVisible(False)
+        self.retry_button.setVisible(False)
+        self.send_button.setEnabled(True)
+        self.recommend_button.setEnabled(True)
+
+    def on_assistant_failed(self, error):
+        self.status_label.setText(f"Không thể tải mô hình AI: {error}")
+        self.progress_bar.setVisible(False)
+        self.retry_button.setVisible(True)
+
     def send_message(self):
-        """Xử lý gửi tin nhắn"""
+        """Xử lý gửi tin nhắn: câu trả lời được sinh ở thread riêng"""
         message = self.chat_input.toPlainText().strip()
-        if message:
+        if message and self.ai is not None:
+            if self.chat_worker is None:
+                self.start_chat_worker()
             self.chat_history.append(f"Bạn: {message}")
-            response = self.ai.chat_with_customer(message)
-            self.chat_history.append(f"AI: {response}\n")
+            self.chat_worker.submit(message)
             self.chat_input.clear()
+            self.stop_button.setEnabled(True)
+            self.update_queue_status()
+
+    def start_chat_worker(self):
+        self.chat_worker = ChatWorker(self.ai)
+        self.chat_worker.reply_started.connect(self.on_reply_started)
+        self.chat_worker.chunk_ready.connect(self.on_reply_chunk)
+        self.chat_worker.reply_finished.connect(self.on_reply_finished)
+        self.chat_worker.reply_failed.connect(self.on_reply_failed)
+        # Dừng thread trước khi ứng dụng thoát
+        QApplication.instance().aboutToQuit.connect(self.chat_worker.shutdown)
+        self.chat_worker.start()
+
+    def stop_replies(self):
+        if self.chat_worker is not None:
+            self.chat_worker.cancel_all()
+            self.update_queue_status()
+
+    def update_queue_status(self):
+        waiting = self.chat_worker.pending_count() if self.chat_worker else 0
+        if waiting:
+            self.status_label.setText(f"Đang trả lời, còn {waiting} câu hỏi chờ.")
+            return
+        self.status_label.setText("Trợ lý ảo đã sẵn sàng.")
+        # Thống kê cache là một yêu cầu HTTP tới dịch vụ nên lấy ở thread nền
+        if self.stats_worker is None:
+            self.stats_worker = Worker(self.ai.cache_stats)
+            self.stats_worker.signals.finished.connect(self.on_cache_stats)
+            self.stats_worker.signals.error.connect(
+                lambda error: self.on_cache_stats(None))
+            QThreadPool.globalInstance().start(self.stats_worker)
+
+    def on_cache_stats(self, stats):
+        self.stats_worker = None
+        # Bỏ qua nếu đã có câu hỏi mới xếp hàng trong lúc chờ
+        if stats is None or (self.chat_worker and self.chat_worker.pending_count()):
+            return
+        self.status_label.setText(
+            "Trợ lý ảo đã sẵn sàng. "
+            f"Cache: {stats['hits'] + stats['near_hits']} lần dùng lại, "
+            f"{stats['misses']} lần chạy mô hình.")
+
+    def insert_reply_text(self, text):
+        cursor = self.chat_history.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text)
+        self.chat_history.setTextCursor(cursor)
+        self.chat_history.ensureCursorVisible()
+
+    def on_reply_started(self, request_id):
+        self.chat_history.append("AI: ")
+        self.update_queue_status()
+
+    def on_reply_chunk(self, request_id, chunk):
+        self.insert_reply_text(chunk)
+
+    def on_reply_finished(self, request_id, stopped):
+        if stopped:
+            self.insert_reply_text(" (đã dừng)")
+        self.chat_history.append("")
+        self.on_reply_done()
+
+    def on_reply_failed(self, request_id, error):
+        self.insert_reply_text(f"Xin lỗi, tôi đang gặp vấn đề kỹ thuật: {error}")
+        self.chat_history.append("")
+        self.on_reply_done()
+
+    def on_reply_done(self):
+        self.update_queue_status()
+        if not self.chat_worker.pending_count():
+            self.stop_button.setEnabled(False)
 
     def get_recommendations(self):
-        """Lấy gợi ý đồ uống"""
+        """Lấy gợi ý đồ uống ở thread nền (dịch vụ có thể đang bận trả lời chat)"""
         preferences = self.pref_input.toPlainText().strip()
-        if preferences:
-            recommendations = self.ai.recommend_drinks(preferences)
-            self.chat_history.append(
-                f"\nGợi ý dựa trên sở thích '{preferences}':\n{recommendations}\n")
+        if preferences and self.ai is not None and self.recommend_worker is None:
+            self.recommend_button.setEnabled(False)
+            self.recommend_worker = Worker(self.ai.recommend_drinks, preferences)
+            self.recommend_worker.signals.finished.connect(
+                lambda recommendations: self.on_recommendations(
+                    preferences, recommendations))
+            self.recommend_worker.signals.error.connect(
+                lambda error: self.on_recommendations(
+                    preferences, f"Xin lỗi, không thể tạo gợi ý: {error}"))
+            QThreadPool.globalInstance().start(self.recommend_worker)
             self.pref_input.clear()
+
+    def on_recommendations(self, preferences, recommendations):
+        self.recommend_worker = None
+        self.recommend_button.setEnabled(True)
+        self.chat_history.append(
+            f"\nGợi ý dựa trên sở thích '{preferences}':\n{recommendations}\n")
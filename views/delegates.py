@@ -0,0 +1,81 @@
+from PyQt6.QtCore import QEvent, Qt, QTimer, pyqtSignal
+from PyQt6.QtWidgets import (QAbstractItemDelegate, QApplication, QComboBox,
+                             QStyle, QStyledItemDelegate, QStyleOptionButton)
+
+
+class ComboBoxDelegate(QStyledItemDelegate):
+    """Sửa một ô bằng combo box chỉ khi người dùng bấm vào ô đó.
+
+    choices là dict {giá trị trong database: nhãn hiển thị}. Khi chọn giá
+    trị khác, delegate phát value_selected(dòng, giá trị) thay vì tự ghi
+    vào model; manager cập nhật database rồi làm mới model.
+    """
+    value_selected = pyqtSignal(int, str)
+
+    def __init__(self, choices, parent=None):
+        super().__init__(parent)
+        self.choices = choices
+
+    def createEditor(self, parent, option, index):
+        combo = QComboBox(parent)
+        for value, label in self.choices.items():
+            combo.addItem(label, value)
+        combo.activated.connect(lambda: self._finish(combo))
+        return combo
+
+    def _finish(self, combo):
+        self.commitData.emit(combo)
+        self.closeEditor.emit(combo, QAbstractItemDelegate.EndEditHint.NoHint)
+
+    def setEditorData(self, editor, index):
+        value = index.data(Qt.ItemDataRole.EditRole)
+        editor.setCurrentIndex(max(editor.findData(value), 0))
+
+    def setModelData(self, editor, model, index):
+        value = editor.currentData()
+        if value != index.data(Qt.ItemDataRole.EditRole):
+            row = index.row()
+            # Chạy sau khi editor đóng vì manager có thể tải lại model
+            QTimer.singleShot(0, lambda: self.value_selected.emit(row, value))
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """Vẽ các nút bấm trong ô thay vì tạo QPushButton cho từng dòng.
+
+    Khi bấm, phát clicked(dòng, thứ tự nút).
+    """
+    clicked = pyqtSignal(int, int)
+
+    def __init__(self, labels, parent=None):
+        super().__init__(parent)
+        self.labels = labels
+
+    def _button_rects(self, rect):
+        width = rect.width() // len(self.labels)
+        return [rect.adjusted(i * width, 0, (i + 1) * width - rect.width(), 0)
+                .adjusted(2, 2, -2, -2)
+                for i in range(len(self.labels))]
+
+    def paint(self, painter, option, index):
+        widget = option.widget
+        style = widget.style() if widget else QApplication.style()
+        for label, rect in zip(self.labels, self._button_rects(option.rect)):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = label
+            button.state = QStyle.StateFlag.State_Enabled
+            style.drawControl(QStyle.ControlElement.CE_PushButton,
+                              button, painter, widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() != QEvent.Type.MouseButtonRelease:
+            return False
+        position = event.position().toPoint()
+        for i, rect in enumerate(self._button_rects(option.rect)):
+            if rect.contains(position):
+                row = index.row()
+                # Hộp thoại xác nhận mở sau khi view xử lý xong sự kiện chuột
+                QTimer.singleShot(
+                    0, lambda button=i: self.clicked.emit(row, button))
+                return True
+        return False
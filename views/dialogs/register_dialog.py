@@ -1,10 +1,9 @@
-import hashlib
-
 from PyQt6.QtCore import QPoint, Qt
 from PyQt6.QtWidgets import (QComboBox, QDialog, QLabel, QLineEdit,
                              QMessageBox, QPushButton, QVBoxLayout, QWidget)
 
-from config.database import create_connection
+from config.database import run_write
+from controllers import account_service
 from utils.styles import COLORS
 from utils.validators import validate_email, validate_phone
 
@@ -204,64 +203,18 @@ class RegisterDialog(QDialog):
         phone = self.phone_input.text()
         role = self.role_combo.currentText()
 
-        # Kiểm tra thông tin bắt buộc
-        if not all([username, password, email]):
-            QMessageBox.warning(
-                self, "Lỗi", "Vui lòng nhập đầy đủ thông tin bắt buộc!")
+        try:
+            run_write(lambda conn: account_service.register(
+                conn, username, password, email, phone, role))
+        except ValueError as e:
+            QMessageBox.warning(self, "Lỗi", str(e))
             return
-
-        # Kiểm tra định dạng email
-        if not validate_email(email):
+        except Exception as e:
+            print(e)
             QMessageBox.warning(
-                self, "Lỗi", "Email không đúng định dạng!\nVí dụ: example@gmail.com")
+                self, "Lỗi", "Không thể đăng ký tài khoản!")
             return
 
-        # Kiểm tra số điện thoại
-        if phone and not validate_phone(phone):
-            QMessageBox.warning(
-                self, "Lỗi", "Số điện thoại phải có 10 chữ số và bắt đầu bằng số 0!")
-            return
-
-        conn = create_connection()
-        if conn is not None:
-            try:
-                cursor = conn.cursor()
-                # Kiểm tra username và email đã tồn tại chưa
-                cursor.execute(
-                    "SELECT id FROM users WHERE username = ? OR email = ?", (username, email))
-                if cursor.fetchone():
-                    QMessageBox.warning(
-                        self, "Lỗi", "Tên đăng nhập hoặc email đã tồn tại!")
-                    return
-
-                # Thêm user mới
-                hashed_password = hashlib.sha256(password.encode()).hexdigest()
-                cursor.execute("""
-                    INSERT INTO users (username, password, role, email, phone)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (username, hashed_password, role, email, phone))
-
-                # Thêm thông tin bổ sung tùy theo role
-                user_id = cursor.lastrowid
-                if role == 'staff':
-                    cursor.execute("""
-                        INSERT INTO employees (user_id, name, position)
-                        VALUES (?, ?, ?)
-                    """, (user_id, username, "Nhân viên mới"))
-                else:  # customer
-                    cursor.execute("""
-                        INSERT INTO customers (user_id, name)
-                        VALUES (?, ?)
-                    """, (user_id, username))
-
-                conn.commit()
-                QMessageBox.information(
-                    self, "Thành công", "Đăng ký tài khoản thành công!")
-                self.accept()
-
-            except Exception as e:
-                print(e)
-                QMessageBox.warning(
-                    self, "Lỗi", "Không thể đăng ký tài khoản!")
-            finally:
-                conn.close()
+        QMessageBox.information(
+            self, "Thành công", "Đăng ký tài khoản thành công!")
+        self.accept()
@@ -1,10 +1,7 @@
-from datetime import datetime
-
 from PyQt6.QtWidgets import (QComboBox, QHBoxLayout, QHeaderView, QLabel,
                              QPushButton, QSpinBox, QTableWidget,
-                             QTableWidgetItem, QVBoxLayout)
+                             QVBoxLayout)
 
-from config.database import create_connection
 from views.managers.order_manager import OrderManager
 
 
@@ -69,55 +66,8 @@ class CustomerOrderManager(OrderManager):
         form_layout.addLayout(total_layout)
         layout.addLayout(form_layout)
 
-        # Bảng lịch sử đơn hàng
-        self.order_history_table = QTableWidget()
-        self.order_history_table.setColumnCount(5)  # Bỏ cột thao tác
-        self.order_history_table.setHorizontalHeaderLabels(
-            ["ID", "Bàn", "Thời gian", "Tổng tiền", "Trạng thái"])
-        self.order_history_table.horizontalHeader().setSectionResizeMode(
-            QHeaderView.ResizeMode.Stretch)
-        layout.addWidget(self.order_history_table)
+        # Bảng lịch sử đơn hàng (không có cột thao tác)
+        layout.addWidget(self.create_order_history())
 
         # Load lịch sử đơn hàng
         self.load_orders()
-
-    def load_orders(self):
-        conn = create_connection()
-        if conn is not None:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT o.id, t.number, o.created_at, o.total_amount, o.status
-                FROM orders o
-                LEFT JOIN tables t ON o.table_id = t.id
-                WHERE o.user_id = ?
-                ORDER BY o.created_at DESC
-            """, (self.user_id,))
-            orders = cursor.fetchall()
-
-            self.order_history_table.setRowCount(len(orders))
-            for i, order in enumerate(orders):
-                # ID
-                self.order_history_table.setItem(
-                    i, 0, QTableWidgetItem(str(order[0])))
-                # Bàn
-                self.order_history_table.setItem(
-                    i, 1, QTableWidgetItem(f"Bàn {order[1]}"))
-                # Thời gian
-                time = datetime.strptime(
-                    order[2], "%Y-%m-%d %H:%M:%S").strftime("%d/%m/%Y %H:%M")
-                self.order_history_table.setItem(i, 2, QTableWidgetItem(time))
-                # Tổng tiền
-                self.order_history_table.setItem(
-                    i, 3, QTableWidgetItem(f"{order[3]:,} VNĐ"))
-                # Trạng thái
-                status_map = {
-                    "pending": "Chờ xử lý",
-                    "preparing": "Đang chuẩn bị",
-                    "served": "Đã phục vụ",
-                    "completed": "Hoàn thành",
-                    "cancelled": "Đã hủy"
-                }
-                self.order_history_table.setItem(
-                    i, 4, QTableWidgetItem(status_map.get(order[4], order[4])))
-
-            conn.close()
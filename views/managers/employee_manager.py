@@ -1,11 +1,12 @@
-import hashlib
 import re
 
-from PyQt6.QtWidgets import (QComboBox, QHBoxLayout, QHeaderView, QLineEdit,
-                             QMessageBox, QPushButton, QSpinBox, QTableWidget,
-                             QTableWidgetItem, QVBoxLayout, QWidget)
+from PyQt6.QtWidgets import (QComboBox, QHBoxLayout, QLineEdit, QMessageBox,
+                             QPushButton, QSpinBox, QVBoxLayout, QWidget)
 
-from config.database import create_connection
+from config.database import create_connection, run_write
+from controllers import account_service
+from views.delegates import ButtonDelegate
+from views.table_model import Column, QueryTableModel, create_table_view
 
 
 class EmployeeManager(QWidget):
@@ -71,42 +72,33 @@ class EmployeeManager(QWidget):
         layout.addLayout(form_layout)
 
         # Bảng nhân viên
-        self.table = QTableWidget()
-        self.table.setColumnCount(8)
-        self.table.setHorizontalHeaderLabels(
-            ["ID", "Tên đăng nhập", "Họ tên", "Email", "SĐT", "Chức vụ", "Lương", "Thao tác"])
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.model = QueryTableModel([
+            Column("ID", 0),
+            Column("Tên đăng nhập", 1),
+            Column("Họ tên", 2),
+            Column("Email", 3),
+            Column("SĐT", 4),
+            Column("Chức vụ", 5),
+            Column("Lương", lambda emp: f"{emp[6]:,} VNĐ" if emp[6] else "0 VNĐ"),
+            Column("Thao tác", lambda emp: ""),
+        ], """
+            SELECT u.id, u.username, e.name, u.email, u.phone, e.position, e.salary
+            FROM users u
+            JOIN employees e ON u.id = e.user_id
+            WHERE u.role = 'staff'
+            ORDER BY e.name, u.id
+        """)
+        self.table = create_table_view(self.model)
+
+        # Nút xóa
+        self.delete_delegate = ButtonDelegate(["Xóa"], self.table)
+        self.delete_delegate.clicked.connect(
+            lambda row, button: self.delete_employee(row))
+        self.table.setItemDelegateForColumn(7, self.delete_delegate)
         layout.addWidget(self.table)
 
     def load_employees(self):
-        conn = create_connection()
-        if conn is not None:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT u.id, u.username, e.name, u.email, u.phone, e.position, e.salary
-                FROM users u
-                JOIN employees e ON u.id = e.user_id
-                WHERE u.role = 'staff'
-                ORDER BY e.name
-            """)
-            employees = cursor.fetchall()
-
-            self.table.setRowCount(len(employees))
-            for i, emp in enumerate(employees):
-                for j in range(7):
-                    value = emp[j]
-                    if j == 6:  # Lương
-                        value = f"{value:,} VNĐ" if value else "0 VNĐ"
-                    self.table.setItem(i, j, QTableWidgetItem(
-                        str(value) if value is not None else ""))
-
-                # Nút xóa
-                delete_button = QPushButton("Xóa")
-                delete_button.clicked.connect(
-                    lambda checked, row=i: self.delete_employee(row))
-                self.table.setCellWidget(i, 7, delete_button)
-
-            conn.close()
+        self.model.reload()
 
     def validate_email(self, email):
         """Kiểm tra định dạng email"""
@@ -138,64 +130,24 @@ class EmployeeManager(QWidget):
         position = self.position_input.currentText()
         salary = self.salary_input.value()
 
-        # Kiểm tra thông tin bắt buộc
-        if not all([username, password, name, email]):
-            QMessageBox.warning(
-                self, "Lỗi", "Vui lòng nhập đầy đủ thông tin bắt buộc!")
+        try:
+            run_write(lambda conn: account_service.add_employee(
+                conn, username, password, name, email, phone, position, salary))
+        except ValueError as e:
+            QMessageBox.warning(self, "Lỗi", str(e))
             return
-
-        # Kiểm tra định dạng email
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_pattern, email):
-            QMessageBox.warning(
-                self, "Lỗi", "Email không đúng định dạng!\nVí dụ: example@gmail.com")
-            return
-
-        # Kiểm tra số điện thoại
-        if phone and (not phone.isdigit() or len(phone) != 10):
-            QMessageBox.warning(
-                self, "Lỗi", "Số điện thoại phải có 10 chữ số!")
+        except Exception as e:
+            print(e)
+            QMessageBox.warning(self, "Lỗi", "Không thể thêm nhân viên!")
             return
 
-        conn = create_connection()
-        if conn is not None:
-            cursor = conn.cursor()
-            try:
-                # Kiểm tra username và email
-                cursor.execute(
-                    "SELECT id FROM users WHERE username = ? OR email = ?", (username, email))
-                if cursor.fetchone():
-                    QMessageBox.warning(
-                        self, "Lỗi", "Tên đăng nhập hoặc email đã tồn tại!")
-                    return
-
-                # Thêm user mới
-                hashed_password = hashlib.sha256(password.encode()).hexdigest()
-                cursor.execute("""
-                    INSERT INTO users (username, password, role, email, phone)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (username, hashed_password, 'staff', email, phone))
-
-                # Thêm thông tin employee
-                cursor.execute("""
-                    INSERT INTO employees (user_id, name, position, salary)
-                    VALUES (last_insert_rowid(), ?, ?, ?)
-                """, (name, position, salary))
-
-                conn.commit()
-                self.clear_inputs()
-                self.load_employees()
-                QMessageBox.information(
-                    self, "Thành công", "Đã thêm nhân viên mới!")
-
-            except Exception as e:
-                print(e)
-                QMessageBox.warning(self, "Lỗi", "Không thể thêm nhân viên!")
-            finally:
-                conn.close()
+        self.clear_inputs()
+        self.load_employees()
+        QMessageBox.information(
+            self, "Thành công", "Đã thêm nhân viên mới!")
 
     def delete_employee(self, row):
-        user_id = int(self.table.item(row, 0).text())
+        user_id = self.model.row_data(row)[0]
 
         reply = QMessageBox.question(self, "Xác nhận", "Bạn có chắc muốn xóa nhân viên này?",
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
@@ -1,13 +1,78 @@
-from datetime import datetime
-
-from PyQt6.QtCore import Qt
-from PyQt6.QtWidgets import (QComboBox, QDialog, QDoubleSpinBox, QHBoxLayout,
-                             QHeaderView, QLabel, QLineEdit, QMessageBox,
-                             QPushButton, QSpinBox, QTableWidget,
-                             QTableWidgetItem, QTabWidget, QVBoxLayout,
-                             QWidget)
-
-from config.database import create_connection
+from PyQt6.QtCore import QDate, Qt
+from PyQt6.QtGui import QBrush
+from PyQt6.QtWidgets import (QCheckBox, QComboBox, QDateEdit, QDialog,
+                             QDoubleSpinBox, QHBoxLayout, QLabel, QLineEdit,
+                             QMessageBox, QPushButton, QSpinBox, QTabWidget,
+                             QVBoxLayout, QWidget)
+
+from config.database import create_connection, get_connection, run_write
+from controllers import inventory_service
+from models import queries
+from models.inventory import (STOCK_LEVEL_LABELS, STOCK_LOW, STOCK_OUT,
+                              format_alert, level_alerts, stock_level)
+from models.inventory_history import PAGE_SIZE, fetch_history_page
+from utils.event_bus import (MENU_AVAILABILITY_CHANGED, STOCK_CHANGED,
+                             get_event_bus)
+from views.delegates import ButtonDelegate
+from views.table_model import (Column, LazyTableModel, QueryTableModel,
+                               create_table_view)
+
+
+LEVEL_COLORS = {
+    STOCK_OUT: QBrush(Qt.GlobalColor.red),
+    STOCK_LOW: QBrush(Qt.GlobalColor.yellow),
+}
+
+
+def inventory_status(item):
+    """Trạng thái tồn kho và màu nền tương ứng của một nguyên liệu"""
+    level = stock_level(item[2], item[4])  # quantity, threshold
+    return STOCK_LEVEL_LABELS[level], LEVEL_COLORS.get(level)
+
+
+def format_timestamp(timestamp):
+    # 'YYYY-MM-DD HH:MM:SS' -> 'DD/MM/YYYY HH:MM'
+    return f"{timestamp[8:10]}/{timestamp[5:7]}/{timestamp[:4]} {timestamp[11:16]}"
+
+
+def format_price(price):
+    # Dòng xuất kho theo đơn hàng không có đơn giá
+    return "" if price is None else f"{price:,} VNĐ"
+
+
+class InventoryHistoryModel(LazyTableModel):
+    """Lịch sử kho phân trang theo (timestamp, id) của dòng cuối đã tải"""
+
+    def __init__(self, columns, page_size=PAGE_SIZE, parent=None):
+        super().__init__(columns, page_size, parent)
+        self.filters = {}
+
+    def set_filters(self, filters):
+        self.filters = filters
+        self.reload()
+
+    def fetch_page(self, conn, loaded_rows, limit):
+        after = None
+        if loaded_rows:
+            after = (loaded_rows[-1][1], loaded_rows[-1][0])
+        return fetch_history_page(conn, after=after, limit=limit, **self.filters)
+
+    def fetch_newer(self):
+        """Chèn lên đầu các dòng mới ghi sau dòng đầu đã tải, giữ nguyên các
+        dòng đã tải (và vị trí cuộn)"""
+        rows = self.rows()
+        if not rows:
+            self.reload()
+            return
+        with get_connection() as conn:
+            newer = fetch_history_page(conn, before=(rows[0][1], rows[0][0]),
+                                       limit=self.page_size, **self.filters)
+        if len(newer) == self.page_size:
+            # Quá nhiều dòng mới, tải lại từ đầu
+            self.reload()
+            return
+        for row in reversed(newer):
+            self.insert_row(0, row)
 
 
 class ImportDialog(QDialog):
@@ -80,6 +145,10 @@ class InventoryManager(QWidget):
         super().__init__()
         self.init_ui()
 
+        # Báo ngay khi nguyên liệu qua ngưỡng, kể cả do đơn ở cửa sổ khác
+        self.event_bus = get_event_bus()
+        self.event_bus.event_received.connect(self.on_stock_event)
+
     def init_ui(self):
         layout = QVBoxLayout()
         self.setLayout(layout)
@@ -92,6 +161,13 @@ class InventoryManager(QWidget):
         inventory_layout = QVBoxLayout()
         inventory_tab.setLayout(inventory_layout)
 
+        # Danh sách nguyên liệu sắp hết/hết hàng
+        self.low_stock_label = QLabel()
+        self.low_stock_label.setWordWrap(True)
+        self.low_stock_label.setStyleSheet(
+            "background-color: #fff3cd; color: #856404; padding: 6px;")
+        inventory_layout.addWidget(self.low_stock_label)
+
         # Form nhập liệu
         form_layout = QHBoxLayout()
 
@@ -134,12 +210,24 @@ class InventoryManager(QWidget):
         inventory_layout.addLayout(form_layout)
 
         # Bảng kho
-        self.inventory_table = QTableWidget()
-        self.inventory_table.setColumnCount(7)
-        self.inventory_table.setHorizontalHeaderLabels(
-            ["ID", "Tên nguyên liệu", "Số lượng", "Đơn vị", "Ngưỡng cảnh báo", "Trạng thái", "Thao tác"])
-        self.inventory_table.horizontalHeader().setSectionResizeMode(
-            QHeaderView.ResizeMode.Stretch)
+        self.inventory_model = QueryTableModel([
+            Column("ID", 0),
+            Column("Tên nguyên liệu", 1),
+            Column("Số lượng", 2),
+            Column("Đơn vị", 3),
+            Column("Ngưỡng cảnh báo", 4),
+            Column("Trạng thái", lambda item: inventory_status(item)[0],
+                   background=lambda item: inventory_status(item)[1]),
+            Column("Thao tác", lambda item: ""),
+        ], "SELECT id, name, quantity, unit, threshold FROM inventory ORDER BY name, id",
+            sort_key=lambda item: (item[1], item[0]))
+        self.inventory_table = create_table_view(self.inventory_model)
+
+        # Nút nhập kho và nút xóa
+        self.inventory_actions = ButtonDelegate(
+            ["Nhập kho", "Xóa"], self.inventory_table)
+        self.inventory_actions.clicked.connect(self.on_inventory_action)
+        self.inventory_table.setItemDelegateForColumn(6, self.inventory_actions)
         inventory_layout.addWidget(self.inventory_table)
 
         # Tab Lịch sử nhập/xuất
@@ -147,13 +235,53 @@ class InventoryManager(QWidget):
         history_layout = QVBoxLayout()
         history_tab.setLayout(history_layout)
 
-        # Bảng lịch sử
-        self.history_table = QTableWidget()
-        self.history_table.setColumnCount(8)
-        self.history_table.setHorizontalHeaderLabels(
-            ["ID", "Ngày giờ", "Loại", "Sản phẩm", "Số lượng", "Đơn giá", "Nhà cung cấp", "Ghi chú"])
-        self.history_table.horizontalHeader().setSectionResizeMode(
-            QHeaderView.ResizeMode.Stretch)
+        # Bộ lọc lịch sử, được áp dụng ngay trong câu truy vấn
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Nguyên liệu:"))
+        self.history_item_filter = QComboBox()
+        self.history_item_filter.currentIndexChanged.connect(self.load_history)
+        filter_layout.addWidget(self.history_item_filter)
+
+        filter_layout.addWidget(QLabel("Loại:"))
+        self.history_type_filter = QComboBox()
+        self.history_type_filter.addItem("Tất cả", None)
+        self.history_type_filter.addItem("Nhập kho", "import")
+        self.history_type_filter.addItem("Xuất kho", "export")
+        self.history_type_filter.currentIndexChanged.connect(self.load_history)
+        filter_layout.addWidget(self.history_type_filter)
+
+        filter_layout.addWidget(QLabel("Nhà cung cấp:"))
+        self.history_supplier_filter = QLineEdit()
+        self.history_supplier_filter.setPlaceholderText("Nhập tên nhà cung cấp...")
+        self.history_supplier_filter.editingFinished.connect(self.load_history)
+        filter_layout.addWidget(self.history_supplier_filter)
+
+        self.history_date_filter = QCheckBox("Từ ngày:")
+        self.history_date_filter.toggled.connect(self.load_history)
+        filter_layout.addWidget(self.history_date_filter)
+        self.history_start_date = QDateEdit(QDate.currentDate().addDays(-30))
+        self.history_start_date.setCalendarPopup(True)
+        self.history_start_date.dateChanged.connect(self.on_history_date_changed)
+        filter_layout.addWidget(self.history_start_date)
+        filter_layout.addWidget(QLabel("đến"))
+        self.history_end_date = QDateEdit(QDate.currentDate())
+        self.history_end_date.setCalendarPopup(True)
+        self.history_end_date.dateChanged.connect(self.on_history_date_changed)
+        filter_layout.addWidget(self.history_end_date)
+        history_layout.addLayout(filter_layout)
+
+        # Bảng lịch sử, tải dần từng trang khi cuộn xuống
+        self.history_model = InventoryHistoryModel([
+            Column("ID", 0),
+            Column("Ngày giờ", lambda record: format_timestamp(record[1])),
+            Column("Loại", lambda record: "Nhập kho" if record[2] == "import" else "Xuất kho"),
+            Column("Sản phẩm", 3),
+            Column("Số lượng", 4),
+            Column("Đơn giá", lambda record: format_price(record[5])),
+            Column("Nhà cung cấp", 6),
+            Column("Ghi chú", 7),
+        ])
+        self.history_table = create_table_view(self.history_model)
         history_layout.addWidget(self.history_table)
 
         # Thêm các tab
@@ -166,97 +294,119 @@ class InventoryManager(QWidget):
         self.load_history()
 
     def load_inventory(self):
+        self.inventory_model.reload()
+        self.load_history_items()
+        self.load_low_stock()
+
+    def load_low_stock(self):
+        """Cập nhật dòng cảnh báo từ index một phần các nguyên liệu sắp hết"""
         conn = create_connection()
         if conn is not None:
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM inventory ORDER BY name")
-            items = cursor.fetchall()
+            items = conn.execute(queries.LOW_STOCK_ITEMS).fetchall()
+            conn.close()
 
-            self.inventory_table.setRowCount(len(items))
-            for i, item in enumerate(items):
-                for j in range(5):
-                    self.inventory_table.setItem(
-                        i, j, QTableWidgetItem(str(item[j])))
-
-                # Trạng thái
-                status = "Đủ hàng"
-                if item[2] <= 0:  # quantity <= 0
-                    status = "Hết hàng"
-                elif item[2] <= item[4]:  # quantity <= threshold
-                    status = "Sắp hết"
-
-                status_item = QTableWidgetItem(status)
-                if status == "Hết hàng":
-                    status_item.setBackground(Qt.GlobalColor.red)
-                elif status == "Sắp hết":
-                    status_item.setBackground(Qt.GlobalColor.yellow)
-                self.inventory_table.setItem(i, 5, status_item)
-
-                # Buttons
-                button_widget = QWidget()
-                button_layout = QHBoxLayout(button_widget)
-                button_layout.setContentsMargins(0, 0, 0, 0)
-
-                # Nút nhập kho
-                import_button = QPushButton("Nhập kho")
-                import_button.clicked.connect(
-                    lambda checked, row=i: self.show_import_dialog(row))
-                button_layout.addWidget(import_button)
-
-                # Nút xóa
-                delete_button = QPushButton("Xóa")
-                delete_button.clicked.connect(
-                    lambda checked, row=i: self.delete_item(row))
-                button_layout.addWidget(delete_button)
-
-                self.inventory_table.setCellWidget(i, 6, button_widget)
+            names = [f"{name} ({quantity:g} {unit})"
+                     for _, name, quantity, unit, _ in items]
+            self.low_stock_label.setText(
+                f"Cần nhập thêm {len(items)} nguyên liệu: {', '.join(names)}")
+            self.low_stock_label.setVisible(bool(items))
 
-            conn.close()
+    def on_stock_event(self, topic, payload):
+        if topic != STOCK_CHANGED:
+            return
+        # Mọi lần trừ/nhập kho đều cập nhật số lượng tại chỗ, kể cả khi chưa
+        # đổi mức; chỉ đọc lại danh sách sắp hết khi có nguyên liệu đổi mức
+        changes = payload["items"]
+        deleted = payload.get("deleted", [])
+        added = [change for change in changes if change["previous_level"] is None]
+        self.apply_stock_changes(changes, deleted)
+        if deleted:
+            # Lịch sử của nguyên liệu đã xóa cũng bị xóa
+            self.load_history()
+        else:
+            self.history_model.fetch_newer()
+        if added or deleted:
+            self.load_history_items()
+
+        alerts = level_alerts(changes)
+        if alerts or deleted:
+            self.load_low_stock()
+        if alerts:
+            self.low_stock_label.setToolTip(
+                "\n".join(format_alert(item) for item in alerts))
+
+    def apply_stock_changes(self, changes, deleted):
+        """Cập nhật các dòng của bảng kho theo payload sự kiện, theo id"""
+        loaded = {item[0]: item for item in self.inventory_model.rows()}
+        rows = []
+        missing = []
+        for change in changes:
+            item = loaded.get(change["inventory_id"])
+            if item is None:
+                missing.append(change["inventory_id"])
+            else:
+                rows.append((item[0], change["name"], change["quantity"],
+                             item[3], change["threshold"]))
+        if missing:
+            # Nguyên liệu mới thêm hoặc chưa tải: cần đọc thêm đơn vị
+            conn = create_connection()
+            if conn is not None:
+                placeholders = ", ".join("?" * len(missing))
+                rows += conn.execute(f"""
+                    SELECT id, name, quantity, unit, threshold FROM inventory
+                    WHERE id IN ({placeholders})
+                """, missing).fetchall()
+                conn.close()
+        self.inventory_model.apply_changes(rows)
+        self.inventory_model.remove_ids(deleted)
 
-    def load_history(self):
+    def load_history_items(self):
+        """Cập nhật danh sách nguyên liệu trong bộ lọc, giữ lựa chọn hiện tại"""
         conn = create_connection()
         if conn is not None:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT h.id, h.timestamp, h.type, i.name, h.quantity, h.price, h.supplier, h.note
-                FROM inventory_history h
-                JOIN inventory i ON h.inventory_id = i.id
-                ORDER BY h.timestamp DESC
-            """)
-            history = cursor.fetchall()
-
-            self.history_table.setRowCount(len(history))
-            for i, record in enumerate(history):
-                # ID
-                self.history_table.setItem(
-                    i, 0, QTableWidgetItem(str(record[0])))
-                # Thời gian
-                timestamp = datetime.strptime(record[1], "%Y-%m-%d %H:%M:%S")
-                self.history_table.setItem(i, 1, QTableWidgetItem(
-                    timestamp.strftime("%d/%m/%Y %H:%M")))
-                # Loại
-                type_text = "Nhập kho" if record[2] == "import" else "Xuất kho"
-                self.history_table.setItem(i, 2, QTableWidgetItem(type_text))
-                # Sản phẩm
-                self.history_table.setItem(i, 3, QTableWidgetItem(record[3]))
-                # Số lượng
-                self.history_table.setItem(
-                    i, 4, QTableWidgetItem(str(record[4])))
-                # Đơn giá
-                self.history_table.setItem(
-                    i, 5, QTableWidgetItem(f"{record[5]:,} VNĐ"))
-                # Nhà cung cấp
-                self.history_table.setItem(
-                    i, 6, QTableWidgetItem(record[6] or ""))
-                # Ghi chú
-                self.history_table.setItem(
-                    i, 7, QTableWidgetItem(record[7] or ""))
-
+            cursor.execute("SELECT id, name FROM inventory ORDER BY name")
+            items = cursor.fetchall()
             conn.close()
 
+            selected = self.history_item_filter.currentData()
+            self.history_item_filter.blockSignals(True)
+            self.history_item_filter.clear()
+            self.history_item_filter.addItem("Tất cả", None)
+            for item_id, name in items:
+                self.history_item_filter.addItem(name, item_id)
+            index = self.history_item_filter.findData(selected)
+            self.history_item_filter.setCurrentIndex(max(index, 0))
+            self.history_item_filter.blockSignals(False)
+
+    def history_filters(self):
+        filters = {
+            "inventory_id": self.history_item_filter.currentData(),
+            "history_type": self.history_type_filter.currentData(),
+            "supplier": self.history_supplier_filter.text().strip() or None,
+        }
+        if self.history_date_filter.isChecked():
+            start = self.history_start_date.date().toString("yyyy-MM-dd")
+            end = self.history_end_date.date().toString("yyyy-MM-dd")
+            filters["start"] = f"{start} 00:00:00"
+            filters["end"] = f"{end} 23:59:59"
+        return filters
+
+    def on_history_date_changed(self):
+        if self.history_date_filter.isChecked():
+            self.load_history()
+
+    def load_history(self):
+        self.history_model.set_filters(self.history_filters())
+
+    def on_inventory_action(self, row, button):
+        if button == 0:
+            self.show_import_dialog(row)
+        else:
+            self.delete_item(row)
+
     def show_import_dialog(self, row):
-        item_id = int(self.inventory_table.item(row, 0).text())
-        item_name = self.inventory_table.item(row, 1).text()
+        item_id, item_name = self.inventory_model.row_data(row)[:2]
 
         dialog = ImportDialog(item_id, item_name, self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
@@ -264,36 +414,29 @@ class InventoryManager(QWidget):
             self.import_inventory(item_id, data)
 
     def import_inventory(self, item_id, data):
-        conn = create_connection()
-        if conn is not None:
-            try:
-                cursor = conn.cursor()
-
-                # Cập nhật số lượng trong kho
-                cursor.execute("""
-                    UPDATE inventory
-                    SET quantity = quantity + ?
-                    WHERE id = ?
-                """, (data['quantity'], item_id))
-
-                # Thêm lịch sử nhập kho
-                cursor.execute("""
-                    INSERT INTO inventory_history
-                    (inventory_id, type, quantity, price, supplier, note, timestamp)
-                    VALUES (?, 'import', ?, ?, ?, ?, datetime('now', 'localtime'))
-                """, (item_id, data['quantity'], data['price'],
-                      data['supplier'], data['note']))
-
-                conn.commit()
-                self.load_inventory()
-                self.load_history()
-                QMessageBox.information(
-                    self, "Thành công", "Đã nhập kho thành công!")
-            except Exception as e:
-                print(e)
-                QMessageBox.warning(self, "Lỗi", "Không thể nhập kho!")
-            finally:
-                conn.close()
+        try:
+            result = run_write(lambda conn: inventory_service.import_stock(
+                conn, item_id, data['quantity'], data['price'],
+                data['supplier'], data['note']))
+        except ValueError as e:
+            QMessageBox.warning(self, "Lỗi", str(e))
+            return
+        except Exception as e:
+            print(e)
+            QMessageBox.warning(self, "Lỗi", "Không thể nhập kho!")
+            return
+
+        # Mọi cửa sổ (kể cả cửa sổ này) tự tải lại kho
+        self.event_bus.publish(STOCK_CHANGED, {
+            "items": [change._asdict() for change in result.stock_changes]
+        })
+        if result.menu_changes:
+            # Món vừa đủ nguyên liệu được bán lại ở các màn hình gọi món
+            self.event_bus.publish(MENU_AVAILABILITY_CHANGED, {
+                "items": [change._asdict() for change in result.menu_changes]
+            })
+        QMessageBox.information(
+            self, "Thành công", "Đã nhập kho thành công!")
 
     def add_item(self):
         name = self.name_input.text()
@@ -301,58 +444,49 @@ class InventoryManager(QWidget):
         unit = self.unit_input.currentText()
         threshold = self.threshold_input.value()
 
-        if not name:
-            QMessageBox.warning(self, "Lỗi", "Vui lòng nhập tên nguyên liệu!")
+        try:
+            change = run_write(lambda conn: inventory_service.add_item(
+                conn, name, quantity, unit, threshold))
+        except ValueError as e:
+            QMessageBox.warning(self, "Lỗi", str(e))
+            return
+        except Exception as e:
+            print(e)
+            QMessageBox.warning(self, "Lỗi", "Không thể thêm nguyên liệu!")
             return
 
-        conn = create_connection()
-        if conn is not None:
-            try:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO inventory (name, quantity, unit, threshold)
-                    VALUES (?, ?, ?, ?)
-                """, (name, quantity, unit, threshold))
-                conn.commit()
-
-                self.clear_inputs()
-                self.load_inventory()
-                QMessageBox.information(
-                    self, "Thành công", "Đã thêm nguyên liệu mới!")
-            except Exception as e:
-                print(e)
-                QMessageBox.warning(self, "Lỗi", "Không thể thêm nguyên liệu!")
-            finally:
-                conn.close()
+        self.clear_inputs()
+        # Mọi cửa sổ (kể cả cửa sổ này) tự thêm dòng vào bảng kho
+        self.event_bus.publish(STOCK_CHANGED, {"items": [change._asdict()]})
+        QMessageBox.information(
+            self, "Thành công", "Đã thêm nguyên liệu mới!")
 
     def delete_item(self, row):
-        item_id = int(self.inventory_table.item(row, 0).text())
+        item_id = self.inventory_model.row_data(row)[0]
 
         reply = QMessageBox.question(self, "Xác nhận", "Bạn có chắc muốn xóa nguyên liệu này?",
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
 
         if reply == QMessageBox.StandardButton.Yes:
-            conn = create_connection()
-            if conn is not None:
-                try:
-                    cursor = conn.cursor()
-                    # Xóa lịch sử trước
-                    cursor.execute(
-                        "DELETE FROM inventory_history WHERE inventory_id = ?", (item_id,))
-                    # Sau đó xóa item
-                    cursor.execute(
-                        "DELETE FROM inventory WHERE id = ?", (item_id,))
-                    conn.commit()
-                    self.load_inventory()
-                    self.load_history()
-                    QMessageBox.information(
-                        self, "Thành công", "Đã xóa nguyên liệu!")
-                except Exception as e:
-                    print(e)
-                    QMessageBox.warning(
-                        self, "Lỗi", "Không thể xóa nguyên liệu!")
-                finally:
-                    conn.close()
+            try:
+                menu_changes = run_write(
+                    lambda conn: inventory_service.delete_item(conn, item_id))
+            except ValueError as e:
+                QMessageBox.warning(self, "Lỗi", str(e))
+                return
+            except Exception as e:
+                print(e)
+                QMessageBox.warning(self, "Lỗi", "Không thể xóa nguyên liệu!")
+                return
+
+            # Mọi cửa sổ (kể cả cửa sổ này) tự bỏ dòng khỏi bảng kho
+            self.event_bus.publish(STOCK_CHANGED, {"items": [], "deleted": [item_id]})
+            if menu_changes:
+                # Món chỉ hết hàng vì nguyên liệu này được bán lại
+                self.event_bus.publish(MENU_AVAILABILITY_CHANGED, {
+                    "items": [change._asdict() for change in menu_changes]
+                })
+            QMessageBox.information(self, "Thành công", "Đã xóa nguyên liệu!")
 
     def clear_inputs(self):
         self.name_input.clear()
@@ -1,9 +1,18 @@
-from PyQt6.QtWidgets import (QComboBox, QHBoxLayout, QHeaderView, QLabel,
-                             QLineEdit, QMessageBox, QPushButton, QSpinBox,
-                             QTableWidget, QTableWidgetItem, QVBoxLayout,
+from PyQt6.QtWidgets import (QComboBox, QHBoxLayout, QLabel, QLineEdit,
+                             QMessageBox, QPushButton, QSpinBox, QVBoxLayout,
                              QWidget)
 
 from config.database import create_connection
+from utils.event_bus import (MENU_AVAILABILITY_CHANGED, MENU_CHANGED,
+                             get_event_bus)
+from views.delegates import ButtonDelegate, ComboBoxDelegate
+from views.table_model import Column, QueryTableModel, create_table_view
+
+STATUS_MAP = {
+    "available": "Có sẵn",
+    "out_of_stock": "Hết hàng",
+    "discontinued": "Ngừng kinh doanh"
+}
 
 
 class MenuManager(QWidget):
@@ -13,6 +22,9 @@ class MenuManager(QWidget):
         self.load_categories()
         self.load_menu_items()
 
+        # Trạng thái món có thể tự đổi theo tồn kho ở cửa sổ khác
+        get_event_bus().event_received.connect(self.on_menu_event)
+
     def init_ui(self):
         layout = QVBoxLayout()
         self.setLayout(layout)
@@ -95,11 +107,35 @@ class MenuManager(QWidget):
         layout.addLayout(menu_group)
 
         # Bảng menu
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels(
-            ["ID", "Danh mục", "Tên món", "Mô tả", "Giá", "Trạng thái", "Thao tác"])
-        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.model = QueryTableModel([
+            Column("ID", 0),
+            Column("Danh mục", 1),
+            Column("Tên món", 2),
+            Column("Mô tả", 3),
+            Column("Giá", lambda item: f"{item[4]:,} VNĐ"),
+            Column("Trạng thái", lambda item: STATUS_MAP.get(item[5], "Có sẵn"),
+                   edit_value=lambda item: item[5]),
+            Column("Thao tác", lambda item: ""),
+        ], """
+            SELECT m.id, c.name as category_name, m.name, m.description, m.price, m.status
+            FROM menu_items m
+            LEFT JOIN categories c ON m.category_id = c.id
+            ORDER BY c.name, m.name, m.id
+        """)
+        self.table = create_table_view(self.model)
+
+        # Bấm vào ô trạng thái để đổi trạng thái
+        self.status_delegate = ComboBoxDelegate(STATUS_MAP, self.table)
+        self.status_delegate.value_selected.connect(
+            lambda row, status: self.update_item_status(
+                self.model.row_data(row)[0], status))
+        self.table.setItemDelegateForColumn(5, self.status_delegate)
+
+        # Nút xóa
+        self.delete_delegate = ButtonDelegate(["Xóa"], self.table)
+        self.delete_delegate.clicked.connect(
+            lambda row, button: self.delete_menu_item(row))
+        self.table.setItemDelegateForColumn(6, self.delete_delegate)
         layout.addWidget(self.table)
 
     def load_categories(self):
@@ -140,60 +176,7 @@ class MenuManager(QWidget):
                 self, "Thành công", "Đã thêm danh mục mới!")
 
     def load_menu_items(self):
-        conn = create_connection()
-        if conn is not None:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT m.id, c.name as category_name, m.name, m.description, m.price, m.status
-                FROM menu_items m
-                LEFT JOIN categories c ON m.category_id = c.id
-                ORDER BY c.name, m.name
-            """)
-            items = cursor.fetchall()
-
-            self.table.setRowCount(len(items))
-            for i, item in enumerate(items):
-                # ID
-                self.table.setItem(i, 0, QTableWidgetItem(str(item[0])))
-                # Danh mục
-                self.table.setItem(i, 1, QTableWidgetItem(
-                    item[1] if item[1] else ""))
-                # Tên món
-                self.table.setItem(i, 2, QTableWidgetItem(item[2]))
-                # Mô tả
-                self.table.setItem(i, 3, QTableWidgetItem(
-                    item[3] if item[3] else ""))
-                # Giá
-                self.table.setItem(i, 4, QTableWidgetItem(f"{item[4]:,} VNĐ"))
-
-                # Trạng thái
-                status_map = {
-                    "available": "Có sẵn",
-                    "out_of_stock": "Hết hàng",
-                    "discontinued": "Ngừng kinh doanh"
-                }
-                status_combo = QComboBox()
-                status_combo.addItems(
-                    ["Có sẵn", "Hết hàng", "Ngừng kinh doanh"])
-                status_combo.setCurrentText(status_map.get(item[5], "Có sẵn"))
-
-                # Tạo mapping ngược để chuyển từ tiếng Việt sang giá trị trong database
-                reverse_status_map = {v: k for k, v in status_map.items()}
-
-                # Kết nối signal với lambda function để cập nhật trạng thái
-                status_combo.currentTextChanged.connect(
-                    lambda text, item_id=item[0]: self.update_item_status(
-                        item_id, reverse_status_map[text]))
-
-                self.table.setCellWidget(i, 5, status_combo)
-
-                # Nút xóa
-                delete_button = QPushButton("Xóa")
-                delete_button.clicked.connect(
-                    lambda checked, row=i: self.delete_menu_item(row))
-                self.table.setCellWidget(i, 6, delete_button)
-
-            conn.close()
+        self.model.reload()
 
     def add_item(self):
         category_name = self.category_combo.currentText()
@@ -237,6 +220,7 @@ class MenuManager(QWidget):
                 self.status_combo.setCurrentText("Có sẵn")
 
                 self.load_menu_items()
+                get_event_bus().publish(MENU_CHANGED, {"item_id": cursor.lastrowid})
                 QMessageBox.information(self, "Thành công", "Đã thêm món mới!")
             except Exception as e:
                 print(e)
@@ -255,6 +239,13 @@ class MenuManager(QWidget):
                     WHERE id = ?
                 """, (new_status, item_id))
                 conn.commit()
+                name, price = cursor.execute(
+                    "SELECT name, price FROM menu_items WHERE id = ?", (item_id,)
+                ).fetchone()
+                # Mọi cửa sổ (kể cả cửa sổ này) tự cập nhật món này
+                get_event_bus().publish(MENU_AVAILABILITY_CHANGED, {"items": [{
+                    "menu_item_id": item_id, "name": name, "price": price,
+                    "status": new_status}]})
                 QMessageBox.information(
                     self, "Thành công", "Đã cập nhật trạng thái!")
             except Exception as e:
@@ -264,8 +255,12 @@ class MenuManager(QWidget):
             finally:
                 conn.close()
 
+    def on_menu_event(self, topic, payload):
+        if topic == MENU_AVAILABILITY_CHANGED:
+            self.load_menu_items()
+
     def delete_menu_item(self, row):
-        item_id = int(self.table.item(row, 0).text())
+        item_id = self.model.row_data(row)[0]
 
         reply = QMessageBox.question(self, "Xác nhận", "Bạn có chắc muốn xóa món này?",
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
@@ -275,10 +270,13 @@ class MenuManager(QWidget):
             if conn is not None:
                 try:
                     cursor = conn.cursor()
+                    cursor.execute(
+                        "DELETE FROM recipes WHERE menu_item_id = ?", (item_id,))
                     cursor.execute(
                         "DELETE FROM menu_items WHERE id = ?", (item_id,))
                     conn.commit()
                     self.load_menu_items()
+                    get_event_bus().publish(MENU_CHANGED, {"item_id": item_id})
                     QMessageBox.information(self, "Thành công", "Đã xóa món!")
                 except Exception as e:
                     print(e)
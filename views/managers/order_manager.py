@@ -1,13 +1,46 @@
+from bisect import bisect_left
 from datetime import datetime
 
-from PyQt6.QtCore import QTimer
 from PyQt6.QtGui import QBrush, QColor, QIcon
 from PyQt6.QtWidgets import (QComboBox, QHBoxLayout, QHeaderView, QLabel,
                              QMessageBox, QPushButton, QSpinBox,
                              QSystemTrayIcon, QTableWidget, QTableWidgetItem,
                              QVBoxLayout, QWidget)
 
-from config.database import create_connection
+from config.database import create_connection, run_write
+from controllers import order_service
+from models import queries
+from models.inventory import STOCK_OK, format_alert, level_alerts
+from utils.event_bus import (MENU_AVAILABILITY_CHANGED, ORDER_CANCELLED,
+                             ORDER_CREATED, ORDER_STATUS_CHANGED,
+                             STOCK_CHANGED, get_event_bus)
+from views.delegates import ComboBoxDelegate
+from views.table_model import (Column, Descending, QueryTableModel,
+                               create_table_view)
+
+STATUS_MAP = {
+    "pending": "Chờ xử lý",
+    "preparing": "Đang chuẩn bị",
+    "served": "Đã phục vụ",
+    "completed": "Hoàn thành",
+    "cancelled": "Đã hủy"
+}
+# Mapping ngược để chuyển từ tiếng Việt sang giá trị trong database
+REVERSE_STATUS_MAP = {v: k for k, v in STATUS_MAP.items()}
+# Thứ tự trạng thái, khớp với CASE trong queries.STAFF_ORDERS
+STATUS_RANK = {status: rank for rank, status in enumerate(STATUS_MAP, 1)}
+STATUS_COLORS = {
+    "pending": QBrush(QColor("#FFF3CD")),  # Màu vàng nhạt
+    "preparing": QBrush(QColor("#CCE5FF")),  # Màu xanh nhạt
+    "served": QBrush(QColor("#D4EDDA")),  # Màu xanh lá nhạt
+    "completed": QBrush(QColor("#E2E3E5")),  # Màu xám nhạt
+    "cancelled": QBrush(QColor("#F8D7DA"))  # Màu đỏ nhạt
+}
+
+
+def product_label(name, price):
+    """Chuỗi hiển thị món trong danh sách sản phẩm, ví dụ 'Bạc xỉu - 35,000 VNĐ'"""
+    return f"{name} - {price:,} VNĐ"
 
 
 class OrderManager(QWidget):
@@ -15,19 +48,17 @@ class OrderManager(QWidget):
         super().__init__()
         self.user_id = user_id
         self.is_staff = is_staff
-        self.last_order_id = 0  # Lưu ID đơn hàng cuối cùng đã kiểm tra
         self.init_ui()
         self.current_order_items = []
 
-        # Tạo timer để cập nhật thời gian và kiểm tra đơn hàng mới
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.check_new_orders)
-        self.timer.start(5000)  # Kiểm tra mỗi 5 giây
-
         # Khởi tạo system tray icon cho thông báo
         self.tray_icon = QSystemTrayIcon(self)
         self.tray_icon.setIcon(QIcon("assets/icon.png"))
 
+        # Nhận sự kiện đơn hàng từ mọi cửa sổ thay vì kiểm tra định kỳ
+        self.event_bus = get_event_bus()
+        self.event_bus.event_received.connect(self.on_order_event)
+
     def init_ui(self):
         layout = QVBoxLayout()
         self.setLayout(layout)
@@ -86,14 +117,7 @@ class OrderManager(QWidget):
         layout.addLayout(form_layout)
 
         # Bảng lịch sử đơn hàng
-        self.order_history_table = QTableWidget()
-        # Thêm cột cho nút cập nhật trạng thái
-        self.order_history_table.setColumnCount(6)
-        self.order_history_table.setHorizontalHeaderLabels(
-            ["ID", "Bàn", "Thời gian", "Tổng tiền", "Trạng thái", "Thao tác"])
-        self.order_history_table.horizontalHeader().setSectionResizeMode(
-            QHeaderView.ResizeMode.Stretch)
-        layout.addWidget(self.order_history_table)
+        layout.addWidget(self.create_order_history())
 
         # Load lịch sử đơn hàng
         self.load_orders()
@@ -106,9 +130,13 @@ class OrderManager(QWidget):
                 "SELECT id, number, status FROM tables WHERE status = 'available' ORDER BY number")
             tables = cursor.fetchall()
 
+            # Giữ bàn đang chọn khi danh sách được tải lại do sự kiện
+            current_table = self.table_combo.currentText()
             self.tables = {f"Bàn {table[1]}": table[0] for table in tables}
             self.table_combo.clear()
             self.table_combo.addItems(self.tables.keys())
+            if current_table in self.tables:
+                self.table_combo.setCurrentText(current_table)
 
             conn.close()
 
@@ -124,13 +152,31 @@ class OrderManager(QWidget):
             """)
             products = cursor.fetchall()
 
-            self.products = {f"{product[1]} - {product[2]:,} VNĐ": {
+            self.products = {product_label(product[1], product[2]): {
                 "id": product[0], "price": product[2]} for product in products}
             self.product_combo.clear()
             self.product_combo.addItems(self.products.keys())
 
             conn.close()
 
+    def apply_menu_changes(self, changes):
+        """Thêm/bỏ đúng các món vừa đổi trạng thái khỏi danh sách sản phẩm,
+        giữ thứ tự theo tên và không truy vấn lại menu"""
+        for change in changes:
+            label = product_label(change["name"], change["price"])
+            index = self.product_combo.findText(label)
+            if change["status"] == "available":
+                if index != -1:
+                    continue
+                labels = [self.product_combo.itemText(i)
+                          for i in range(self.product_combo.count())]
+                self.product_combo.insertItem(bisect_left(labels, label), label)
+                self.products[label] = {"id": change["menu_item_id"],
+                                        "price": change["price"]}
+            elif index != -1:
+                self.product_combo.removeItem(index)
+                self.products.pop(label, None)
+
     def add_to_order(self):
         if not self.table_combo.currentText():
             QMessageBox.warning(self, "Lỗi", "Vui lòng chọn bàn trước!")
@@ -175,233 +221,183 @@ class OrderManager(QWidget):
         self.total_label.setText(f"Tổng tiền: {total:,} VNĐ")
 
     def complete_order(self):
-        if not self.current_order_items:
-            QMessageBox.warning(
-                self, "Lỗi", "Vui lòng thêm sản phẩm vào đơn hàng!")
-            return
-
         table_name = self.table_combo.currentText()
-        if not table_name:
-            QMessageBox.warning(self, "Lỗi", "Vui lòng chọn bàn!")
+        table_id = self.tables.get(table_name)
+        order_items = list(self.current_order_items)
+        created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        try:
+            # Tự thử lại nếu cửa sổ khác đang ghi vào database
+            commit = order_service.commit_order(
+                self.user_id, table_id, order_items, created_at)
+        except ValueError as e:
+            QMessageBox.warning(self, "Lỗi", str(e))
+            # Bàn có thể vừa được máy khác xếp khách
+            self.load_tables()
+            return
+        except Exception as e:
+            print(e)
+            QMessageBox.warning(self, "Lỗi", "Không thể tạo đơn hàng!")
             return
 
-        table_id = self.tables[table_name]
+        self.current_order_items = []
+        self.update_current_order_table()
 
-        conn = create_connection()
-        if conn is not None:
-            try:
-                cursor = conn.cursor()
-
-                # Tạo đơn hàng mới
-                total_amount = sum(item["quantity"] * item["price"]
-                                   for item in self.current_order_items)
-                cursor.execute("""
-                    INSERT INTO orders (user_id, table_id, total_amount, status, created_at)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (self.user_id, table_id, total_amount, "pending", datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-
-                order_id = cursor.lastrowid
-
-                # Thêm chi tiết đơn hàng
-                for item in self.current_order_items:
-                    cursor.execute("""
-                        INSERT INTO order_items (order_id, menu_item_id, quantity, price)
-                        VALUES (?, ?, ?, ?)
-                    """, (order_id, item["product_id"], item["quantity"], item["price"]))
-
-                # Cập nhật trạng thái bàn
-                cursor.execute("""
-                    UPDATE tables
-                    SET status = 'occupied'
-                    WHERE id = ?
-                """, (table_id,))
-
-                conn.commit()
-                self.current_order_items = []
-                self.update_current_order_table()
-                self.load_orders()
-                self.load_tables()  # Reload danh sách bàn trống
-
-                QMessageBox.information(
-                    self, "Thành công", "Đã hoàn tất đơn hàng!")
-            except Exception as e:
-                print(e)
-                QMessageBox.warning(self, "Lỗi", "Không thể tạo đơn hàng!")
-            finally:
-                conn.close()
+        # Mọi cửa sổ (kể cả cửa sổ này) tự tải lại đơn hàng và bàn trống
+        self.event_bus.publish(ORDER_CREATED, {
+            "order_id": commit.order_id,
+            "user_id": self.user_id,
+            "table": table_name,
+            "created_at": created_at
+        })
+        if commit.stock_changes:
+            self.event_bus.publish(STOCK_CHANGED, {
+                "items": [change._asdict() for change in commit.stock_changes]
+            })
+        if commit.menu_changes:
+            self.event_bus.publish(MENU_AVAILABILITY_CHANGED, {
+                "items": [change._asdict() for change in commit.menu_changes]
+            })
+
+        QMessageBox.information(
+            self, "Thành công", "Đã hoàn tất đơn hàng!")
 
     def update_order_status(self, order_id, new_status):
-        conn = create_connection()
-        if conn is not None:
-            try:
-                cursor = conn.cursor()
-
-                # Lấy table_id của đơn hàng
-                cursor.execute(
-                    "SELECT table_id FROM orders WHERE id = ?", (order_id,))
-                table_id = cursor.fetchone()[0]
-
-                # Cập nhật trạng thái đơn hàng
-                cursor.execute("""
-                    UPDATE orders
-                    SET status = ?
-                    WHERE id = ?
-                """, (new_status, order_id))
-
-                # Nếu đơn hàng hoàn thành hoặc hủy, cập nhật trạng thái bàn thành trống
-                if new_status in ['completed', 'cancelled']:
-                    cursor.execute("""
-                        UPDATE tables
-                        SET status = 'available'
-                        WHERE id = ?
-                    """, (table_id,))
-
-                conn.commit()
-                self.load_orders()  # Reload danh sách đơn hàng
-                QMessageBox.information(
-                    self, "Thành công", "Đã cập nhật trạng thái đơn hàng!")
-            except Exception as e:
-                print(e)
-                QMessageBox.warning(
-                    self, "Lỗi", "Không thể cập nhật trạng thái đơn hàng!")
-            finally:
-                conn.close()
+        try:
+            run_write(lambda conn: order_service.change_order_status(
+                conn, order_id, new_status))
+        except ValueError as e:
+            QMessageBox.warning(self, "Lỗi", str(e))
+            return
+        except Exception as e:
+            print(e)
+            QMessageBox.warning(
+                self, "Lỗi", "Không thể cập nhật trạng thái đơn hàng!")
+            return
+
+        topic = ORDER_CANCELLED if new_status == 'cancelled' else ORDER_STATUS_CHANGED
+        self.event_bus.publish(topic, {
+            "order_id": order_id,
+            "status": new_status
+        })
+        QMessageBox.information(
+            self, "Thành công", "Đã cập nhật trạng thái đơn hàng!")
+
+    def create_order_history(self):
+        """Bảng lịch sử đơn hàng, dữ liệu được tải dần khi cuộn xuống"""
+        columns = [
+            Column("ID", 0),
+            Column("Bàn", self.format_order_table),
+            Column("Thời gian", self.format_order_time),
+            Column("Tổng tiền", lambda order: f"{order[3]:,} VNĐ"),
+            # Đánh dấu màu cho trạng thái
+            Column("Trạng thái", lambda order: STATUS_MAP.get(order[4], order[4]),
+                   background=lambda order: STATUS_COLORS.get(order[4])),
+        ]
+        if self.is_staff:
+            # Cột cập nhật trạng thái, bấm vào ô để chọn trạng thái mới
+            columns.append(Column(
+                "Thao tác", lambda order: STATUS_MAP.get(order[4], order[4]),
+                edit_value=lambda order: order[4]))
+
+        self.order_model = QueryTableModel(
+            columns, queries.STAFF_ORDERS, sort_key=self.order_sort_key)
+        self.order_history_table = create_table_view(self.order_model)
+
+        if self.is_staff:
+            self.status_delegate = ComboBoxDelegate(
+                STATUS_MAP, self.order_history_table)
+            self.status_delegate.value_selected.connect(
+                lambda row, status: self.update_order_status(
+                    self.order_model.row_data(row)[0], status))
+            self.order_history_table.setItemDelegateForColumn(
+                5, self.status_delegate)
+        return self.order_history_table
 
     def load_orders(self):
+        """Tải lại danh sách đơn hàng từ đầu và đặt lại mốc revision"""
         conn = create_connection()
         if conn is not None:
             cursor = conn.cursor()
+            # Lấy mốc trước khi tải để không bỏ sót đơn thay đổi trong lúc tải
+            cursor.execute(queries.LATEST_ORDER_REVISION)
+            self.order_revision = cursor.fetchone()[0]
+            conn.close()
 
             # Nếu là nhân viên, hiển thị tất cả đơn hàng
             # Nếu là khách hàng, chỉ hiển thị đơn hàng của họ
             if self.is_staff:
-                cursor.execute("""
-                    SELECT o.id, t.number, o.created_at, o.total_amount, o.status,
-                           u.username as customer_name
-                    FROM orders o
-                    LEFT JOIN tables t ON o.table_id = t.id
-                    LEFT JOIN users u ON o.user_id = u.id
-                    ORDER BY
-                        CASE o.status
-                            WHEN 'pending' THEN 1
-                            WHEN 'preparing' THEN 2
-                            WHEN 'served' THEN 3
-                            WHEN 'completed' THEN 4
-                            WHEN 'cancelled' THEN 5
-                        END,
-                        o.created_at DESC
-                """)
+                self.order_model.set_query(queries.STAFF_ORDERS)
             else:
-                cursor.execute("""
-                    SELECT o.id, t.number, o.created_at, o.total_amount, o.status,
-                           u.username as customer_name
-                    FROM orders o
-                    LEFT JOIN tables t ON o.table_id = t.id
-                    LEFT JOIN users u ON o.user_id = u.id
-                    WHERE o.user_id = ?
-                    ORDER BY o.created_at DESC
-                """, (self.user_id,))
-
-            orders = cursor.fetchall()
-
-            self.order_history_table.setRowCount(len(orders))
-            for i, order in enumerate(orders):
-                # ID
-                self.order_history_table.setItem(
-                    i, 0, QTableWidgetItem(str(order[0])))
-                # Bàn và tên khách hàng (chỉ cho nhân viên)
-                table_text = f"Bàn {order[1]}"
-                if self.is_staff:
-                    table_text += f" - {order[5]}"  # Thêm tên khách hàng
-                self.order_history_table.setItem(
-                    i, 1, QTableWidgetItem(table_text))
-                # Thời gian
-                time = datetime.strptime(
-                    order[2], "%Y-%m-%d %H:%M:%S").strftime("%d/%m/%Y %H:%M")
-                self.order_history_table.setItem(i, 2, QTableWidgetItem(time))
-                # Tổng tiền
-                self.order_history_table.setItem(
-                    i, 3, QTableWidgetItem(f"{order[3]:,} VNĐ"))
-                # Trạng thái
-                status_map = {
-                    "pending": "Chờ xử lý",
-                    "preparing": "Đang chuẩn bị",
-                    "served": "Đã phục vụ",
-                    "completed": "Hoàn thành",
-                    "cancelled": "Đã hủy"
-                }
-                status_item = QTableWidgetItem(
-                    status_map.get(order[4], order[4]))
-
-                # Đánh dấu màu cho trạng thái
-                if order[4] == "pending":
-                    status_item.setBackground(
-                        QBrush(QColor("#FFF3CD")))  # Màu vàng nhạt
-                elif order[4] == "preparing":
-                    status_item.setBackground(
-                        QBrush(QColor("#CCE5FF")))  # Màu xanh nhạt
-                elif order[4] == "served":
-                    status_item.setBackground(
-                        QBrush(QColor("#D4EDDA")))  # Màu xanh lá nhạt
-                elif order[4] == "completed":
-                    status_item.setBackground(
-                        QBrush(QColor("#E2E3E5")))  # Màu xám nhạt
-                elif order[4] == "cancelled":
-                    status_item.setBackground(
-                        QBrush(QColor("#F8D7DA")))  # Màu đỏ nhạt
-
-                self.order_history_table.setItem(i, 4, status_item)
-
-                if self.is_staff:
-                    # Thêm nút cập nhật trạng thái
-                    action_widget = QWidget()
-                    action_layout = QHBoxLayout(action_widget)
-                    action_layout.setContentsMargins(0, 0, 0, 0)
-
-                    status_combo = QComboBox()
-                    status_combo.addItems(
-                        ["Chờ xử lý", "Đang chuẩn bị", "Đã phục vụ", "Hoàn thành", "Đã hủy"])
-                    current_status = status_map.get(order[4], order[4])
-                    status_combo.setCurrentText(current_status)
-
-                    # Tạo mapping ngược để chuyển từ tiếng Việt sang giá trị trong database
-                    reverse_status_map = {v: k for k, v in status_map.items()}
-
-                    # Kết nối signal với lambda function để cập nhật trạng thái
-                    status_combo.currentTextChanged.connect(
-                        lambda text, order_id=order[0]: self.update_order_status(
-                            order_id, reverse_status_map[text]))
-
-                    action_layout.addWidget(status_combo)
-                    self.order_history_table.setCellWidget(i, 5, action_widget)
+                self.order_model.set_query(queries.USER_ORDERS, (self.user_id,))
 
-            conn.close()
+    def refresh_orders(self):
+        """Chỉ tải các đơn thay đổi sau mốc revision và cập nhật đúng các dòng đó"""
+        if not hasattr(self, "order_revision"):
+            self.load_orders()
+            return
 
-    def check_new_orders(self):
-        """Kiểm tra đơn hàng mới và hiển thị thông báo"""
         conn = create_connection()
-        if conn is not None:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT o.id, t.number, o.created_at
-                FROM orders o
-                LEFT JOIN tables t ON o.table_id = t.id
-                WHERE o.id > ? AND o.status = 'pending'
-                ORDER BY o.id DESC
-                LIMIT 1
-            """, (self.last_order_id,))
-
-            new_order = cursor.fetchone()
-            if new_order:
-                order_id, table_number, created_at = new_order
-                self.last_order_id = order_id
-
-                # Hiển thị thông báo
-                message = f"Đơn hàng mới từ Bàn {table_number}\nThời gian: {created_at}"
+        if conn is None:
+            return
+        cursor = conn.cursor()
+        if self.is_staff:
+            cursor.execute(queries.ORDERS_CHANGED_SINCE, (self.order_revision,))
+        else:
+            cursor.execute(queries.USER_ORDERS_CHANGED_SINCE,
+                           (self.order_revision, self.user_id))
+        changed = cursor.fetchall()
+        conn.close()
+
+        if changed:
+            self.order_model.apply_changes(changed)
+            self.order_revision = max(self.order_revision, changed[-1][6])
+
+    def order_sort_key(self, order):
+        """Khóa sắp xếp giống ORDER BY của truy vấn: đơn chờ xử lý lên đầu
+        (chỉ với nhân viên), sau đó mới nhất lên đầu"""
+        rank = STATUS_RANK.get(order[4], len(STATUS_RANK)) if self.is_staff else 0
+        # So sánh chuỗi created_at như SQLite, id lớn hơn lên trước khi trùng
+        return (rank, Descending(order[2]), -order[0])
+
+    def format_order_table(self, order):
+        # Bàn và tên khách hàng (chỉ cho nhân viên)
+        table_text = f"Bàn {order[1]}"
+        if self.is_staff:
+            table_text += f" - {order[5]}"  # Thêm tên khách hàng
+        return table_text
+
+    def format_order_time(self, order):
+        # 'YYYY-MM-DD HH:MM:SS' -> 'DD/MM/YYYY HH:MM'
+        created_at = order[2]
+        return f"{created_at[8:10]}/{created_at[5:7]}/{created_at[:4]} {created_at[11:16]}"
+
+    def on_order_event(self, topic, payload):
+        """Cập nhật giao diện khi có đơn hàng mới hoặc đổi trạng thái"""
+        if topic == STOCK_CHANGED and self.is_staff:
+            # Chỉ báo nguyên liệu vừa xuống dưới ngưỡng, bỏ qua khi vừa nhập thêm
+            alerts = [item for item in level_alerts(payload["items"])
+                      if item["level"] != STOCK_OK]
+            if alerts:
                 self.tray_icon.showMessage(
-                    "Đơn hàng mới", message, QSystemTrayIcon.MessageIcon.Information)
+                    "Nguyên liệu sắp hết",
+                    "\n".join(format_alert(item) for item in alerts),
+                    QSystemTrayIcon.MessageIcon.Warning)
+            return
 
-                # Cập nhật bảng đơn hàng
-                self.load_orders()
+        if topic == MENU_AVAILABILITY_CHANGED:
+            self.apply_menu_changes(payload["items"])
+            return
 
-            conn.close()
+        if topic not in (ORDER_CREATED, ORDER_STATUS_CHANGED, ORDER_CANCELLED):
+            return
+
+        if topic == ORDER_CREATED and self.is_staff:
+            # Hiển thị thông báo
+            message = f"Đơn hàng mới từ {payload['table']}\nThời gian: {payload['created_at']}"
+            self.tray_icon.showMessage(
+                "Đơn hàng mới", message, QSystemTrayIcon.MessageIcon.Information)
+
+        # Cập nhật các đơn vừa thay đổi và danh sách bàn trống
+        self.refresh_orders()
+        self.load_tables()
@@ -3,20 +3,25 @@ from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import \
     FigureCanvasQTAgg as FigureCanvas
-from PyQt6.QtWidgets import (QCalendarWidget, QComboBox, QHBoxLayout,
-                             QHeaderView, QLabel, QLineEdit, QTableWidget,
-                             QTableWidgetItem, QTabWidget, QVBoxLayout,
-                             QWidget)
+from PyQt6.QtCore import QThreadPool
+from PyQt6.QtWidgets import (QCalendarWidget, QComboBox, QHBoxLayout, QLabel,
+                             QLineEdit, QTabWidget, QVBoxLayout, QWidget)
 
-from config.database import create_connection
+from models.daily_sales import load_sales_summary
+from views.table_model import Column, LazyTableModel, create_table_view
+from views.workers import DatabaseWorker
 
 
 class ReportManager(QWidget):
     def __init__(self):
         super().__init__()
-        self.init_ui()
+        # Một thread riêng cho báo cáo, yêu cầu mới luôn thay thế yêu cầu cũ
+        self.thread_pool = QThreadPool()
+        self.thread_pool.setMaxThreadCount(1)
+        self.report_task = None
         self.category_data = []  # Lưu dữ liệu gốc của bảng danh mục
         self.item_data = []  # Lưu dữ liệu gốc của bảng món
+        self.init_ui()
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -83,12 +88,13 @@ class ReportManager(QWidget):
         category_layout.addLayout(category_search_layout)
 
         # Bảng thống kê theo danh mục
-        self.category_table = QTableWidget()
-        self.category_table.setColumnCount(4)
-        self.category_table.setHorizontalHeaderLabels(
-            ["Danh mục", "Số lượng đơn", "Doanh thu", "Tỷ lệ"])
-        self.category_table.horizontalHeader().setSectionResizeMode(
-            QHeaderView.ResizeMode.Stretch)
+        self.category_model = LazyTableModel([
+            Column("Danh mục", 0),
+            Column("Số lượng đơn", 1),
+            Column("Doanh thu", 2),
+            Column("Tỷ lệ", 3),
+        ])
+        self.category_table = create_table_view(self.category_model)
         category_layout.addWidget(self.category_table)
 
         # Biểu đồ tròn theo danh mục
@@ -111,12 +117,13 @@ class ReportManager(QWidget):
         item_layout.addLayout(item_search_layout)
 
         # Bảng thống kê theo món
-        self.item_table = QTableWidget()
-        self.item_table.setColumnCount(4)
-        self.item_table.setHorizontalHeaderLabels(
-            ["Món", "Số lượng đã bán", "Doanh thu", "Tỷ lệ"])
-        self.item_table.horizontalHeader().setSectionResizeMode(
-            QHeaderView.ResizeMode.Stretch)
+        self.item_model = LazyTableModel([
+            Column("Món", 0),
+            Column("Số lượng đã bán", 1),
+            Column("Doanh thu", 2),
+            Column("Tỷ lệ", 3),
+        ])
+        self.item_table = create_table_view(self.item_model)
         item_layout.addWidget(self.item_table)
 
         # Biểu đồ top 10 món bán chạy
@@ -168,21 +175,13 @@ class ReportManager(QWidget):
     def search_category(self, text):
         """Tìm kiếm trong bảng danh mục"""
         text = text.lower()
-        self.category_table.setRowCount(0)
         filtered_data = []
 
         for row in self.category_data:
             if text in row[0].lower():  # Tìm trong tên danh mục
                 filtered_data.append(row)
 
-        self.category_table.setRowCount(len(filtered_data))
-        for i, row in enumerate(filtered_data):
-            name, order_count, revenue, percentage = row
-            self.category_table.setItem(i, 0, QTableWidgetItem(name))
-            self.category_table.setItem(
-                i, 1, QTableWidgetItem(str(order_count)))
-            self.category_table.setItem(i, 2, QTableWidgetItem(revenue))
-            self.category_table.setItem(i, 3, QTableWidgetItem(percentage))
+        self.category_model.set_rows(filtered_data)
 
         # Cập nhật biểu đồ tròn với dữ liệu đã lọc
         if filtered_data:
@@ -191,20 +190,13 @@ class ReportManager(QWidget):
     def search_item(self, text):
         """Tìm kiếm trong bảng món"""
         text = text.lower()
-        self.item_table.setRowCount(0)
         filtered_data = []
 
         for row in self.item_data:
             if text in row[0].lower():  # Tìm trong tên món
                 filtered_data.append(row)
 
-        self.item_table.setRowCount(len(filtered_data))
-        for i, row in enumerate(filtered_data):
-            name, quantity, revenue, percentage = row
-            self.item_table.setItem(i, 0, QTableWidgetItem(name))
-            self.item_table.setItem(i, 1, QTableWidgetItem(str(quantity)))
-            self.item_table.setItem(i, 2, QTableWidgetItem(revenue))
-            self.item_table.setItem(i, 3, QTableWidgetItem(percentage))
+        self.item_model.set_rows(filtered_data)
 
         # Cập nhật biểu đồ cột với top 10 của dữ liệu đã lọc
         if filtered_data:
@@ -222,7 +214,7 @@ class ReportManager(QWidget):
         ax.pie(revenues, labels=names, autopct='%1.1f%%')
         ax.set_title("Tỷ lệ doanh thu theo danh mục")
         self.category_figure.tight_layout()
-        self.category_canvas.draw()
+        self.category_canvas.draw_idle()
 
     def update_item_chart(self, data):
         """Cập nhật biểu đồ cột món"""
@@ -238,188 +230,155 @@ class ReportManager(QWidget):
         ax.set_ylabel("Số lượng đã bán")
         plt.xticks(rotation=45, ha='right')
         self.item_figure.tight_layout()
-        self.item_canvas.draw()
+        self.item_canvas.draw_idle()
 
     def load_statistics(self):
+        """Tính số liệu báo cáo trên thread nền, hủy yêu cầu cũ nếu còn chạy"""
         start_date, end_date = self.get_date_range()
 
-        conn = create_connection()
-        if conn is not None:
-            cursor = conn.cursor()
-
-            # Thống kê tổng quan
-            cursor.execute("""
-                SELECT COUNT(*) as total_orders,
-                       SUM(total_amount) as total_revenue
-                FROM orders
-                WHERE created_at BETWEEN ? AND ?
-                AND status = 'completed'
-            """, (start_date, end_date))
-
-            result = cursor.fetchone()
-            total_orders = result[0] or 0
-            total_revenue = result[1] or 0
-            avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
-
-            self.total_orders.setText(f"Tổng số đơn: {total_orders}")
-            self.total_revenue.setText(f"Doanh thu: {total_revenue:,.0f} VNĐ")
-            self.avg_order_value.setText(
-                f"Giá trị trung bình: {avg_order_value:,.0f} VNĐ")
-
-            # Biểu đồ doanh thu theo thời gian
-            cursor.execute("""
-                SELECT DATE(created_at) as date,
-                       COUNT(*) as order_count,
-                       SUM(total_amount) as daily_revenue
-                FROM orders
-                WHERE created_at BETWEEN ? AND ?
-                AND status = 'completed'
-                GROUP BY DATE(created_at)
-                ORDER BY date
-            """, (start_date, end_date))
-
-            dates = []
-            revenues = []
-            for row in cursor.fetchall():
-                dates.append(datetime.strptime(
-                    row[0], "%Y-%m-%d").strftime("%d/%m"))
-                revenues.append(row[2])
-
-            self.revenue_figure.clear()
-            ax = self.revenue_figure.add_subplot(111)
-            ax.bar(dates, revenues)
-            ax.set_title("Doanh thu theo ngày")
-            ax.set_xlabel("Ngày")
-            ax.set_ylabel("Doanh thu (VNĐ)")
-            plt.xticks(rotation=45)
-            self.revenue_figure.tight_layout()
-            self.revenue_canvas.draw()
-
-            # Thống kê theo danh mục
-            cursor.execute("""
-                SELECT c.name,
-                       COUNT(DISTINCT o.id) as order_count,
-                       SUM(oi.quantity * oi.price) as revenue
-                FROM categories c
-                JOIN menu_items m ON m.category_id = c.id
-                JOIN order_items oi ON oi.menu_item_id = m.id
-                JOIN orders o ON oi.order_id = o.id
-                WHERE o.created_at BETWEEN ? AND ?
-                AND o.status = 'completed'
-                GROUP BY c.id, c.name
-                ORDER BY revenue DESC
-            """, (start_date, end_date))
-
-            categories = cursor.fetchall()
-            self.category_table.setRowCount(len(categories))
-
-            # Lưu dữ liệu gốc của bảng danh mục
-            self.category_data = []
-            category_names = []
-            category_revenues = []
-
-            for i, category in enumerate(categories):
-                name, order_count, revenue = category
-                percentage = (revenue / total_revenue *
-                              100) if total_revenue > 0 else 0
-
-                row_data = (
-                    name,
-                    order_count,
-                    f"{revenue:,.0f} VNĐ",
-                    f"{percentage:.1f}%"
-                )
-                self.category_data.append(row_data)
-
-                self.category_table.setItem(
-                    i, 0, QTableWidgetItem(row_data[0]))
-                self.category_table.setItem(
-                    i, 1, QTableWidgetItem(str(row_data[1])))
-                self.category_table.setItem(
-                    i, 2, QTableWidgetItem(row_data[2]))
-                self.category_table.setItem(
-                    i, 3, QTableWidgetItem(row_data[3]))
-
-                # Thêm dữ liệu cho biểu đồ tròn
-                category_names.append(name)
-                category_revenues.append(revenue if revenue else 0)
-
-            # Vẽ biểu đồ tròn danh mục
-            self.category_figure.clear()
-            ax = self.category_figure.add_subplot(111)
-
-            # Chỉ vẽ biểu đồ nếu có dữ liệu
-            if category_revenues:
-                ax.pie(category_revenues,
-                       labels=category_names, autopct='%1.1f%%')
-                ax.set_title("Tỷ lệ doanh thu theo danh mục")
-            else:
-                ax.text(0.5, 0.5, "Không có dữ liệu", ha='center', va='center')
-
-            self.category_figure.tight_layout()
-            self.category_canvas.draw()
-
-            # Thống kê theo món
-            cursor.execute("""
-                SELECT m.name,
-                       SUM(oi.quantity) as total_quantity,
-                       SUM(oi.quantity * oi.price) as revenue
-                FROM menu_items m
-                JOIN order_items oi ON oi.menu_item_id = m.id
-                JOIN orders o ON oi.order_id = o.id
-                WHERE o.created_at BETWEEN ? AND ?
-                AND o.status = 'completed'
-                GROUP BY m.id, m.name
-                ORDER BY revenue DESC
-            """, (start_date, end_date))
-
-            items = cursor.fetchall()
-            self.item_table.setRowCount(len(items))
-
-            # Lưu dữ liệu gốc của bảng món
-            self.item_data = []
-            item_names = []
-            item_quantities = []
-
-            for i, item in enumerate(items):
-                name, quantity, revenue = item
-                percentage = (revenue / total_revenue *
-                              100) if total_revenue > 0 else 0
-
-                row_data = (
-                    name,
-                    quantity if quantity else 0,
-                    f"{revenue:,.0f} VNĐ" if revenue else "0 VNĐ",
-                    f"{percentage:.1f}%"
-                )
-                self.item_data.append(row_data)
-
-                self.item_table.setItem(i, 0, QTableWidgetItem(row_data[0]))
-                self.item_table.setItem(
-                    i, 1, QTableWidgetItem(str(row_data[1])))
-                self.item_table.setItem(i, 2, QTableWidgetItem(row_data[2]))
-                self.item_table.setItem(i, 3, QTableWidgetItem(row_data[3]))
-
-                # Thêm dữ liệu cho biểu đồ cột (chỉ lấy top 10)
-                if i < 10:
-                    item_names.append(name)
-                    item_quantities.append(quantity if quantity else 0)
-
-            # Vẽ biểu đồ top 10 món bán chạy
-            self.item_figure.clear()
-            ax = self.item_figure.add_subplot(111)
-
-            # Chỉ vẽ biểu đồ nếu có dữ liệu
-            if item_quantities:
-                ax.bar(item_names, item_quantities)
-                ax.set_title("Top 10 món bán chạy nhất")
-                ax.set_xlabel("Tên món")
-                ax.set_ylabel("Số lượng đã bán")
-                plt.xticks(rotation=45, ha='right')
-            else:
-                ax.text(0.5, 0.5, "Không có dữ liệu", ha='center', va='center')
-
-            self.item_figure.tight_layout()
-            self.item_canvas.draw()
-
-            conn.close()
+        if self.report_task is not None:
+            # Yêu cầu cũ còn trong hàng đợi thì bỏ luôn, đang chạy thì ngắt
+            self.thread_pool.tryTake(self.report_task)
+            self.report_task.cancel()
+
+        # Ngày trọn vẹn đọc từ bảng tổng hợp, chỉ ngày lẻ mới quét orders
+        task = DatabaseWorker(load_sales_summary, start_date, end_date)
+        task.signals.finished.connect(
+            lambda summary, task=task: self.on_statistics_loaded(task, summary))
+        task.signals.error.connect(
+            lambda message, task=task: self.on_statistics_failed(task, message))
+        self.report_task = task
+
+        self.total_orders.setText("Tổng số đơn: đang tải...")
+        self.thread_pool.start(task)
+
+    def on_statistics_loaded(self, task, summary):
+        # Bỏ qua kết quả của yêu cầu đã bị thay thế
+        if task is not self.report_task:
+            return
+        self.report_task = None
+        self.show_statistics(summary)
+
+    def on_statistics_failed(self, task, message):
+        if task is not self.report_task:
+            return
+        self.report_task = None
+        print(message)
+        self.total_orders.setText("Tổng số đơn: lỗi khi tải dữ liệu")
+
+    def show_statistics(self, summary):
+        # Thống kê tổng quan
+        total_orders = summary["total_orders"]
+        total_revenue = summary["total_revenue"]
+        avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
+
+        self.total_orders.setText(f"Tổng số đơn: {total_orders}")
+        self.total_revenue.setText(f"Doanh thu: {total_revenue:,.0f} VNĐ")
+        self.avg_order_value.setText(
+            f"Giá trị trung bình: {avg_order_value:,.0f} VNĐ")
+
+        # Biểu đồ doanh thu theo thời gian
+        dates = []
+        revenues = []
+        for row in summary["daily"]:
+            dates.append(datetime.strptime(
+                row[0], "%Y-%m-%d").strftime("%d/%m"))
+            revenues.append(row[2])
+
+        self.revenue_figure.clear()
+        ax = self.revenue_figure.add_subplot(111)
+        ax.bar(dates, revenues)
+        ax.set_title("Doanh thu theo ngày")
+        ax.set_xlabel("Ngày")
+        ax.set_ylabel("Doanh thu (VNĐ)")
+        plt.xticks(rotation=45)
+        self.revenue_figure.tight_layout()
+        self.revenue_canvas.draw_idle()
+
+        # Thống kê theo danh mục
+        categories = summary["categories"]
+
+        # Lưu dữ liệu gốc của bảng danh mục
+        self.category_data = []
+        category_names = []
+        category_revenues = []
+
+        for category in categories:
+            name, order_count, revenue = category
+            percentage = (revenue / total_revenue *
+                          100) if total_revenue > 0 else 0
+
+            row_data = (
+                name,
+                order_count,
+                f"{revenue:,.0f} VNĐ",
+                f"{percentage:.1f}%"
+            )
+            self.category_data.append(row_data)
+
+            # Thêm dữ liệu cho biểu đồ tròn
+            category_names.append(name)
+            category_revenues.append(revenue if revenue else 0)
+
+        self.category_model.set_rows(self.category_data)
+
+        # Vẽ biểu đồ tròn danh mục
+        self.category_figure.clear()
+        ax = self.category_figure.add_subplot(111)
+
+        # Chỉ vẽ biểu đồ nếu có dữ liệu
+        if category_revenues:
+            ax.pie(category_revenues,
+                   labels=category_names, autopct='%1.1f%%')
+            ax.set_title("Tỷ lệ doanh thu theo danh mục")
+        else:
+            ax.text(0.5, 0.5, "Không có dữ liệu", ha='center', va='center')
+
+        self.category_figure.tight_layout()
+        self.category_canvas.draw_idle()
+
+        # Thống kê theo món
+        items = summary["items"]
+
+        # Lưu dữ liệu gốc của bảng món
+        self.item_data = []
+        item_names = []
+        item_quantities = []
+
+        for i, item in enumerate(items):
+            name, quantity, revenue = item
+            percentage = (revenue / total_revenue *
+                          100) if total_revenue > 0 else 0
+
+            row_data = (
+                name,
+                quantity if quantity else 0,
+                f"{revenue:,.0f} VNĐ" if revenue else "0 VNĐ",
+                f"{percentage:.1f}%"
+            )
+            self.item_data.append(row_data)
+
+            # Thêm dữ liệu cho biểu đồ cột (chỉ lấy top 10)
+            if i < 10:
+                item_names.append(name)
+                item_quantities.append(quantity if quantity else 0)
+
+        self.item_model.set_rows(self.item_data)
+
+        # Vẽ biểu đồ top 10 món bán chạy
+        self.item_figure.clear()
+        ax = self.item_figure.add_subplot(111)
+
+        # Chỉ vẽ biểu đồ nếu có dữ liệu
+        if item_quantities:
+            ax.bar(item_names, item_quantities)
+            ax.set_title("Top 10 món bán chạy nhất")
+            ax.set_xlabel("Tên món")
+            ax.set_ylabel("Số lượng đã bán")
+            plt.xticks(rotation=45, ha='right')
+        else:
+            ax.text(0.5, 0.5, "Không có dữ liệu", ha='center', va='center')
+
+        self.item_figure.tight_layout()
+        self.item_canvas.draw_idle()
+
@@ -0,0 +1,248 @@
+from bisect import bisect_left
+from functools import total_ordering
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt6.QtWidgets import QAbstractItemView, QHeaderView, QTableView
+
+from config.database import get_connection
+
+# Số dòng tải thêm mỗi lần cuộn tới cuối bảng
+PAGE_SIZE = 200
+
+
+class Column:
+    """Mô tả một cột của bảng.
+
+    value là chỉ số trong dòng dữ liệu hoặc hàm nhận dòng và trả về chuỗi
+    hiển thị. background (nếu có) nhận dòng và trả về QBrush hoặc None.
+    edit_value (nếu có) làm cột sửa được qua delegate, trả về giá trị gốc
+    mà delegate dùng để chọn mục hiện tại.
+    """
+
+    def __init__(self, header, value, background=None, edit_value=None):
+        self.header = header
+        self.value = value
+        self.background = background
+        self.edit_value = edit_value
+
+    def display(self, row):
+        if callable(self.value):
+            return self.value(row)
+        value = row[self.value]
+        return "" if value is None else str(value)
+
+
+@total_ordering
+class Descending:
+    """Bọc một giá trị trong sort_key để sắp xếp giảm dần (như cột DESC
+    trong ORDER BY), dùng cho giá trị không đổi dấu được, ví dụ chuỗi"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+
+class LazyTableModel(QAbstractTableModel):
+    """Model bảng chỉ giữ dữ liệu thô của các dòng đã tải.
+
+    Dữ liệu được tải từng trang qua fetch_page() khi view cuộn tới cuối
+    (canFetchMore/fetchMore), chuỗi hiển thị chỉ được tính cho các ô đang
+    hiện trên màn hình. Dữ liệu nhỏ có sẵn trong bộ nhớ thì dùng set_rows().
+    """
+
+    def __init__(self, columns, page_size=PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self.columns = columns
+        self.page_size = page_size
+        self._rows = []
+        self._exhausted = True
+
+    def fetch_page(self, conn, loaded_rows, limit):
+        """Trả về tối đa limit dòng tiếp theo sau các dòng đã tải"""
+        return []
+
+    def reload(self):
+        """Bỏ các dòng đã tải, view sẽ tự tải lại trang đầu"""
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = False
+        self.endResetModel()
+
+    def set_rows(self, rows):
+        """Thay toàn bộ dữ liệu bằng các dòng có sẵn (không tải thêm)"""
+        self.beginResetModel()
+        self._rows = list(rows)
+        self._exhausted = True
+        self.endResetModel()
+
+    def row_data(self, row):
+        return self._rows[row]
+
+    def rows(self):
+        return self._rows
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        column = self.columns[index.column()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return column.display(row)
+        if role == Qt.ItemDataRole.EditRole and column.edit_value:
+            return column.edit_value(row)
+        if role == Qt.ItemDataRole.BackgroundRole and column.background:
+            return column.background(row)
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and self.columns[index.column()].edit_value:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (orientation == Qt.Orientation.Horizontal
+                and role == Qt.ItemDataRole.DisplayRole):
+            return self.columns[section].header
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        with get_connection() as conn:
+            rows = self.fetch_page(conn, self._rows, self.page_size)
+        if len(rows) < self.page_size:
+            self._exhausted = True
+        if rows:
+            self.append_rows(rows)
+
+    def append_rows(self, rows):
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def insert_row(self, position, row):
+        self.beginInsertRows(QModelIndex(), position, position)
+        self._rows.insert(position, row)
+        self.endInsertRows()
+
+    def remove_row(self, position):
+        self.beginRemoveRows(QModelIndex(), position, position)
+        del self._rows[position]
+        self.endRemoveRows()
+
+    def update_row(self, position, row):
+        self._rows[position] = row
+        self.dataChanged.emit(self.index(position, 0),
+                              self.index(position, len(self.columns) - 1))
+
+
+class QueryTableModel(LazyTableModel):
+    """Model đọc kết quả một truy vấn SELECT theo từng trang (LIMIT/OFFSET).
+
+    Nếu có sort_key (hàm nhận dòng, trả về khóa theo đúng thứ tự ORDER BY
+    của truy vấn và khác nhau giữa các dòng), apply_changes() đưa các dòng
+    vừa thay đổi vào đúng vị trí mà không tải lại cả bảng. Cột đầu tiên
+    của truy vấn phải là khóa chính.
+    """
+
+    def __init__(self, columns, sql, params=(), sort_key=None,
+                 page_size=PAGE_SIZE, parent=None):
+        super().__init__(columns, page_size, parent)
+        self.sql = sql
+        self.params = tuple(params)
+        self.sort_key = sort_key
+        self._keys = []
+        self._key_by_id = {}
+
+    def set_query(self, sql, params=()):
+        self.sql = sql
+        self.params = tuple(params)
+        self.reload()
+
+    def fetch_page(self, conn, loaded_rows, limit):
+        cursor = conn.cursor()
+        cursor.execute(f"{self.sql} LIMIT ? OFFSET ?",
+                       self.params + (limit, len(loaded_rows)))
+        return cursor.fetchall()
+
+    def reload(self):
+        self._keys = []
+        self._key_by_id = {}
+        super().reload()
+
+    def set_rows(self, rows):
+        rows = list(rows)
+        if self.sort_key:
+            self._keys = [self.sort_key(row) for row in rows]
+            self._key_by_id = {
+                row[0]: key for row, key in zip(rows, self._keys)}
+        super().set_rows(rows)
+
+    def append_rows(self, rows):
+        if self.sort_key:
+            for row in rows:
+                key = self.sort_key(row)
+                self._keys.append(key)
+                self._key_by_id[row[0]] = key
+        super().append_rows(rows)
+
+    def apply_changes(self, changed_rows):
+        """Cập nhật tại chỗ, di chuyển hoặc chèn các dòng đã thay đổi"""
+        for row in changed_rows:
+            key = self.sort_key(row)
+            old_key = self._key_by_id.pop(row[0], None)
+            if old_key is not None:
+                old_position = bisect_left(self._keys, old_key)
+                if old_key == key:
+                    self._key_by_id[row[0]] = key
+                    self.update_row(old_position, row)
+                    continue
+                del self._keys[old_position]
+                self.remove_row(old_position)
+
+            position = bisect_left(self._keys, key)
+            if position == len(self._keys) and not self._exhausted:
+                # Dòng nằm sau phần đã tải, sẽ được tải cùng trang sau
+                continue
+            self._keys.insert(position, key)
+            self._key_by_id[row[0]] = key
+            self.insert_row(position, row)
+
+    def remove_ids(self, ids):
+        """Bỏ các dòng có khóa chính trong ids (đã bị xóa) nếu đang hiện"""
+        for row_id in ids:
+            key = self._key_by_id.pop(row_id, None)
+            if key is None:
+                continue
+            position = bisect_left(self._keys, key)
+            del self._keys[position]
+            self.remove_row(position)
+
+
+def create_table_view(model, parent=None):
+    """QTableView cho model, các cột giãn đều như bảng cũ"""
+    view = QTableView(parent)
+    view.setModel(model)
+    view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    view.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked
+                         | QAbstractItemView.EditTrigger.SelectedClicked)
+    view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+    return view
@@ -128,15 +128,16 @@ class AdminWindow(QMainWindow):
         self.inventory_manager = InventoryManager()
         self.report_manager = ReportManager()
 
-        # Thêm AI Assistant vào stacked widget
-        self.ai_assistant = AIAssistantView()
-        self.stacked_widget.addWidget(self.ai_assistant)
-
         self.stacked_widget.addWidget(self.employee_manager)
         self.stacked_widget.addWidget(self.menu_manager)
         self.stacked_widget.addWidget(self.inventory_manager)
         self.stacked_widget.addWidget(self.report_manager)
 
+        # Trang AI thêm sau cùng để không phải trang mặc định: mô hình chỉ
+        # được tải khi admin mở trang này
+        self.ai_assistant = AIAssistantView()
+        self.stacked_widget.addWidget(self.ai_assistant)
+
     def create_menu_buttons(self, layout):
         buttons = [
             ("Quản lý nhân viên", "👥", lambda: self.change_page(self.employee_manager)),
@@ -0,0 +1,77 @@
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from config.database import get_connection
+
+
+class WorkerSignals(QObject):
+    """Signal gửi kết quả từ worker về GUI thread"""
+    finished = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+
+class Worker(QRunnable):
+    """Chạy fn(*args) trên QThreadPool, kết quả gửi về qua signals"""
+
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+            return
+        self.signals.finished.emit(result)
+
+
+class DatabaseWorker(QRunnable):
+    """Chạy fn(conn, *args) trên QThreadPool với một kết nối riêng của thread.
+
+    cancel() đánh dấu worker bị hủy và ngắt truy vấn đang chạy bằng
+    conn.interrupt(); worker đã hủy không phát signal nào nữa.
+    """
+
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.signals = WorkerSignals()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._cancelled = False
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            if self._conn is not None:
+                self._conn.interrupt()
+
+    def run(self):
+        if self._cancelled:
+            return
+        try:
+            with get_connection() as conn:
+                with self._lock:
+                    if self._cancelled:
+                        return
+                    self._conn = conn
+                try:
+                    result = self.fn(conn, *self.args)
+                finally:
+                    with self._lock:
+                        self._conn = None
+        except Exception as e:
+            if not self._cancelled:
+                self.signals.error.emit(str(e))
+            return
+
+        if not self._cancelled:
+            self.signals.finished.emit(result)